@@ -7,11 +7,13 @@ const API_CONFIG = {
   ENDPOINTS: {
     AUTH: {
       LOGIN: '/auth/login',
+      LOGIN_STATUS: '/auth/login/status',
       LOGOUT: '/auth/logout',
       REFRESH: '/auth/refresh'
     },
     LEAVE: {
       ATTENDANCE: '/leave/attendance',
+      ATTENDANCE_BATCH: '/leave/attendance/batch',
       TYPE: '/leave/type',
       SUBMIT: '/leave/submit'
     },
@@ -21,6 +23,9 @@ const API_CONFIG = {
     }
   },
   
+  // Số nhân viên tối đa mỗi lần gọi /leave/attendance/batch (khớp LEAVE_BATCH_MAX_EMPLOYEES của server)
+  LEAVE_BATCH_MAX_EMPLOYEES: 200,
+  
   // Request timeout
   TIMEOUT: 30000,
   
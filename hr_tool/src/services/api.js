@@ -10,13 +10,14 @@ class ApiService {
   // Generic request method with retry logic
   async request(endpoint, options = {}) {
     const url = buildApiUrl(endpoint)
+    // Spread options before headers so caller headers (e.g. Authorization) don't drop Content-Type
     const config = {
+      timeout: this.timeout,
+      ...options,
       headers: {
         'Content-Type': 'application/json',
         ...options.headers
-      },
-      timeout: this.timeout,
-      ...options
+      }
     }
 
     let lastError
@@ -64,6 +65,15 @@ class ApiService {
     })
   }
 
+  async getLoginStatus(token) {
+    return this.request(getEndpoint('AUTH', 'LOGIN_STATUS'), {
+      method: 'GET',
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    })
+  }
+
   async logout(token) {
     return this.request(getEndpoint('AUTH', 'LOGOUT'), {
       method: 'POST',
@@ -84,18 +94,58 @@ class ApiService {
 
   // Leave methods
   async getLeaveAttendance(employeeId, token) {
-    return this.request(getEndpoint('LEAVE', 'ATTENDANCE'), {
-      method: 'POST',
+    const query = new URLSearchParams({ employee_id: employeeId })
+    return this.request(`${getEndpoint('LEAVE', 'ATTENDANCE')}?${query}`, {
+      method: 'GET',
       headers: {
         'Authorization': `Bearer ${token}`
-      },
-      body: JSON.stringify({ employee_id: employeeId })
+      }
     })
   }
 
+  // Chia danh sách nhân viên thành nhiều lần gọi theo giới hạn của server và gộp kết quả
+  async getLeaveAttendanceBatch(employeeIds, token, options = {}) {
+    const chunkSize = API_CONFIG.LEAVE_BATCH_MAX_EMPLOYEES
+    const chunks = []
+    for (let i = 0; i < employeeIds.length; i += chunkSize) {
+      chunks.push(employeeIds.slice(i, i + chunkSize))
+    }
+    
+    const responses = await Promise.all(chunks.map(chunk =>
+      this.request(getEndpoint('LEAVE', 'ATTENDANCE_BATCH'), {
+        method: 'POST',
+        headers: {
+          'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify({
+          employee_ids: chunk,
+          start_date: options.startDate,
+          end_date: options.endDate,
+          tran_year: options.tranYear
+        })
+      })
+    ))
+    
+    if (responses.length === 1) {
+      return responses[0]
+    }
+    
+    const failed = responses.find(response => !response.success)
+    if (failed) {
+      return failed
+    }
+    
+    return responses.reduce((merged, response) => ({
+      ...response,
+      employee_ids: [...merged.employee_ids, ...(response.employee_ids || [])],
+      results: { ...merged.results, ...response.results },
+      total_count: merged.total_count + (response.total_count || 0)
+    }), { employee_ids: [], results: {}, total_count: 0 })
+  }
+
   async getLeaveTypes(token) {
     return this.request(getEndpoint('LEAVE', 'TYPE'), {
-      method: 'POST',
+      method: 'GET',
       headers: {
         'Authorization': `Bearer ${token}`
       }
@@ -93,35 +93,7 @@ export const useUserStore = defineStore('user', {
         
         // Cập nhật thông tin user với safe access
         if (payload.data.user) {
-          this.userInfo = {
-            department: payload.data.user.department || '',
-            displayName: formatDisplayName(payload.data.user.display_name),
-            email: payload.data.user.email || '',
-            isManager: payload.data.user.is_manager || false,
-            permissions: payload.data.user.permissions || [],
-            samAccount: payload.data.user.sam_account || '',
-            subordinates: payload.data.user.subordinates || [],
-            subordinatesCount: payload.data.user.subordinates_count || 0,
-            title: payload.data.user.title || '',
-            userId: payload.data.user.user_id || '',
-            username: payload.data.user.username || ''
-          }
-          
-          // Cập nhật thông tin manager với safe access
-          if (payload.data.user.manager_info) {
-            this.managerInfo = {
-              department: payload.data.user.manager_info.department || '',
-              displayName: formatDisplayName(payload.data.user.manager_info.display_name),
-              dn: payload.data.user.manager_info.dn || '',
-              givenName: payload.data.user.manager_info.given_name || '',
-              mail: payload.data.user.manager_info.mail || '',
-              mobile: payload.data.user.manager_info.mobile || '',
-              phone: payload.data.user.manager_info.phone || '',
-              samAccount: payload.data.user.manager_info.sam_account || '',
-              surname: payload.data.user.manager_info.surname || '',
-              title: payload.data.user.manager_info.title || ''
-            }
-          }
+          this.applyUserInfo(payload.data.user)
         }
         
         // Cập nhật message và success status
@@ -135,6 +107,11 @@ export const useUserStore = defineStore('user', {
         // Setup auto token refresh
         this.setupAutoRefresh()
 
+        // Manager / subordinates được server bổ sung ở background
+        if (payload.data.enrichment?.status === 'pending') {
+          this.pollLoginEnrichment()
+        }
+
         console.log('✅ User data saved successfully', {
           user: this.userInfo.displayName,
           rememberMe: rememberMe,
@@ -147,6 +124,63 @@ export const useUserStore = defineStore('user', {
       }
     },
 
+    // Cập nhật userInfo / managerInfo từ dữ liệu user của server
+    applyUserInfo(user) {
+      this.userInfo = {
+        department: user.department || '',
+        displayName: formatDisplayName(user.display_name),
+        email: user.email || '',
+        isManager: user.is_manager || false,
+        permissions: user.permissions || [],
+        samAccount: user.sam_account || '',
+        subordinates: user.subordinates || [],
+        subordinatesCount: user.subordinates_count || 0,
+        title: user.title || '',
+        userId: user.user_id || '',
+        username: user.username || ''
+      }
+      
+      // Cập nhật thông tin manager với safe access
+      if (user.manager_info) {
+        this.managerInfo = {
+          department: user.manager_info.department || '',
+          displayName: formatDisplayName(user.manager_info.display_name),
+          dn: user.manager_info.dn || '',
+          givenName: user.manager_info.given_name || '',
+          mail: user.manager_info.mail || '',
+          mobile: user.manager_info.mobile || '',
+          phone: user.manager_info.phone || '',
+          samAccount: user.manager_info.sam_account || '',
+          surname: user.manager_info.surname || '',
+          title: user.manager_info.title || ''
+        }
+      }
+    },
+
+    // ⏳ Chờ server bổ sung manager / subordinates sau khi đăng nhập
+    async pollLoginEnrichment(maxAttempts = 10, interval = 1000) {
+      for (let attempt = 1; attempt <= maxAttempts; attempt++) {
+        await apiService.delay(interval)
+        if (!this.tokens.accessToken) return
+
+        try {
+          const response = await apiService.getLoginStatus(this.tokens.accessToken)
+          const status = response?.data?.status
+
+          if (status === 'complete' && response.data.user) {
+            this.applyUserInfo(response.data.user)
+            this.saveToStorage(this.rememberMe)
+            console.log('✅ Login enrichment completed')
+            return
+          }
+          if (status !== 'pending') return
+        } catch (error) {
+          console.warn('⚠️ Login enrichment status check failed:', error.message)
+          return
+        }
+      }
+    },
+
     // 💾 Lưu vào storage based on Remember Me
     saveToStorage(rememberMe) {
       const userData = {
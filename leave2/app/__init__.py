@@ -3,6 +3,7 @@
 """
 Flask Application Factory - 使用日誌擴展版本
 """
+import logging
 import time
 from flask import Flask, g, request
 from flask_cors import CORS
@@ -13,13 +14,39 @@ def init_logging_extension(app):
     from .extensions.logging_extension import logging_extension
     logging_extension.init_app(app)
     
+def init_proxy_fix(app):
+    """位於反向代理之後時，依信任的代理層數以 X-Forwarded-For 設定 request.remote_addr"""
+    proxy_config = app.config.get('PROXY_FIX_CONFIG', {})
+    x_for = proxy_config.get('X_FOR', 0)
+    x_proto = proxy_config.get('X_PROTO', 0)
+    if x_for or x_proto:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=x_for, x_proto=x_proto)
+    
+def init_json_provider(app):
+    """設定 JSON 提供者（安裝 orjson 時以 orjson 序列化 API 響應）"""
+    from .utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
 def init_other_extensions(app):
     """初始化其他擴展"""
     # from .extensions.logging_extension import get_logger
-    from .extensions import get_logger, FlaskDatabaseManager, enhanced_jwt_manager, ad_auth, data_pool_manager
+    from .extensions import (
+        get_logger, FlaskDatabaseManager, enhanced_jwt_manager, ad_auth, data_pool_manager,
+        background_tasks, reference_data, ldap_pools, directory_cache, org_tree, session_snapshots,
+        login_throttle, request_timing
+    )
     logger = get_logger('app')
     
     try:
+        # 初始化請求計時（資料庫、LDAP、JWT 與序列化耗時，可選輸出 Server-Timing 標頭）
+        request_timing.init_app(app)
+        logger.info("Request timing initialized")
+        
+        # 初始化背景任務管理器（其他擴展的週期性任務依賴它）
+        background_tasks.init_app(app)
+        logger.info("Background task manager initialized")
+        
         # 初始化資料庫管理器
         
         # from .extensions.flask_database import FlaskDatabaseManager
@@ -36,6 +63,26 @@ def init_other_extensions(app):
         enhanced_jwt_manager.init_app(app)
         logger.info("JWT manager initialized")
         
+        # 初始化 LDAP 連接池（AD 認證器共用）
+        ldap_pools.init_app(app)
+        logger.info("LDAP pool manager initialized")
+        
+        # 初始化目錄快取（組織資料，背景預熱）
+        directory_cache.init_app(app)
+        logger.info("Directory cache initialized")
+        
+        # 初始化組織樹（定期自 AD 同步並保存到資料庫）
+        org_tree.init_app(app)
+        logger.info("Org tree initialized")
+        
+        # 初始化會話快照（/user 端點的資料來源）
+        session_snapshots.init_app(app)
+        logger.info("Session snapshots initialized")
+        
+        # 初始化登入節流（AD 綁定前檢查失敗次數）
+        login_throttle.init_app(app)
+        logger.info("Login throttle initialized")
+        
          # 初始化 AD 認證
         ad_auth.init_app(app)
         logger.info("AD auth initialized")
@@ -44,6 +91,10 @@ def init_other_extensions(app):
         data_pool_manager.init_app(app)
         logger.info("Data pool manager initialized")
         
+        # 初始化參考資料快取
+        reference_data.init_app(app)
+        logger.info("Reference data cache initialized")
+        
         # from .extensions import data_pool_manager, ad_auth
         # data_pool_manager.init_app(app)
         # ad_auth.init_app(app)
@@ -58,41 +109,53 @@ def init_other_extensions(app):
 def register_request_hooks(app):
     """註冊請求鉤子"""
     from .extensions.logging_extension import get_logger
-    logger = get_logger('app')
+    from .extensions.request_timing import request_timing
+    # 每個請求的 Request / Response 日誌使用獨立記錄器，可由 LOG_SAMPLING_CONFIG 設定抽樣比例
+    logger = get_logger('app.request')
+    
+    # 過濾設定於註冊時讀取一次
+    log_filters = app.config.get('LOG_FILTERS') or {}
+    exclude_paths = frozenset(log_filters.get('exclude_paths', []))
+    exclude_user_agents = tuple(log_filters.get('exclude_user_agents', []))
+    request_id_enabled = app.config.get('LOG_REQUEST_ID', False)
+    # 結構化日誌的每筆記錄已含 request_id，不需另外記錄
+    log_request_id_line = request_id_enabled and not app.config.get('STRUCTURED_LOGGING', False)
     
     @app.before_request
     def log_request():
         """記錄請求信息"""
+        g.request_start = time.perf_counter()
+        
+        # 如果啟用了請求 ID 追蹤（先產生，使本請求的所有日誌都帶有請求 ID）
+        if request_id_enabled:
+            import uuid
+            g.request_id = uuid.uuid4().hex[:8]
+        
         # 檢查是否需要過濾此請求的日誌
-        if hasattr(app.config, 'LOG_FILTERS'):
-            exclude_paths = app.config.LOG_FILTERS.get('exclude_paths', [])
-            if request.path in exclude_paths:
-                return
-            
-            exclude_user_agents = app.config.LOG_FILTERS.get('exclude_user_agents', [])
+        if request.path in exclude_paths:
+            return
+        if exclude_user_agents:
             user_agent = request.headers.get('User-Agent', '')
             if any(agent in user_agent for agent in exclude_user_agents):
                 return
         
-        # 記錄請求
-        logger.info(f"Request: {request.method} {request.path} from {request.remote_addr}")
-        
-        # 如果啟用了請求 ID 追蹤
-        if hasattr(app.config, 'LOG_REQUEST_ID') and app.config.LOG_REQUEST_ID:
-            import uuid
-            g.request_id = str(uuid.uuid4())[:8]
-            logger.info(f"Request ID: {g.request_id}")
+        # 記錄請求（參數延遲格式化，級別被過濾時不產生字串）
+        logger.info("Request: %s %s from %s", request.method, request.path, request.remote_addr)
+        if log_request_id_line:
+            logger.info("Request ID: %s", g.request_id)
     
     @app.after_request
     def log_response(response):
         """記錄響應信息"""
         # 檢查是否需要過濾
-        if hasattr(app.config, 'LOG_FILTERS'):
-            exclude_paths = app.config.LOG_FILTERS.get('exclude_paths', [])
-            if request.path in exclude_paths:
-                return response
+        if request.path in exclude_paths:
+            return response
         
-        logger.info(f"Response: {response.status_code} for {request.method} {request.path}")
+        if logger.isEnabledFor(logging.INFO):
+            duration_ms = round((time.perf_counter() - g.get('request_start', time.perf_counter())) * 1000, 2)
+            logger.info("Response: %s for %s %s (%.2f ms)", response.status_code, request.method, request.path,
+                        duration_ms, extra={'status': response.status_code, 'duration_ms': duration_ms,
+                                            'timings': request_timing.summary()})
         return response
 
 def register_error_handlers(app):
@@ -115,8 +178,8 @@ def register_error_handlers(app):
             'user_agent': request.headers.get('User-Agent', '')
         }
         
-        logger.error(f"Unhandled exception: {str(e)}", exc_info=True, extra=error_info)
-        security_logger.error(f"Security alert - Unhandled exception from {request.remote_addr}: {str(e)}")
+        logger.error("Unhandled exception: %s", e, exc_info=True, extra=error_info)
+        security_logger.error("Security alert - Unhandled exception from %s: %s", request.remote_addr, e)
         
         return {'error': 'Internal server error'}, 500
     
@@ -124,21 +187,21 @@ def register_error_handlers(app):
     def handle_not_found(e):
         """處理 404 錯誤"""
         logger = get_logger('app')
-        logger.warning(f"404 Not Found: {request.method} {request.path} from {request.remote_addr}")
+        logger.warning("404 Not Found: %s %s from %s", request.method, request.path, request.remote_addr)
         return {'error': 'Resource not found'}, 404
     
     @app.errorhandler(401)
     def handle_unauthorized(e):
         """處理 401 錯誤"""
         auth_logger = get_logger('auth')
-        auth_logger.warning(f"Unauthorized access attempt: {request.path} from {request.remote_addr}")
+        auth_logger.warning("Unauthorized access attempt: %s from %s", request.path, request.remote_addr)
         return {'error': 'Unauthorized access'}, 401
     
     @app.errorhandler(403)
     def handle_forbidden(e):
         """處理 403 錯誤"""
         security_logger = get_logger('security')
-        security_logger.warning(f"Forbidden access attempt: {request.path} from {request.remote_addr}")
+        security_logger.warning("Forbidden access attempt: %s from %s", request.path, request.remote_addr)
         return {'error': 'Forbidden access'}, 403
 
 def register_management_routes(app):
@@ -198,34 +261,34 @@ def register_management_routes(app):
         
         # 獲取日誌統計信息
         try:
-            log_stats = app.extensions['logging'].get_log_statistics()
+            log_stats = app.extensions['logging_extension'].get_statistics()
         except:
             log_stats = {'error': 'Logging extension not available'}
         
         log_info = {
             'logging_extension_stats': log_stats,
-            'log_level': getattr(app.config, 'LOG_LEVEL', 'INFO'),
-            'log_directory': getattr(app.config, 'LOG_DIR', 'logs'),
-            'console_enabled': getattr(app.config, 'CONSOLE_LOG_ENABLED', True),
-            'structured_logging': getattr(app.config, 'STRUCTURED_LOGGING', False),
+            'log_level': app.config.get('LOG_LEVEL', 'INFO'),
+            'log_directory': app.config.get('LOG_DIR', 'logs'),
+            'console_enabled': app.config.get('CONSOLE_LOG_ENABLED', True),
+            'structured_logging': app.config.get('STRUCTURED_LOGGING', False),
+            'log_routes': app.config.get('LOG_ROUTES'),
             'log_files': {}
         }
         
         # 檢查日誌文件狀態
-        if hasattr(app.config, 'LOG_FILES'):
-            for log_name, log_config in app.config.LOG_FILES.items():
-                file_path = log_config['filename']
-                file_exists = os.path.exists(file_path)
-                file_size = os.path.getsize(file_path) if file_exists else 0
-                
-                log_info['log_files'][log_name] = {
-                    'path': file_path,
-                    'exists': file_exists,
-                    'size_bytes': file_size,
-                    'level': getattr(log_config, 'level', 'INFO'),
-                    'max_bytes': log_config.get('max_bytes', 0),
-                    'backup_count': log_config.get('backup_count', 0)
-                }
+        for log_name, log_config in app.config.get('LOG_FILES', {}).items():
+            file_path = log_config['filename']
+            file_exists = os.path.exists(file_path)
+            file_size = os.path.getsize(file_path) if file_exists else 0
+
+            log_info['log_files'][log_name] = {
+                'path': file_path,
+                'exists': file_exists,
+                'size_bytes': file_size,
+                'level': logging.getLevelName(log_config.get('level', logging.INFO)),
+                'max_bytes': log_config.get('max_bytes', 0),
+                'backup_count': log_config.get('backup_count', 0)
+            }
         
         return log_info
     
@@ -233,7 +296,7 @@ def register_management_routes(app):
     def flush_logs():
         """強制刷新所有日誌到文件"""
         try:
-            app.extensions['logging'].flush_all_logs()
+            app.extensions['logging_extension'].flush_all_logs()
             logger.info("Manual log flush requested via web interface")
             return {'message': 'All logs flushed successfully', 'status': 'success'}
         except Exception as e:
@@ -244,21 +307,20 @@ def register_management_routes(app):
     def log_statistics():
         """獲取詳細的日誌統計信息"""
         try:
-            stats = app.extensions['logging'].get_log_statistics()
+            stats = app.extensions['logging_extension'].get_statistics()
             
             # 添加文件系統統計
             import os
             file_stats = {}
-            if hasattr(app.config, 'LOG_FILES'):
-                for log_name, log_config in app.config.LOG_FILES.items():
-                    file_path = log_config['filename']
-                    if os.path.exists(file_path):
-                        stat = os.stat(file_path)
-                        file_stats[log_name] = {
-                            'size': stat.st_size,
-                            'modified': stat.st_mtime,
-                            'created': stat.st_ctime
-                        }
+            for log_name, log_config in app.config.get('LOG_FILES', {}).items():
+                file_path = log_config['filename']
+                if os.path.exists(file_path):
+                    stat = os.stat(file_path)
+                    file_stats[log_name] = {
+                        'size': stat.st_size,
+                        'modified': stat.st_mtime,
+                        'created': stat.st_ctime
+                    }
             
             stats['file_statistics'] = file_stats
             return stats
@@ -298,6 +360,13 @@ def register_blueprints(app):
             logger.info("admin_bp blueprint registered")
         except ImportError:
             logger.warning("admin_bp blueprint not available")
+        
+        try:
+            from app.blueprints.user import user_bp
+            app.register_blueprint(user_bp, url_prefix='/user')
+            logger.info("User blueprint registered")
+        except ImportError:
+            logger.warning("User blueprint not available")
 
         
     except ImportError as e:
@@ -351,6 +420,8 @@ def create_app(config_name='production'):
     }
     
     app.config.from_object(config_class[config_name])
+    init_proxy_fix(app)
+    init_json_provider(app)
     
     # 按順序初始化擴展
     # 1. 優先初始化日誌系統（作為第一個擴展）
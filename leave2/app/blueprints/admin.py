@@ -13,7 +13,15 @@ from app.extensions import (
     jwt_required,
     admin_required,
     get_current_user,
-    JWTUtils
+    JWTUtils,
+    reference_data,
+    ldap_pools,
+    ad_auth,
+    directory_cache,
+    org_tree,
+    background_tasks,
+    session_snapshots,
+    login_throttle
 )
 from app.utils.jwt_auth_enhanced import get_current_user, get_current_token
 
@@ -26,6 +34,204 @@ EMAIL_CONFIG = BaseConfig.EMAIL_CONFIG
 
 admin_bp = Blueprint('admin', __name__)
 
+@admin_bp.route('/reference-data', methods=['GET'])
+@admin_required()
+def get_reference_data_stats():
+    """獲取參考資料快取狀態"""
+    return jsonify({
+        'success': True,
+        'data': reference_data.get_statistics()
+    })
+
+
+@admin_bp.route('/reference-data/refresh', methods=['POST'])
+@admin_required()
+def refresh_reference_data():
+    """
+    手動刷新參考資料快取
+    
+    Request Body:
+    {
+        "name": "leave_types"    // 可選，未指定時刷新全部
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    name = data.get('name')
+    
+    try:
+        refreshed = reference_data.refresh(name)
+    except KeyError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 404
+    
+    logger.info(f"參考資料手動刷新: {refreshed}")
+    return jsonify({
+        'success': True,
+        'data': {
+            'refreshed': refreshed,
+            'statistics': reference_data.get_statistics()
+        }
+    })
+
+
+@admin_bp.route('/token-revocation', methods=['GET'])
+@admin_required()
+def get_token_revocation_stats():
+    """獲取 Token 撤銷快取狀態"""
+    cache = enhanced_jwt_manager.revocation_cache
+    return jsonify({
+        'success': True,
+        'enabled': cache is not None,
+        'data': cache.get_statistics() if cache is not None else None
+    })
+
+
+@admin_bp.route('/session-activity', methods=['GET'])
+@admin_required()
+def get_session_activity_stats():
+    """獲取會話活動緩衝狀態"""
+    buffer = enhanced_jwt_manager.session_activity
+    return jsonify({
+        'success': True,
+        'enabled': buffer is not None,
+        'data': buffer.get_statistics() if buffer is not None else None
+    })
+
+
+@admin_bp.route('/audit-queue', methods=['GET'])
+@admin_required()
+def get_audit_queue_stats():
+    """獲取稽核寫入佇列狀態"""
+    audit_queue = enhanced_jwt_manager.audit_queue
+    return jsonify({
+        'success': True,
+        'enabled': audit_queue is not None,
+        'data': audit_queue.get_statistics() if audit_queue is not None else None
+    })
+
+
+@admin_bp.route('/login-throttle', methods=['GET'])
+@admin_required()
+def get_login_throttle_stats():
+    """獲取登入節流狀態"""
+    return jsonify({
+        'success': True,
+        'data': login_throttle.get_statistics()
+    })
+
+
+@admin_bp.route('/login-throttle/unblock', methods=['POST'])
+@admin_required()
+def unblock_login():
+    """
+    解除登入封鎖
+    
+    Request Body:
+    {
+        "username": "u6001",
+        "ip_address": "192.168.1.10"   // 可選，未指定時解除該帳號所有 IP 的封鎖
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    username = data.get('username')
+    if not username:
+        return jsonify({
+            'success': False,
+            'message': 'Username is required',
+            'error_code': 'MISSING_USERNAME'
+        }), 400
+    
+    cleared = login_throttle.unblock(username, data.get('ip_address'))
+    logger.info(f"管理員解除帳號 {username} 的登入封鎖，共 {cleared} 筆")
+    return jsonify({
+        'success': True,
+        'message': f'Cleared {cleared} throttle entries',
+        'cleared': cleared
+    })
+
+
+@admin_bp.route('/ldap-pools', methods=['GET'])
+@admin_required()
+def get_ldap_pool_stats():
+    """獲取 LDAP 連接池狀態"""
+    return jsonify({
+        'success': True,
+        'data': ldap_pools.get_statistics()
+    })
+
+
+@admin_bp.route('/directory-cache', methods=['GET'])
+@admin_required()
+def get_directory_cache_stats():
+    """獲取目錄快取狀態"""
+    return jsonify({
+        'success': True,
+        'data': directory_cache.get_statistics()
+    })
+
+
+@admin_bp.route('/directory-cache/clear', methods=['POST'])
+@admin_required()
+def clear_directory_cache():
+    """清空目錄快取（AD 組織異動需立即生效時使用）"""
+    directory_cache.clear()
+    logger.info("目錄快取已手動清空")
+    return jsonify({
+        'success': True,
+        'message': 'Directory cache cleared'
+    })
+
+
+@admin_bp.route('/session-snapshots', methods=['GET'])
+@admin_required()
+def get_session_snapshot_stats():
+    """獲取會話快照狀態"""
+    return jsonify({
+        'success': True,
+        'data': session_snapshots.get_statistics()
+    })
+
+
+@admin_bp.route('/org-tree', methods=['GET'])
+@admin_required()
+def get_org_tree_stats():
+    """獲取組織樹同步狀態"""
+    return jsonify({
+        'success': True,
+        'data': org_tree.get_statistics()
+    })
+
+
+@admin_bp.route('/org-tree/sync', methods=['POST'])
+@admin_required()
+def sync_org_tree():
+    """在背景立即執行一次組織樹同步"""
+    if not org_tree.enabled:
+        return jsonify({
+            'success': False,
+            'message': 'Org tree sync is disabled',
+            'error_code': 'ORG_TREE_DISABLED'
+        }), 400
+
+    background_tasks.submit(org_tree.sync)
+    return jsonify({
+        'success': True,
+        'message': 'Org tree sync scheduled'
+    }), 202
+
+
+@admin_bp.route('/ad-bind-formats', methods=['GET'])
+@admin_required()
+def get_ad_bind_format_stats():
+    """獲取 AD 綁定格式學習統計"""
+    return jsonify({
+        'success': True,
+        'data': ad_auth.get_bind_statistics()
+    })
+
+
 @admin_bp.route('/email/test', methods=['GET', 'POST'])
 # @jwt_required()
 # @permission_required(['admin:write'])
@@ -8,7 +8,11 @@ from flask import Blueprint, request, jsonify, current_app, g
 from app.extensions import (
     logger, 
     ADAuthenticator,
+    ad_auth,
     enhanced_jwt_manager,
+    session_snapshots,
+    login_throttle,
+    request_timing,
     jwt_required,
     admin_required,
     get_current_user,
@@ -60,15 +64,50 @@ def login():
         domain = data.get('domain', DEFAULT_DOMAIN)
         remember_me = data.get('remember_me', False)
         
-        # AD 認證
-        authenticator = ADAuthenticator(server_ip, domain, DEFAULT_ORGANIZATION)
+        # 登入節流：同帳號同 IP 失敗過多時直接拒絕，不進行 AD 綁定也不查詢資料庫
+        # 以連線位址為鍵：X-Forwarded-For / X-Real-IP 由客戶端控制，每次更換即可繞過封鎖；
+        # 位於反向代理之後時由 PROXY_FIX_CONFIG 設定信任的代理層數
+        client_ip = request.remote_addr or 'unknown'
+        retry_after = login_throttle.check(username, client_ip)
+        if retry_after:
+            enhanced_jwt_manager.record_failed_login(username, 'throttled', is_suspicious=True)
+            response = jsonify({
+                'success': False,
+                'message': 'Too many failed login attempts, please try again later',
+                'error_code': 'TOO_MANY_ATTEMPTS',
+                'retry_after': retry_after
+            })
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        
+        # 非同步補齊：只做密碼綁定與使用者查詢即發出 Token，主管與下屬於背景補齊
+        async_enrichment = current_app.config.get('LOGIN_CONFIG', {}).get('ASYNC_ENRICHMENT', True) \
+            and session_snapshots.enabled
+        
+        # AD 認證（重用認證器與其 LDAP 連接池）
+        authenticator = ad_auth.get_authenticator(server_ip, domain, DEFAULT_ORGANIZATION)
         auth_result = authenticator.authenticate_and_get_info(
-            username, password, get_manager_info=True, get_subordinates=True
+            username, password, get_manager_info=True, get_subordinates=True,
+            defer_related=async_enrichment
         )
+        # 認證器各階段耗時（連接、綁定、使用者 / 主管 / 下屬查詢）計入請求計時
+        request_timing.record_many(auth_result.get('timing'), 'ldap')
         
         if not auth_result['success']:
-            # 記錄失敗的登入嘗試
-            enhanced_jwt_manager.record_failed_login(username, 'auth_failed')
+            if auth_result.get('error_code') != 'AUTH_FAILED':
+                # AD 連接失敗或內部錯誤與帳號密碼無關，不計入登入節流，避免 AD 故障時封鎖使用者
+                logger.error("用戶 %s 登入時認證服務錯誤: %s (%s)", username, auth_result.get('error_code'),
+                             auth_result.get('error_details') or auth_result.get('message'))
+                enhanced_jwt_manager.record_failed_login(username, 'service_error', is_suspicious=False)
+                return jsonify({
+                    'success': False,
+                    'message': 'Authentication service unavailable',
+                    'error_code': 'AUTH_SERVICE_UNAVAILABLE'
+                }), 503
+            
+            # 記錄失敗的登入嘗試（可疑標記由登入節流的滑動視窗判定）
+            is_suspicious = login_throttle.record_failure(username, client_ip)
+            enhanced_jwt_manager.record_failed_login(username, 'auth_failed', is_suspicious=is_suspicious)
             
             return jsonify({
                 'success': False,
@@ -76,6 +115,8 @@ def login():
                 'error_code': 'AUTH_FAILED'
             }), 401
         
+        login_throttle.record_success(username, client_ip)
+        
         # 提取用戶信息
         user_info = JWTUtils.extract_user_info_from_ad_result(auth_result)
         
@@ -89,10 +130,14 @@ def login():
             'server': server_ip,
             'domain': domain
         }
-        tokens = enhanced_jwt_manager.generate_tokens(user_info, auth_info)
+        tokens = enhanced_jwt_manager.generate_tokens(user_info, auth_info, defer_persistence=async_enrichment)
+        
+        # 保存會話快照，之後 /user/profile、/user/subordinates 直接讀取
+        enrichment_pending = auth_result['data'].get('enrichment_pending', False)
+        session_snapshots.capture(tokens.get('session_id'), user_info, auth_info, enrich=enrichment_pending)
         
         # 記錄登入
-        logger.info(f"用戶 {username} 登入成功，會話 ID: {tokens.get('session_id')}")
+        logger.info("用戶 %s 登入成功，會話 ID: %s", username, tokens.get('session_id'))
         
         return jsonify({
             'success': True,
@@ -104,6 +149,9 @@ def login():
                 'session_management': {
                     'database_tracking': True,
                     'session_id': tokens.get('session_id')
+                },
+                'enrichment': {
+                    'status': 'pending' if enrichment_pending else 'complete'
                 }
             }
         }), 200
@@ -116,6 +164,33 @@ def login():
             'error_code': 'LOGIN_ERROR'
         }), 500
 
+@auth_bp.route('/login/status', methods=['GET'])
+@jwt_required()
+def login_status():
+    """
+    查詢登入後背景補齊（主管、下屬、權限）的狀態
+    
+    status 為 complete 時，data.user 為完整的用戶信息（與登入響應格式相同）
+    """
+    current_user = get_current_user() or {}
+    snapshot = session_snapshots.get(current_user.get('session_id'), current_user.get('username'))
+    
+    if snapshot is None:
+        return jsonify({
+            'success': False,
+            'message': 'No login snapshot found for this session',
+            'error_code': 'SNAPSHOT_NOT_FOUND'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'status': snapshot['status'],
+            'user': snapshot['user_info'] if snapshot['status'] == 'complete' else None
+        }
+    }), 200
+
+
 @auth_bp.route('/refresh', methods=['POST'])
 def refresh():
     """
@@ -185,9 +260,10 @@ def logout():
         if current_token:
             # 使用增強的登出功能
             success = enhanced_jwt_manager.logout_user(current_token, 'manual')
+            session_snapshots.discard(current_user.get('session_id'))
             
             if success:
-                logger.info(f"用戶 {current_user.get('username', 'unknown')} 登出成功")
+                logger.info("用戶 %s 登出成功", current_user.get('username', 'unknown'))
                 return jsonify({
                     'success': True,
                     'message': 'Logout successful',
@@ -3,7 +3,9 @@
 """
 請假模組
 """
+import threading
 import time
+from datetime import datetime
 
 from flask import Blueprint, request, jsonify, current_app, g
 
@@ -16,19 +18,215 @@ from app.extensions import (
     admin_required,
     get_current_user,
     permission_required,
-    JWTUtils
+    JWTUtils,
+    reference_data
 )
 from app.utils.jwt_auth_enhanced import get_current_user, get_current_token
-from app.utils import get_db_manager
+from app.utils import get_db_manager, build_in_clause, LeaveBalanceCalculator
+from app.utils.cache_utils import LRUTTLCache
+from app.utils.http_cache import compute_etag, is_not_modified, not_modified_response, set_cache_headers
+from app.utils.streaming import ndjson_response
+from app.utils.result_serializer import rows_to_records
 
 leave_bp = Blueprint('leave', __name__)
 
-@leave_bp.route('/attendance', methods=['POST'])
+# 假期餘額計算器（每位員工每次請求只計算一次）
+leave_balance_calculator = LeaveBalanceCalculator('mssql_hr')
+
+# 批量查詢單次最多員工數（MSSQL 單語句參數上限為 2100）
+DEFAULT_BATCH_MAX_EMPLOYEES = 200
+
+# 建立請假快取時使用的鎖（並行的首次請求只建立一個實例）
+_leave_cache_lock = threading.Lock()
+
+
+def _iter_record_chunks(stream, first_rows=None):
+    """
+    將 stream_query 逐批返回的結果列轉換為字典列表（關閉時一併關閉來源游標）
+    
+    Args:
+        stream: stream_query 返回的產生器
+        first_rows: 建立響應前已預先讀取的第一批結果列（可選）
+    """
+    try:
+        if first_rows is not None:
+            yield rows_to_records(first_rows, json_safe=True)
+        for rows in stream:
+            yield rows_to_records(rows, json_safe=True)
+    finally:
+        stream.close()
+
+
+def _get_leave_cache():
+    """
+    獲取出勤/假期餘額快取（依 LEAVE_CACHE_CONFIG 延遲建立）
+    
+    快取鍵格式：
+        ('attendance', employee_id, tran_year)
+        ('balance', employee_id)
+    
+    Returns:
+        LRUTTLCache: 快取實例，停用時返回 None
+    """
+    cache_config = current_app.config.get('LEAVE_CACHE_CONFIG', {})
+    if not cache_config.get('ENABLED', True):
+        return None
+    
+    cache = current_app.extensions.get('leave_cache')
+    if cache is None:
+        with _leave_cache_lock:
+            cache = current_app.extensions.get('leave_cache')
+            if cache is None:
+                cache = LRUTTLCache(
+                    max_size=cache_config.get('MAX_SIZE', 2000),
+                    ttl=cache_config.get('TTL', 300),
+                    name='leave'
+                )
+                current_app.extensions['leave_cache'] = cache
+    return cache
+
+
+def invalidate_employee_cache(employee_id):
+    """
+    使指定員工的出勤與假期餘額快取失效
+    
+    寫入假單（或其他會異動 D15T2020 的操作）後必須呼叫
+    
+    Args:
+        employee_id: 員工編號
+        
+    Returns:
+        int: 被移除的快取項目數
+    """
+    cache = _get_leave_cache()
+    if cache is None:
+        return 0
+    employee_id = str(employee_id).strip()
+    removed = cache.invalidate_where(lambda key: key[1] == employee_id)
+    logger.info("已清除員工 %s 的請假快取 %s 筆", employee_id, removed)
+    return removed
+
+
+def _get_balances(employee_ids):
+    """
+    取得員工剩餘特休，優先使用快取，未命中者以單次集合查詢補齊
+    
+    Args:
+        employee_ids: 員工編號列表
+        
+    Returns:
+        dict: 員工編號 -> 剩餘特休
+    """
+    cache = _get_leave_cache()
+    if cache is None:
+        return leave_balance_calculator.get_balances(employee_ids)
+    
+    balances = {}
+    missing_ids = []
+    for employee_id in employee_ids:
+        cached = cache.get(('balance', employee_id))
+        if cached is None:
+            missing_ids.append(employee_id)
+        else:
+            balances[employee_id] = cached['remain']
+    
+    if missing_ids:
+        for employee_id, remain in leave_balance_calculator.get_balances(missing_ids).items():
+            cache.set(('balance', employee_id), {'remain': remain})
+            balances[employee_id] = remain
+    
+    return balances
+
+
+def _get_attendance_fingerprints(employee_ids, tran_year=None):
+    """
+    以單次彙總查詢取得員工出勤記錄的指紋（不讀取明細列）
+    
+    指紋包含筆數、最後請假日、數量合計及內容校驗碼，任何新增、刪除或修改都會改變指紋，
+    用於產生 ETag 判斷客戶端副本是否仍為最新
+    
+    Args:
+        employee_ids: 員工編號列表
+        tran_year: 年份（可選）
+        
+    Returns:
+        dict: 員工編號 -> 指紋列表，查無記錄的員工為 None
+    """
+    fingerprints = {employee_id: None for employee_id in employee_ids}
+    if not employee_ids:
+        return fingerprints
+    
+    params = {}
+    id_clause = build_in_clause('fp_eid', employee_ids, params)
+    # 條件須與明細查詢一致，確保指紋與回傳內容對應
+    query = f"""
+    SELECT A.EmployeeID, COUNT(*) AS row_count, MAX(A.LeaveDate) AS last_leave_date,
+    SUM(A.Quantity) AS total_quantity,
+    CHECKSUM_AGG(BINARY_CHECKSUM(A.LeaveTypeID, A.Quantity, A.LeaveDate, A.TranYear)) AS checksum
+    FROM D15T2020 A
+    inner join D15T1020 B on A.LeaveTypeID = B.LeaveTypeID
+    inner join D09T0201 C on A.EmployeeID = C.EmployeeID
+    WHERE A.EmployeeID IN {id_clause} and A.LeaveDate is not null and A.TransType != 'I03'
+    """
+    if tran_year:
+        query += " AND A.TranYear = :tran_year"
+        params['tran_year'] = int(tran_year)
+    query += " GROUP BY A.EmployeeID"
+    
+    db_mgr = get_db_manager()
+    mssql_pool = db_mgr.get_pool('mssql_hr')
+    for row in mssql_pool.execute_query(query, params):
+        employee_id = str(row.EmployeeID).strip()
+        fingerprints[employee_id] = [
+            row.row_count,
+            row.last_leave_date.isoformat() if row.last_leave_date else None,
+            str(row.total_quantity),
+            row.checksum
+        ]
+    return fingerprints
+
+
+def _attendance_etag(employee_id, tran_year, fingerprint, remain):
+    """
+    出勤記錄的 ETag
+    
+    查無指紋（無記錄或員工編號與資料庫不一致）時無法判斷內容是否異動，不產生 ETag，
+    避免相同的 ETag 在記錄變更後仍回應 304
+    """
+    if fingerprint is None:
+        return None
+    return compute_etag('attendance', employee_id, tran_year, fingerprint, remain)
+
+
+def _parse_date(value, field_name):
+    """解析 YYYY-MM-DD 格式日期，格式錯誤時拋出 ValueError"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"{field_name} 格式錯誤，應為 YYYY-MM-DD")
+
+
+def _parse_year(value, field_name='tran_year'):
+    """解析年份（整數），格式錯誤時拋出 ValueError"""
+    if value is None or value == '':
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{field_name} 格式錯誤，應為整數年份")
+
+
+@leave_bp.route('/attendance', methods=['GET', 'POST'])
 @jwt_required()
 # @permission_required(['employee:read'])
 def get_employee_attendance_protected():
     """
     受保護的查詢員工出勤記錄（增強版）
+    
+    GET 請求以查詢參數傳入 employee_id / tran_year，並支援 If-None-Match（304 Not Modified）；
+    POST 請求以 JSON 傳入相同參數
     """
     try:
         current_user = get_current_user()
@@ -46,16 +244,19 @@ def get_employee_attendance_protected():
         print(f"  權限列表: {user_permissions}")
         
 
-        # 驗證請求格式
-        if not request.is_json:
+        # 獲取請求數據（GET 使用查詢參數，POST 使用 JSON）
+        if request.method == 'GET':
+            data = request.args
+        elif request.is_json:
+            data = request.get_json()
+        else:
             return jsonify({
                 'success': False,
                 'message': '請求必須為 JSON 格式'
             }), 400
             
-        # 獲取請求數據
-        data = request.get_json()
-        employee_id = data.get('employee_id')
+        # 與資料庫 EmployeeID 相同去除空白，查詢、快取鍵與餘額 / 指紋查找都使用此值
+        employee_id = str(data.get('employee_id') or '').strip()
         tran_year = data.get('tran_year')
         
         # 驗證必填參數
@@ -65,6 +266,14 @@ def get_employee_attendance_protected():
                 'message': '員工編號為必填參數'
             }), 400
         
+        try:
+            tran_year = _parse_year(tran_year)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
         # 權限檢查：檢查用戶是否有查詢權限
         user_permissions = current_user.get('permissions', [])
         is_manager = current_user.get('is_manager', False)
@@ -88,21 +297,9 @@ def get_employee_attendance_protected():
         #         'error_code': 'INSUFFICIENT_PRIVILEGES'
         #     }), 403
         
-        # 構建查詢
+        # 構建查詢（剩餘特休由 LeaveBalanceCalculator 另行計算一次，不再逐列計算）
         query = """
-        SELECT A.EmployeeID,A.LeaveTypeID,B.LeaveTypeNameU,A.Quantity,A.LeaveDate,A.TranYear,
-        (
-                CONVERT(int,
-                DATEDIFF(MONTH, C.DateJoined, GETDATE()) -
-                ISNULL((
-                    SELECT SUM(Quantity)
-                    FROM D15T2020
-                    WHERE LeaveDate IS NOT NULL
-                        AND EmployeeID = :employee_id
-                        AND LeaveTypeID IN ('PN', 'PT')
-                        AND TransType != 'I03'
-                ), 0))
-            ) AS remain
+        SELECT A.EmployeeID,A.LeaveTypeID,B.LeaveTypeNameU,A.Quantity,A.LeaveDate,A.TranYear
         FROM D15T2020 A
         inner join D15T1020 B on A.LeaveTypeID = B.LeaveTypeID
         inner join D09T0201 C on A.EmployeeID = C.EmployeeID
@@ -113,31 +310,50 @@ def get_employee_attendance_protected():
         # 如果指定了年份，添加到查詢條件
         if tran_year:
             query += " AND TranYear = :tran_year"
-            params['tran_year'] = int(tran_year)
+            params['tran_year'] = tran_year
         
-        # 執行查詢
+        # 執行查詢（優先使用快取）
         try:
-            db_mgr = get_db_manager()
-            mssql_pool = db_mgr.get_pool('mssql_hr')
-            results = mssql_pool.execute_query(query, params)
+            cache = _get_leave_cache()
+            cache_key = ('attendance', employee_id, params.get('tran_year'))
+            cached = cache.get(cache_key) if cache is not None else None
             
-            # 將結果轉換為字典列表
-            attendance_records = []
-            for row in results:
-                record = dict(row._mapping)
-                # 處理日期時間類型
-                for key, value in record.items():
-                    if hasattr(value, 'isoformat'):
-                        record[key] = value.isoformat()
-                attendance_records.append(record)
+            # 剩餘特休於回應層級提供
+            remain = _get_balances([employee_id]).get(employee_id)
+            
+            if cached is None:
+                # 先取指紋再讀明細：兩者之間若有異動，下次請求的指紋必然不同，不會誤判為未修改
+                fingerprint = _get_attendance_fingerprints([employee_id], tran_year).get(employee_id)
+                etag = _attendance_etag(employee_id, params.get('tran_year'), fingerprint, remain)
+                
+                # 客戶端副本仍為最新時，不必讀取與序列化明細列
+                if is_not_modified(etag):
+                    return not_modified_response(etag)
+                
+                db_mgr = get_db_manager()
+                mssql_pool = db_mgr.get_pool('mssql_hr')
+                results = mssql_pool.execute_query(query, params)
+                
+                # 將結果轉換為字典列表
+                cached = {'records': rows_to_records(results), 'fingerprint': fingerprint}
+                if cache is not None:
+                    cache.set(cache_key, cached)
+            else:
+                etag = _attendance_etag(employee_id, params.get('tran_year'), cached['fingerprint'], remain)
+                if is_not_modified(etag):
+                    return not_modified_response(etag)
+            
+            attendance_records = cached['records']
             
             # 記錄查詢操作
-            logger.info(f"用戶 {current_user.get('username')} (會話: {current_user.get('session_id')}) 查詢員工 {employee_id} 的出勤記錄")
+            logger.info("用戶 %s (會話: %s) 查詢員工 %s 的出勤記錄",
+                        current_user.get('username'), current_user.get('session_id'), employee_id)
             
-            return jsonify({
+            response = jsonify({
                 'success': True,
                 'employee_id': employee_id,
                 'tran_year': tran_year,
+                'remain': remain,
                 'records': attendance_records,
                 'count': len(attendance_records),
                 'accessed_by': {
@@ -146,6 +362,7 @@ def get_employee_attendance_protected():
                 },
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
             })
+            return set_cache_headers(response, etag)
             
         except Exception as e:
             logger.error(f"查詢出勤記錄失敗: {str(e)}")
@@ -162,32 +379,338 @@ def get_employee_attendance_protected():
             'message': '處理請求時發生錯誤',
             'error': str(e)
         }), 500
+
+
+
+@leave_bp.route('/attendance/batch', methods=['POST'])
+@jwt_required()
+def get_team_attendance_batch():
+    """
+    批量查詢多位員工的出勤記錄（單次查詢）
+    
+    Request Body:
+    {
+        "employee_ids": ["u6001", "u6002"],
+        "start_date": "2025-01-01",        // 可選
+        "end_date": "2025-12-31",          // 可選
+        "tran_year": 2025                  // 可選
+    }
+    
+    Returns:
+        以員工編號為鍵的出勤記錄
+    """
+    try:
+        current_user = get_current_user()
         
+        if not request.is_json:
+            return jsonify({
+                'success': False,
+                'message': '請求必須為 JSON 格式'
+            }), 400
+        
+        data = request.get_json()
+        employee_ids = data.get('employee_ids')
+        tran_year = data.get('tran_year')
+        
+        if not isinstance(employee_ids, list) or not employee_ids:
+            return jsonify({
+                'success': False,
+                'message': 'employee_ids 必須為非空列表'
+            }), 400
+        
+        # 去除空值與重複，保持請求順序
+        employee_ids = list(dict.fromkeys(
+            str(eid).strip() for eid in employee_ids if eid and str(eid).strip()
+        ))
+        if not employee_ids:
+            return jsonify({
+                'success': False,
+                'message': 'employee_ids 必須為非空列表'
+            }), 400
+        
+        max_employees = current_app.config.get('LEAVE_BATCH_MAX_EMPLOYEES', DEFAULT_BATCH_MAX_EMPLOYEES)
+        if len(employee_ids) > max_employees:
+            return jsonify({
+                'success': False,
+                'message': f'單次最多查詢 {max_employees} 位員工'
+            }), 400
         
-@leave_bp.route('/type', methods=['POST'])
+        try:
+            start_date = _parse_date(data.get('start_date'), 'start_date')
+            end_date = _parse_date(data.get('end_date'), 'end_date')
+            tran_year = _parse_year(tran_year)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        # 權限檢查：主管、HR 部門或具 employee:read 權限者可查詢他人，其他用戶只能查詢自己
+        user_permissions = current_user.get('permissions', [])
+        is_manager = current_user.get('is_manager', False)
+        user_id = current_user.get('user_id', '')
+        is_hr_department = current_user.get('department', '').lower() == 'hr'
+        has_employee_read_permission = 'employee:read' in user_permissions
+        
+        if not (is_manager or is_hr_department or has_employee_read_permission):
+            if any(eid != user_id for eid in employee_ids):
+                return jsonify({
+                    'success': False,
+                    'message': '權限不足，只能查詢自己的出勤記錄',
+                    'error_code': 'INSUFFICIENT_PRIVILEGES'
+                }), 403
+        
+        # 構建單一集合查詢，剩餘特休由 LeaveBalanceCalculator 以另一個集合查詢一次算出
+        params = {}
+        id_clause = build_in_clause('eid', employee_ids, params)
+        query = f"""
+        SELECT A.EmployeeID,A.LeaveTypeID,B.LeaveTypeNameU,A.Quantity,A.LeaveDate,A.TranYear
+        FROM D15T2020 A
+        inner join D15T1020 B on A.LeaveTypeID = B.LeaveTypeID
+        inner join D09T0201 C on A.EmployeeID = C.EmployeeID
+        WHERE A.EmployeeID IN {id_clause} and A.LeaveDate is not null and A.TransType != 'I03'
+        """
+        
+        if start_date:
+            query += " AND A.LeaveDate >= :start_date"
+            params['start_date'] = start_date
+        if end_date:
+            query += " AND A.LeaveDate <= :end_date"
+            params['end_date'] = end_date
+        if tran_year:
+            query += " AND A.TranYear = :tran_year"
+            params['tran_year'] = tran_year
+        
+        query += " ORDER BY A.EmployeeID, A.LeaveDate"
+        
+        try:
+            db_mgr = get_db_manager()
+            mssql_pool = db_mgr.get_pool('mssql_hr')
+            results = mssql_pool.execute_query(query, params)
+            
+            # 依員工分組，未查到記錄的員工也回傳空列表
+            grouped = {eid: [] for eid in employee_ids}
+            for record in rows_to_records(results):
+                employee_id = str(record.get('EmployeeID', '')).strip()
+                grouped.setdefault(employee_id, []).append(record)
+            
+            balances = _get_balances(list(grouped.keys()))
+            
+            results_by_employee = {
+                eid: {
+                    'remain': balances.get(eid),
+                    'records': records,
+                    'count': len(records)
+                }
+                for eid, records in grouped.items()
+            }
+            total_count = sum(item['count'] for item in results_by_employee.values())
+            
+            logger.info("用戶 %s (會話: %s) 批量查詢 %d 位員工的出勤記錄",
+                        current_user.get('username'), current_user.get('session_id'), len(employee_ids))
+            
+            return jsonify({
+                'success': True,
+                'employee_ids': employee_ids,
+                'start_date': start_date.isoformat() if start_date else None,
+                'end_date': end_date.isoformat() if end_date else None,
+                'tran_year': tran_year,
+                'results': results_by_employee,
+                'total_count': total_count,
+                'accessed_by': {
+                    'username': current_user.get('username'),
+                    'session_id': current_user.get('session_id')
+                },
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+            })
+            
+        except Exception as e:
+            logger.error(f"批量查詢出勤記錄失敗: {str(e)}")
+            return jsonify({
+                'success': False,
+                'message': '批量查詢出勤記錄失敗',
+                'error': str(e)
+            }), 500
+            
+    except Exception as e:
+        logger.error(f"處理請求時發生錯誤: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': '處理請求時發生錯誤',
+            'error': str(e)
+        }), 500
+
+
+@leave_bp.route('/attendance/export', methods=['GET'])
 @jwt_required()
-def get_leave_type() :
-    query = "select LeaveTypeID,LeaveTypeNameU from D15T1020 where IsLemonWeb = 1"
+def export_attendance():
+    """
+    匯出出勤記錄（NDJSON 串流，每行一筆記錄）
+    
+    以伺服器端游標逐批讀取並輸出，匯出全公司資料時不需在記憶體中保存整個結果集
     
+    Query Parameters:
+        employee_id: 員工編號（可選，未指定時匯出全部；一般用戶只能匯出自己）
+        tran_year: 年份（可選）
+        start_date: 起始請假日 YYYY-MM-DD（可選）
+        end_date: 結束請假日 YYYY-MM-DD（可選）
+    """
     try:
+        current_user = get_current_user()
+        
+        employee_id = request.args.get('employee_id')
+        tran_year = request.args.get('tran_year', type=int)
+        try:
+            start_date = _parse_date(request.args.get('start_date'), 'start_date')
+            end_date = _parse_date(request.args.get('end_date'), 'end_date')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        # 權限檢查：主管、HR 部門或具 employee:read 權限者可匯出他人，其他用戶只能匯出自己
+        user_id = current_user.get('user_id', '')
+        is_privileged = (
+            current_user.get('is_manager', False)
+            or current_user.get('department', '').lower() == 'hr'
+            or 'employee:read' in current_user.get('permissions', [])
+        )
+        if not is_privileged:
+            if employee_id and employee_id != user_id:
+                return jsonify({
+                    'success': False,
+                    'message': '權限不足，只能匯出自己的出勤記錄',
+                    'error_code': 'INSUFFICIENT_PRIVILEGES'
+                }), 403
+            employee_id = user_id
+        
+        query = """
+        SELECT A.EmployeeID,A.LeaveTypeID,B.LeaveTypeNameU,A.Quantity,A.LeaveDate,A.TranYear
+        FROM D15T2020 A
+        inner join D15T1020 B on A.LeaveTypeID = B.LeaveTypeID
+        inner join D09T0201 C on A.EmployeeID = C.EmployeeID
+        WHERE A.LeaveDate is not null and A.TransType != 'I03'
+        """
+        params = {}
+        if employee_id:
+            query += " AND A.EmployeeID = :employee_id"
+            params['employee_id'] = employee_id
+        if start_date:
+            query += " AND A.LeaveDate >= :start_date"
+            params['start_date'] = start_date
+        if end_date:
+            query += " AND A.LeaveDate <= :end_date"
+            params['end_date'] = end_date
+        if tran_year:
+            query += " AND A.TranYear = :tran_year"
+            params['tran_year'] = tran_year
+        query += " ORDER BY A.EmployeeID, A.LeaveDate"
+        
+        chunk_size = current_app.config.get('LEAVE_EXPORT_CHUNK_SIZE', 1000)
         db_mgr = get_db_manager()
-        mssql_pool = db_mgr.get_pool('mssql_hr')
-        results = mssql_pool.execute_query(query) 
-        
-        attendance_records = []
-        for row in results:
-            record = dict(row._mapping)
-            # 處理日期時間類型
-            for key, value in record.items():
-                if hasattr(value, 'isoformat'):
-                    record[key] = value.isoformat()
-            attendance_records.append(record)
+        stream = db_mgr.stream_query('mssql_hr', query, params, chunk_size)
+        # 在送出響應標頭前取得連接並讀取第一批，連接或 SQL 錯誤仍可返回 500
+        first_rows = next(stream, None)
+        
+        logger.info("用戶 %s (會話: %s) 匯出出勤記錄 (員工: %s, 年份: %s)",
+                    current_user.get('username'), current_user.get('session_id'), employee_id or '全部', tran_year)
         
+        filename = f"attendance_{employee_id or 'all'}_{tran_year or 'all'}.ndjson"
+        return ndjson_response(_iter_record_chunks(stream, first_rows), filename=filename)
+        
+    except Exception as e:
+        logger.error(f"匯出出勤記錄失敗: {str(e)}")
         return jsonify({
+            'success': False,
+            'message': '匯出出勤記錄失敗',
+            'error': str(e)
+        }), 500
+
+
+@leave_bp.route('/cache/invalidate', methods=['POST'])
+@jwt_required()
+def invalidate_leave_cache():
+    """
+    使員工的請假快取失效（假單寫入後呼叫）
+    
+    Request Body:
+    {
+        "employee_id": "u6001"
+    }
+    """
+    current_user = get_current_user()
+    
+    data = request.get_json(silent=True) or {}
+    # 與快取鍵相同去除空白
+    employee_id = str(data.get('employee_id') or current_user.get('user_id') or '').strip()
+    user_id = str(current_user.get('user_id') or '').strip()
+    
+    if not employee_id:
+        return jsonify({
+            'success': False,
+            'message': '員工編號為必填參數'
+        }), 400
+    
+    # 只能清除自己的快取；HR 部門可清除任何員工的快取
+    is_hr_department = current_user.get('department', '').lower() == 'hr'
+    if employee_id != user_id and not is_hr_department:
+        return jsonify({
+            'success': False,
+            'message': '權限不足',
+            'error_code': 'INSUFFICIENT_PRIVILEGES'
+        }), 403
+    
+    removed = invalidate_employee_cache(employee_id)
+    return jsonify({
+        'success': True,
+        'employee_id': employee_id,
+        'removed': removed
+    })
+
+
+@leave_bp.route('/cache/stats', methods=['GET'])
+@admin_required()
+def get_leave_cache_stats():
+    """獲取請假快取命中統計"""
+    cache = _get_leave_cache()
+    return jsonify({
+        'success': True,
+        'enabled': cache is not None,
+        'data': cache.get_stats() if cache is not None else None
+    })        
+        
+def _load_leave_types():
+    """載入假別清單（參考資料載入函數）"""
+    query = "select LeaveTypeID,LeaveTypeNameU from D15T1020 where IsLemonWeb = 1"
+    db_mgr = get_db_manager()
+    mssql_pool = db_mgr.get_pool('mssql_hr')
+    results = mssql_pool.execute_query(query)
+    return rows_to_records(results)
+
+
+# 假別清單為極少變動的參考資料，載入一次後由背景任務定期刷新
+reference_data.register('leave_types', _load_leave_types)
+
+
+@leave_bp.route('/type', methods=['GET', 'POST'])
+@jwt_required()
+def get_leave_type() :
+    """
+    獲取假別清單（行程內快取，支援 ETag / 304）
+    """
+    try:
+        entry = reference_data.get('leave_types')
+        
+        if is_not_modified(entry.etag, entry.loaded_at):
+            return not_modified_response(entry.etag, entry.loaded_at)
+        
+        response = jsonify({
             'success': True,
             'message': 'Lấy loại nghỉ phép thành công',
-            'data': attendance_records
-        }), 200
+            'data': entry.data
+        })
+        return set_cache_headers(response, entry.etag, entry.loaded_at), 200
         
     except Exception as e:
         logger.error(f"處理請求時發生錯誤: {str(e)}")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+使用者模組
+由登入時保存的會話快照提供個人資料與下屬清單，不需重新向 AD 認證
+"""
+from flask import Blueprint, request, jsonify
+
+# 從擴展中導入需要的組件
+from app.extensions import (
+    logger,
+    jwt_required,
+    session_snapshots,
+    org_tree
+)
+from app.utils.jwt_auth_enhanced import get_current_user
+from app.utils.http_cache import compute_etag, is_not_modified, not_modified_response, set_cache_headers
+
+user_bp = Blueprint('user', __name__)
+
+
+def _get_snapshot():
+    """取得目前會話的快照（找不到時返回錯誤響應）"""
+    current_user = get_current_user() or {}
+    snapshot = session_snapshots.get(current_user.get('session_id'), current_user.get('username'))
+    if snapshot is None:
+        return None, (jsonify({
+            'success': False,
+            'message': 'User profile is not available, please log in again',
+            'error_code': 'PROFILE_UNAVAILABLE'
+        }), 404)
+    return snapshot, None
+
+
+@user_bp.route('/profile', methods=['GET'])
+@jwt_required()
+def get_profile():
+    """
+    獲取目前使用者的個人資料（含主管資訊，不含下屬清單）
+    """
+    try:
+        snapshot, error_response = _get_snapshot()
+        if error_response is not None:
+            return error_response
+
+        profile = {key: value for key, value in snapshot['user_info'].items() if key != 'subordinates'}
+        profile['captured_at'] = snapshot['captured_at']
+
+        etag = compute_etag('profile', profile)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        response = jsonify({
+            'success': True,
+            'data': profile
+        })
+        return set_cache_headers(response, etag)
+
+    except Exception as e:
+        logger.error(f"獲取個人資料錯誤: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error',
+            'error_code': 'PROFILE_ERROR'
+        }), 500
+
+
+@user_bp.route('/subordinates', methods=['GET'])
+@jwt_required()
+def get_subordinates():
+    """
+    獲取目前使用者的下屬清單
+
+    Query Parameters:
+        scope: direct（預設，直屬下屬）或 all（含跨級下屬，需組織樹索引）
+        max_depth: scope=all 時的最大層級（可選）
+    """
+    try:
+        snapshot, error_response = _get_snapshot()
+        if error_response is not None:
+            return error_response
+
+        scope = request.args.get('scope', 'direct')
+        if scope not in ('direct', 'all'):
+            return jsonify({
+                'success': False,
+                'message': 'scope must be "direct" or "all"',
+                'error_code': 'INVALID_SCOPE'
+            }), 400
+
+        user_info = snapshot['user_info']
+        if scope == 'all':
+            if not org_tree.covers(snapshot.get('domain')):
+                return jsonify({
+                    'success': False,
+                    'message': 'Org tree index is not available',
+                    'error_code': 'ORG_TREE_UNAVAILABLE'
+                }), 503
+            max_depth = request.args.get('max_depth', type=int)
+            subordinates = org_tree.get_subordinates(user_info.get('sam_account', ''), max_depth)
+        else:
+            subordinates = user_info.get('subordinates') or []
+
+        etag = compute_etag('subordinates', scope, request.args.get('max_depth'), subordinates)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        response = jsonify({
+            'success': True,
+            'data': subordinates,
+            'count': len(subordinates),
+            'scope': scope
+        })
+        return set_cache_headers(response, etag)
+
+    except Exception as e:
+        logger.error(f"獲取下屬清單錯誤: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error',
+            'error_code': 'SUBORDINATES_ERROR'
+        }), 500
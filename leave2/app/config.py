@@ -69,14 +69,76 @@ class BaseConfig:
         }
     }
     
+    # 日誌分派配置：記錄只寫入名稱對應的檔案，另依級別寫入 error / security
+    LOG_ROUTES = {
+        # 日誌檔案 -> 記錄器名稱前綴（'auth' 同時匹配 'auth.xxx'）
+        'routes': {
+            'auth': [
+                'auth',
+                'app.extensions.ad_authenticator',
+                'app.extensions.ldap_pool',
+                'app.extensions.directory_cache',
+                'app.extensions.org_tree',
+                'app.extensions.jwt_manager',
+                'app.extensions.jwt_utils',
+                'app.extensions.jwt_decorators',
+                'app.extensions.token_revocation',
+                'app.extensions.session_activity',
+                'app.extensions.session_snapshot',
+                'app.extensions.login_throttle',
+                'app.extensions.audit_queue',
+                'app.utils.jwt_auth_enhanced',
+                'app.utils.jwt_utils'
+            ],
+            'leave': ['leave', 'app.utils.leave_balance'],
+            'notification': ['notification', 'app.utils.smtp_utils'],
+            'security': ['security'],
+            'error': ['error']
+        },
+        # 依級別接收所有記錄器的檔案（級別取自 LOG_FILES）
+        'level_routes': ['error', 'security'],
+        # 名稱未匹配時寫入的檔案
+        'default': 'app'
+    }
+    
+    # 日誌寫入佇列配置（所有日誌檔案共用一個有界佇列與寫入執行緒）
+    LOG_QUEUE_CONFIG = {
+        'MAX_SIZE': int(os.getenv('LOG_QUEUE_MAX_SIZE', '10000')),              # 佇列容量（記憶體上限）
+        'BATCH_SIZE': int(os.getenv('LOG_QUEUE_BATCH_SIZE', '500')),            # 單批最多記錄數
+        'FLUSH_INTERVAL': float(os.getenv('LOG_QUEUE_FLUSH_INTERVAL', '0.5')),  # 最長累積秒數
+        'FSYNC_INTERVAL': float(os.getenv('LOG_QUEUE_FSYNC_INTERVAL', '5')),    # fsync 間隔秒數
+        'OVERFLOW_POLICY': os.getenv('LOG_QUEUE_OVERFLOW_POLICY', 'drop'),      # 佇列已滿時：drop / sample / block
+        'SAMPLE_RATE': int(os.getenv('LOG_QUEUE_SAMPLE_RATE', '10')),           # sample：每 N 筆保留一筆
+        'BLOCK_TIMEOUT': float(os.getenv('LOG_QUEUE_BLOCK_TIMEOUT', '0.05'))    # 等待佇列空間的最長秒數（錯誤級別一律等待）
+    }
+    
     # 控制台輸出配置
     CONSOLE_LOG_ENABLED = True
     CONSOLE_LOG_LEVEL = logging.INFO
     
-    # 結構化日誌配置
-    STRUCTURED_LOGGING = False
+    # 結構化日誌配置（啟用時日誌文件每行為一筆 JSON，含 request_id、user 與 extra 欄位）
+    STRUCTURED_LOGGING = os.getenv('STRUCTURED_LOGGING', 'false').lower() == 'true'
     LOG_REQUEST_ID = True
     
+    # 請求計時配置（資料庫會話、LDAP、JWT 驗證與序列化耗時）
+    REQUEST_TIMING_CONFIG = {
+        'ENABLED': os.getenv('REQUEST_TIMING_ENABLED', 'true').lower() == 'true',
+        # 輸出 Server-Timing 響應標頭（預設關閉：任何客戶端都看得到 LDAP/資料庫各階段耗時，登入失敗時可據以推測帳號是否存在）
+        'SERVER_TIMING_HEADER': os.getenv('REQUEST_TIMING_SERVER_TIMING_HEADER', 'false').lower() == 'true'
+    }
+    
+    # 日誌抽樣與去重配置（ERROR 以上級別一律記錄）
+    LOG_SAMPLING_CONFIG = {
+        'ENABLED': os.getenv('LOG_SAMPLING_ENABLED', 'true').lower() == 'true',
+        # 記錄器名稱前綴 -> 保留比例（0~1）；app.request 為每個請求的 Request / Response 日誌
+        'SAMPLE_RATES': {
+            'app.request': float(os.getenv('LOG_REQUEST_SAMPLE_RATE', '1.0'))
+        },
+        'DEDUP_WINDOW': float(os.getenv('LOG_DEDUP_WINDOW', '60')),          # 相同訊息的去重視窗（秒），0 表示不去重
+        'DEDUP_MAX_KEYS': int(os.getenv('LOG_DEDUP_MAX_KEYS', '10000')),     # 同時追蹤的訊息數上限
+        'ALWAYS_LOG_LEVEL': logging.ERROR                                     # 此級別以上不抽樣也不去重
+    }
+    
     # 日誌過濾配置
     LOG_FILTERS = {
         'exclude_paths': ['/health', '/metrics'],
@@ -95,6 +157,67 @@ class BaseConfig:
         'JWT_SESSION_TRACKING': True
     }
     
+    # Token 撤銷快取配置（行程內黑名單，增量同步）
+    JWT_REVOCATION_CACHE = {
+        'ENABLED': os.getenv('JWT_REVOCATION_CACHE_ENABLED', 'true').lower() == 'true',
+        'SYNC_INTERVAL': int(os.getenv('JWT_REVOCATION_SYNC_INTERVAL', '30')),  # 增量同步間隔（秒）
+        'MAX_STALENESS': int(os.getenv('JWT_REVOCATION_MAX_STALENESS', '120'))  # 超過此秒數未同步則回退查詢資料庫
+    }
+    
+    # 會話活動緩衝配置（最後訪問時間批量寫回）
+    SESSION_ACTIVITY_CONFIG = {
+        'ENABLED': os.getenv('SESSION_ACTIVITY_BUFFER_ENABLED', 'true').lower() == 'true',
+        'FLUSH_INTERVAL': int(os.getenv('SESSION_ACTIVITY_FLUSH_INTERVAL', '30')),  # 寫回間隔（秒）
+        'PRECISION': int(os.getenv('SESSION_ACTIVITY_PRECISION', '60'))              # 訪問時間精度（秒）
+    }
+    
+    # 登入流程配置
+    LOGIN_CONFIG = {
+        # 只做密碼綁定與使用者查詢即返回 Token，主管 / 下屬與資料庫記錄於背景完成（需 LDAP 服務帳號）
+        'ASYNC_ENRICHMENT': os.getenv('LOGIN_ASYNC_ENRICHMENT', 'true').lower() == 'true'
+    }
+    
+    # JSON 序列化配置（orjson 為選用套件，未安裝時使用標準 json 模組）
+    JSON_PROVIDER_CONFIG = {
+        'USE_ORJSON': os.getenv('JSON_USE_ORJSON', 'true').lower() == 'true',
+        'SORT_KEYS': os.getenv('JSON_SORT_KEYS', 'false').lower() == 'true'
+    }
+    
+    # 反向代理配置（信任的代理層數；0 表示直接以連線位址為客戶端 IP，不信任 X-Forwarded-For）
+    PROXY_FIX_CONFIG = {
+        'X_FOR': int(os.getenv('PROXY_FIX_X_FOR', '0')),
+        'X_PROTO': int(os.getenv('PROXY_FIX_X_PROTO', '0'))
+    }
+    
+    # 登入節流配置（同帳號同 IP 失敗過多時暫時封鎖，封鎖期間不進行 AD 綁定）
+    LOGIN_THROTTLE_CONFIG = {
+        'ENABLED': os.getenv('LOGIN_THROTTLE_ENABLED', 'true').lower() == 'true',
+        'MAX_FAILURES': int(os.getenv('LOGIN_THROTTLE_MAX_FAILURES', '5')),        # 視窗內允許的失敗次數
+        'WINDOW': int(os.getenv('LOGIN_THROTTLE_WINDOW', '900')),                  # 滑動視窗（秒）
+        'LOCKOUT': int(os.getenv('LOGIN_THROTTLE_LOCKOUT', '900')),                # 封鎖時間（秒）
+        'SUSPICIOUS_THRESHOLD': int(os.getenv('LOGIN_THROTTLE_SUSPICIOUS_THRESHOLD', '3')),  # 視窗內先前失敗幾次標記為可疑
+        'MAX_KEYS': int(os.getenv('LOGIN_THROTTLE_MAX_KEYS', '100000')),           # 追蹤的 (帳號, IP) 上限
+        'CLEANUP_INTERVAL': int(os.getenv('LOGIN_THROTTLE_CLEANUP_INTERVAL', '300'))
+    }
+    
+    # 稽核寫入佇列配置（會話、登入歷史、登入嘗試批量寫入）
+    AUDIT_QUEUE_CONFIG = {
+        'ENABLED': os.getenv('AUDIT_QUEUE_ENABLED', 'true').lower() == 'true',
+        'MAX_SIZE': int(os.getenv('AUDIT_QUEUE_MAX_SIZE', '10000')),            # 佇列容量（記憶體上限）
+        'BATCH_SIZE': int(os.getenv('AUDIT_QUEUE_BATCH_SIZE', '500')),          # 單次寫入最多筆數
+        'FLUSH_INTERVAL': float(os.getenv('AUDIT_QUEUE_FLUSH_INTERVAL', '1')),  # 最長累積秒數
+        'ENQUEUE_TIMEOUT': float(os.getenv('AUDIT_QUEUE_ENQUEUE_TIMEOUT', '0.05')),  # 佇列已滿時最多等待秒數
+        'SHUTDOWN_TIMEOUT': int(os.getenv('AUDIT_QUEUE_SHUTDOWN_TIMEOUT', '10'))     # 關閉時寫完剩餘記錄的逾時
+    }
+    
+    # 會話快照配置（登入時保存個人資料與下屬清單，供 /user 端點讀取）
+    SESSION_SNAPSHOT_CONFIG = {
+        'ENABLED': os.getenv('SESSION_SNAPSHOT_ENABLED', 'true').lower() == 'true',
+        'MAX_SIZE': int(os.getenv('SESSION_SNAPSHOT_MAX_SIZE', '5000')),
+        'REFRESH_AFTER': int(os.getenv('SESSION_SNAPSHOT_REFRESH_AFTER', '900'))  # 超過此秒數時於背景刷新
+        # 'TTL' 未設置時與 refresh token 有效期相同
+    }
+    
     # 時區配置
     TIMEZONE_CONFIG = {
     'DEFAULT_TIMEZONE': 'Asia/Ho_Chi_Minh',  # 預設時區
@@ -110,6 +233,56 @@ class BaseConfig:
         'DEFAULT_DOMAIN': "FULINVN_TN",
         'DEFAULT_ORGANIZATION': "fulinvn.com"
     }
+    
+    # LDAP 連接池配置（服務帳號用於目錄查詢，使用者密碼仍以短暫綁定驗證）
+    LDAP_POOL_CONFIG = {
+        'SERVICE_USER': os.getenv('AD_SERVICE_USER'),          # 例如 svc_hrtool@fulinvn.com，未設置時以使用者連接查詢
+        'SERVICE_PASSWORD': os.getenv('AD_SERVICE_PASSWORD'),
+        'SERVICE_SERVERS': [AD_CONFIG['DEFAULT_AD_SERVER']],  # 服務帳號只綁定到這些伺服器
+        'SIZE': int(os.getenv('LDAP_POOL_SIZE', '5')),
+        'MAX_POOLS': int(os.getenv('LDAP_MAX_POOLS', '8')),
+        'CONNECT_TIMEOUT': int(os.getenv('LDAP_CONNECT_TIMEOUT', '5')),
+        'RECEIVE_TIMEOUT': int(os.getenv('LDAP_RECEIVE_TIMEOUT', '15')),
+        'ACQUIRE_TIMEOUT': int(os.getenv('LDAP_ACQUIRE_TIMEOUT', '10')),
+        'HEALTH_CHECK_INTERVAL': int(os.getenv('LDAP_HEALTH_CHECK_INTERVAL', '60')),  # 閒置連接檢查間隔（秒）
+        'MAX_LIFETIME': int(os.getenv('LDAP_CONNECTION_MAX_LIFETIME', '1800'))        # 連接最長使用秒數
+    }
+    
+    # 目錄快取配置（使用者、主管、下屬的 AD 資料）
+    DIRECTORY_CACHE_CONFIG = {
+        'ENABLED': os.getenv('DIRECTORY_CACHE_ENABLED', 'true').lower() == 'true',
+        'MAX_SIZE': int(os.getenv('DIRECTORY_CACHE_MAX_SIZE', '5000')),
+        'TTL': int(os.getenv('DIRECTORY_CACHE_TTL', '21600')),                  # 快取存活時間（秒）
+        'NEGATIVE_TTL': int(os.getenv('DIRECTORY_CACHE_NEGATIVE_TTL', '300')),  # 查無資料的快取時間（秒）
+        'WARM_INTERVAL': int(os.getenv('DIRECTORY_CACHE_WARM_INTERVAL', '1800'))  # 背景預熱間隔（秒），0 表示停用；需服務帳號
+    }
+    
+    # 組織樹同步配置（分頁查詢全部 AD 使用者；需服務帳號）
+    ORG_TREE_CONFIG = {
+        'ENABLED': os.getenv('ORG_TREE_ENABLED', 'true').lower() == 'true',
+        'SYNC_INTERVAL': int(os.getenv('ORG_TREE_SYNC_INTERVAL', '3600')),  # 同步間隔（秒）
+        'PAGE_SIZE': int(os.getenv('ORG_TREE_PAGE_SIZE', '500')),          # 分頁大小（AD 預設 MaxPageSize 為 1000）
+        'SEARCH_BASE': os.getenv('ORG_TREE_SEARCH_BASE'),                  # 未設置時使用組織的 Base DN
+        'SEARCH_FILTER': os.getenv('ORG_TREE_SEARCH_FILTER'),              # 未設置時同步所有啟用中的使用者
+        'PERSIST': os.getenv('ORG_TREE_PERSIST', 'true').lower() == 'true'  # 保存到 MySQL，重啟後立即可用
+    }
+
+    # 請假模組配置
+    LEAVE_BATCH_MAX_EMPLOYEES = int(os.getenv('LEAVE_BATCH_MAX_EMPLOYEES', '200'))  # 批量出勤查詢單次最多員工數
+    LEAVE_EXPORT_CHUNK_SIZE = int(os.getenv('LEAVE_EXPORT_CHUNK_SIZE', '1000'))      # 出勤匯出每批讀取列數
+    LEAVE_CACHE_CONFIG = {
+        'ENABLED': os.getenv('LEAVE_CACHE_ENABLED', 'true').lower() == 'true',
+        'MAX_SIZE': int(os.getenv('LEAVE_CACHE_MAX_SIZE', '2000')),  # 最多快取項目數（LRU 淘汰）
+        'TTL': int(os.getenv('LEAVE_CACHE_TTL', '300'))              # 快取存活時間（秒）
+    }
+
+    # 背景任務配置
+    BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', '4'))
+    
+    # 參考資料快取配置（假別等查詢表）
+    REFERENCE_DATA_CONFIG = {
+        'REFRESH_INTERVAL': int(os.getenv('REFERENCE_DATA_REFRESH_INTERVAL', '3600'))  # 背景刷新間隔（秒）
+    }
 
     # 資料庫配置路徑
     DB_CONFIG_PATH = os.getenv('DB_CONFIG_PATH', str(Path(CONFIG_DIR) / 'config.txt'))
@@ -123,7 +296,8 @@ class BaseConfig:
             'max_overflow': int(os.getenv('MYSQL_MAX_OVERFLOW', '10')),
             'pool_timeout': int(os.getenv('MYSQL_POOL_TIMEOUT', '30')),
             'pool_recycle': int(os.getenv('MYSQL_POOL_RECYCLE', '3600')),
-            'echo': os.getenv('MYSQL_ECHO', 'false').lower() == 'true'
+            'echo': os.getenv('MYSQL_ECHO', 'false').lower() == 'true',
+            'batch_size': int(os.getenv('MYSQL_BATCH_SIZE', '1000'))       # 批量執行 / 插入每批列數
         },
         {
             'pool_name': 'mssql_hr',
@@ -132,7 +306,8 @@ class BaseConfig:
             'max_overflow': int(os.getenv('MSSQL_MAX_OVERFLOW', '8')),
             'pool_timeout': int(os.getenv('MSSQL_POOL_TIMEOUT', '30')),
             'pool_recycle': int(os.getenv('MSSQL_POOL_RECYCLE', '3600')),
-            'echo': os.getenv('MSSQL_ECHO', 'false').lower() == 'true'
+            'echo': os.getenv('MSSQL_ECHO', 'false').lower() == 'true',
+            'batch_size': int(os.getenv('MSSQL_BATCH_SIZE', '1000'))       # 另受 SQL Server 1000 列 / 2100 參數限制
         }
     ]
     
@@ -173,6 +348,12 @@ class DevelopmentConfig(BaseConfig):
     """開發環境配置"""
     DEBUG = True
     TESTING = False
+    
+    # 開發環境預設輸出 Server-Timing 標頭，方便在瀏覽器開發者工具檢視各階段耗時
+    REQUEST_TIMING_CONFIG = {
+        **BaseConfig.REQUEST_TIMING_CONFIG,
+        'SERVER_TIMING_HEADER': os.getenv('REQUEST_TIMING_SERVER_TIMING_HEADER', 'true').lower() == 'true'
+    }
 
 class ProductionConfig(BaseConfig):
     """生產環境配置"""
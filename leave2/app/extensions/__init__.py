@@ -139,16 +139,24 @@ except ImportError as e:
     #     QueryBuilder
     # )
     
+#--------------------------------------------------------------------
+# 背景任務與參考資料快取（僅依賴標準函式庫）
+from .background_tasks import BackgroundTaskManager, background_tasks
+from .reference_data import ReferenceDataCache, reference_data
+from .session_snapshot import SessionSnapshotStore, session_snapshots
+from .login_throttle import LoginThrottle, login_throttle
+from .request_timing import RequestTiming, request_timing
+
 #--------------------------------------------------------------------
 # AD 認證佔位符（暫時保留原有結構）
 AD_AUTH_AVAILABLE = False
 try:
-    from .ad_authenticator import ADAuthenticator,ADAuth, authenticate_user
+    from .ad_authenticator import ADAuthenticator,ADAuth, authenticate_user, ad_auth
+    from .ldap_pool import LDAPConnectionPool, LDAPPoolManager, ldap_pools
+    from .directory_cache import DirectoryCache, directory_cache
+    from .org_tree import OrgTree, org_tree
     AD_AUTH_AVAILABLE = True
     
-    # 創建 AD 認證實例
-    ad_auth = ADAuth()
-    
 except ImportError as e:
     print(f"⚠ AD 認證擴展不可用: {e}")
     
@@ -321,9 +329,28 @@ __all__ = [
     # JWT 工具
     'JWTUtils',
     
+    # 背景任務與參考資料快取
+    'background_tasks',
+    'BackgroundTaskManager',
+    'reference_data',
+    'ReferenceDataCache',
+    'session_snapshots',
+    'SessionSnapshotStore',
+    'login_throttle',
+    'LoginThrottle',
+    'request_timing',
+    'RequestTiming',
+    
     # 其他擴展
     'ADAuthenticator',
     'ad_auth',
+    'ldap_pools',
+    'LDAPPoolManager',
+    'LDAPConnectionPool',
+    'directory_cache',
+    'DirectoryCache',
+    'org_tree',
+    'OrgTree',
     'ADAuth',
     'authenticate_user',
     'AD_AUTH_AVAILABLE',
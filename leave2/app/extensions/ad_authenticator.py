@@ -11,15 +11,121 @@ from flask import Flask, current_app
 
 try:
     from ldap3 import Server, Connection, SIMPLE
-    from ldap3.core.exceptions import LDAPException, LDAPBindError
+    from ldap3.core.exceptions import LDAPException, LDAPBindError, LDAPOperationResult
+    from ldap3.utils.conv import escape_filter_chars
     LDAP_AVAILABLE = True
 except ImportError:
     LDAP_AVAILABLE = False
+
+from .directory_cache import MISS, directory_cache
+from .ldap_pool import LDAPConnectionPool, ldap_pools
+from .org_tree import org_tree
+
+
+class BindFormatStrategy:
+    """
+    記憶各網域可用的綁定帳號格式
+    
+    成功過的格式優先嘗試；AD 回報帳號已找到（停用、鎖定、過期等）時不再嘗試其他格式。
+    52e（憑證無效）同時用於密碼錯誤與無法解析的綁定名稱，只有已知可用的格式回報時才停止
+    """
+    
+    # 綁定帳號格式（依預設嘗試順序）
+    FORMATS = ('upn_domain', 'upn_organization', 'down_level', 'bare')
+    
+    # AD 診斷碼：帳號已解析但無法登入（換其他格式結果相同）
+    ACCOUNT_FOUND_CODES = ('data 530', 'data 531', 'data 532', 'data 533', 'data 701', 'data 773', 'data 775')
+    # AD 診斷碼：憑證無效（密碼錯誤，或綁定名稱無法解析，例如 UPN 後綴不存在）
+    INVALID_CREDENTIALS_CODE = 'data 52e'
+    # AD 診斷碼：找不到帳號（可嘗試其他格式）
+    ACCOUNT_NOT_FOUND_CODE = 'data 525'
+    
+    def __init__(self, domain: str, organization: str):
+        self.domain = domain
+        self.organization = organization
+        self.preferred: Optional[str] = None
+        self.early_stops = 0
+        self._stats = {name: {'attempts': 0, 'successes': 0, 'failures': 0} for name in self.FORMATS}
+    
+    def build(self, name: str, username: str) -> str:
+        """依格式名稱組出綁定帳號"""
+        if name == 'upn_domain':
+            return f"{username}@{self.domain}"
+        if name == 'upn_organization':
+            return f"{username}@{self.organization}"
+        if name == 'down_level':
+            return f"{self.domain}\\{username}"
+        return username
+    
+    def ordered(self) -> List[str]:
+        """返回嘗試順序（已知可用的格式優先）"""
+        if self.preferred is None:
+            return list(self.FORMATS)
+        return [self.preferred] + [name for name in self.FORMATS if name != self.preferred]
+    
+    def record_success(self, name: str):
+        """記錄綁定成功並設為優先格式"""
+        self._stats[name]['attempts'] += 1
+        self._stats[name]['successes'] += 1
+        self.preferred = name
+    
+    def record_failure(self, name: str, error: Exception) -> bool:
+        """
+        記錄綁定失敗
+        
+        Returns:
+            bool: 是否應停止嘗試其他格式
+        """
+        self._stats[name]['attempts'] += 1
+        self._stats[name]['failures'] += 1
+        
+        message = str(error).lower()
+        if any(code in message for code in self.ACCOUNT_FOUND_CODES):
+            stop = True
+        elif self.ACCOUNT_NOT_FOUND_CODE in message:
+            stop = False
+        else:
+            # 52e 或無法判斷原因時，只有已知可用的格式失敗才視為密碼錯誤；
+            # 尚未學到可用格式時繼續嘗試其他格式
+            stop = name == self.preferred
+        
+        if stop:
+            self.early_stops += 1
+        return stop
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取綁定格式統計信息"""
+        return {
+            'domain': self.domain,
+            'preferred': self.preferred,
+            'early_stops': self.early_stops,
+            'formats': {name: dict(stats) for name, stats in self._stats.items()}
+        }
+
+
+# 各網域共用的綁定格式策略
+_bind_strategies: Dict[Tuple[str, str], BindFormatStrategy] = {}
+
+
+def get_bind_strategy(domain: str, organization: str) -> BindFormatStrategy:
+    """獲取網域的綁定格式策略（首次使用時建立）"""
+    key = (domain.lower(), organization.lower())
+    strategy = _bind_strategies.get(key)
+    if strategy is None:
+        strategy = _bind_strategies.setdefault(key, BindFormatStrategy(domain, organization))
+    return strategy
+
+
+def get_bind_statistics() -> List[Dict[str, Any]]:
+    """獲取所有網域的綁定格式統計"""
+    return [strategy.get_statistics() for strategy in list(_bind_strategies.values())]
+
     
 class ADAuthenticator:
     """AD 認證類別"""
     
-    def __init__(self, server_ip: str, domain: str, organization: Optional[str] = None):
+    def __init__(self, server_ip: str, domain: str, organization: Optional[str] = None,
+                 pool: Optional[LDAPConnectionPool] = None):
         """
         初始化 AD 認證器
         
@@ -27,12 +133,22 @@ class ADAuthenticator:
             server_ip: AD 伺服器 IP
             domain: 網域名稱
             organization: 組織名稱，預設為 fulinvn.com
+            pool: LDAP 連接池，未指定時使用全局連接池管理器中對應伺服器的連接池
         """
         self.server_ip = server_ip
         self.domain = domain
         self.organization = organization or "fulinvn.com"
-        
-    def authenticate_and_get_info(self, username: str, password: str, get_manager_info: bool = True, get_subordinates: bool = True) -> Dict[str, Any]:
+        self.pool = pool
+        self.bind_strategy = get_bind_strategy(self.domain, self.organization)
+    
+    def _get_pool(self) -> LDAPConnectionPool:
+        """獲取此伺服器的 LDAP 連接池"""
+        if self.pool is None:
+            self.pool = ldap_pools.get_pool(self.server_ip)
+        return self.pool
+        
+    def authenticate_and_get_info(self, username: str, password: str, get_manager_info: bool = True, get_subordinates: bool = True,
+                                  defer_related: bool = False) -> Dict[str, Any]:
         """
         認證使用者並取得完整組織資訊
         
@@ -41,6 +157,8 @@ class ADAuthenticator:
             password: 密碼
             get_manager_info: 是否取得管理人員資訊
             get_subordinates: 是否取得下屬員工資訊
+            defer_related: 快取未命中時只查詢使用者本身，主管與下屬留待呼叫端以 lookup_org_info 於背景補齊
+                           （需服務帳號；結果中 enrichment_pending 為 True，subordinates_count 為直屬下屬數）
             
         Returns:
             dict: 包含認證結果和使用者資訊的字典
@@ -56,13 +174,28 @@ class ADAuthenticator:
         start_time = time.time()
         
         try:
-            # 建立伺服器連接
-            server = Server(self.server_ip, port=389)
+            # 取得連接池（Server 物件由連接池快取，不再每次登入重新建立）
+            pool = self._get_pool()
             server_time = time.time() - start_time
             
-            # 嘗試認證
+            # 嘗試認證（短暫的使用者綁定）
             auth_start = time.time()
-            successful_conn, auth_format = self._authenticate_user(server, username, password)
+            try:
+                successful_conn, auth_format = self._authenticate_user(pool, username, password)
+            except LDAPException as e:
+                # 無法連接 AD（逾時、連接中斷），與帳號密碼無關，不可計入登入失敗
+                return {
+                    'success': False,
+                    'message': 'LDAP server unavailable',
+                    'error_code': 'LDAP_UNAVAILABLE',
+                    'error_details': str(e),
+                    'data': None,
+                    'timing': {
+                        'server_connection': round(server_time, 2),
+                        'authentication': round(time.time() - auth_start, 2),
+                        'total': round(time.time() - start_time, 2)
+                    }
+                }
             auth_time = time.time() - auth_start
             
             if not successful_conn:
@@ -82,6 +215,8 @@ class ADAuthenticator:
             user_info = None
             manager_info = None
             subordinates = []
+            enrichment_pending = False
+            report_count = 0
             timing_details = {
                 'server_connection': server_time,
                 'authentication': auth_time,
@@ -91,13 +226,35 @@ class ADAuthenticator:
                 'total': 0
             }
             
-            if get_manager_info or get_subordinates:
-                user_info, manager_info, subordinates, search_timing = self._get_user_and_manager_info(
-                    successful_conn, username, get_manager_info, get_subordinates
-                )
-                timing_details.update(search_timing)
-            
-            successful_conn.unbind()
+            try:
+                if get_manager_info or get_subordinates:
+                    # 目錄快取完全命中或組織樹索引已有此使用者時，登入只需密碼綁定
+                    cached = self._get_cached_org_info(username, get_manager_info, get_subordinates)
+                    if cached is None and org_tree.covers(self.domain):
+                        cached = org_tree.get_org_info(username, get_manager_info, get_subordinates)
+                    if cached is not None:
+                        user_info, manager_info, subordinates, search_timing = cached
+                    elif pool.has_service_account:
+                        # 密碼驗證完成後立即釋放使用者連接，目錄查詢改用連接池中的服務帳號連接
+                        successful_conn.unbind()
+                        with pool.connection() as search_conn:
+                            if defer_related:
+                                user_info, report_count, search_timing = self._get_user_summary(
+                                    search_conn, username, get_subordinates
+                                )
+                                enrichment_pending = user_info is not None
+                            else:
+                                user_info, manager_info, subordinates, search_timing = self._get_user_and_manager_info(
+                                    search_conn, username, get_manager_info, get_subordinates
+                                )
+                    else:
+                        user_info, manager_info, subordinates, search_timing = self._get_user_and_manager_info(
+                            successful_conn, username, get_manager_info, get_subordinates
+                        )
+                    timing_details.update(search_timing)
+            finally:
+                if not successful_conn.closed:
+                    successful_conn.unbind()
             
             total_time = time.time() - start_time
             timing_details['total'] = total_time
@@ -110,6 +267,8 @@ class ADAuthenticator:
                     'user': user_info,
                     'manager': manager_info,
                     'subordinates': subordinates,
+                    'subordinates_count': report_count if enrichment_pending else len(subordinates),
+                    'enrichment_pending': enrichment_pending,
                     'auth_info': {
                         'username': username,
                         'domain': self.domain,
@@ -139,42 +298,84 @@ class ADAuthenticator:
                 }
             }
     
-    def _authenticate_user(self, server: Server, username: str, password: str) -> Tuple[Optional[Connection], Optional[str]]:
+    def _authenticate_user(self, pool: LDAPConnectionPool, username: str, password: str) -> Tuple[Optional[Connection], Optional[str]]:
         """
-        嘗試使用者認證
+        嘗試使用者認證（依綁定格式策略，已知可用的格式優先）
         
         Returns:
             tuple: (Connection, auth_format) 成功的連接物件和認證格式，失敗則返回 (None, None)
+            
+        Raises:
+            LDAPException: 連接失敗（非綁定失敗）
         """
-        user_formats = [
-            f"{username}@{self.domain}",
-            f"{username}@{self.organization}",
-            f"{self.domain}\\{username}",
-            username
-        ]
+        strategy = self.bind_strategy
         
-        for user_format in user_formats:
+        for name in strategy.ordered():
+            user_format = strategy.build(name, username)
             try:
-                conn = Connection(
-                    server,
-                    user=user_format,
-                    password=password,
-                    authentication=SIMPLE,
-                    auto_bind=True
-                )
+                conn = pool.bind_user(user_format, password)
+                strategy.record_success(name)
                 return conn, user_format
                 
-            except LDAPBindError:
-                continue
+            except LDAPBindError as e:
+                if strategy.record_failure(name, e):
+                    break
+            except LDAPException:
+                # 連接失敗與帳號格式無關，換格式重試只會重複等待逾時；交由呼叫端回報服務不可用
+                raise
             except Exception:
                 continue
         
         return None, None
     
+    # 使用者搜尋需要的屬性（一次取得主管 DN 與直屬下屬 DN）
+    USER_ATTRIBUTES = [
+        'sAMAccountName', 'displayName', 'givenName', 'sn', 'cn',
+        'mail', 'userPrincipalName', 'department', 'title',
+        'telephoneNumber', 'mobile', 'manager', 'employeeID',
+        'company', 'distinguishedName', 'directReports'
+    ]
+    
+    # 主管與下屬批次查詢需要的屬性
+    RELATED_ATTRIBUTES = [
+        'sAMAccountName', 'displayName', 'givenName', 'sn',
+        'mail', 'department', 'title', 'telephoneNumber',
+        'mobile', 'employeeID', 'distinguishedName', 'manager'
+    ]
+    
+    # 單一 OR 過濾條件最多包含的 DN 數量
+    DN_BATCH_SIZE = 100
+    
+    def _get_base_dn_options(self) -> List[str]:
+        """建立可能的 Base DN（根目錄放最後）"""
+        return [
+            f"DC={self.organization.replace('.', ',DC=')}",
+            f"DC={self.domain}",
+            f"DC={self.domain},DC=local",
+            ""  # 根搜尋
+        ]
+    
+    @staticmethod
+    def _attr(entry, name: str) -> str:
+        """讀取單值屬性為字串"""
+        return str(getattr(entry, name, '') or '')
+    
+    @staticmethod
+    def _attr_values(entry, name: str) -> List[str]:
+        """讀取多值屬性為字串列表"""
+        attribute = getattr(entry, name, None)
+        if attribute is None:
+            return []
+        values = getattr(attribute, 'values', None) or []
+        return [str(value) for value in values if value]
+    
     def _get_user_and_manager_info(self, conn: Connection, username: str, get_manager_info: bool = True, get_subordinates: bool = True) -> Tuple[Optional[Dict], Optional[Dict], List[Dict], Dict[str, float]]:
         """
         取得使用者、管理人員和下屬員工的詳細資訊
         
+        一次使用者搜尋同時取得主管 DN 與 directReports，再以單一批次查詢依 DN 取回主管與下屬，
+        每次登入只需 1–2 次 LDAP 查詢；目錄快取中已有的使用者與 DN 不再查詢
+        
         Args:
             conn: LDAP 連接物件
             username: 使用者名稱
@@ -190,243 +391,346 @@ class ADAuthenticator:
             'subordinates_search': 0
         }
         
-        # 建立可能的 Base DN
-        base_dn_options = [
-            f"DC={self.organization.replace('.', ',DC=')}",
-            f"DC={self.domain}",
-            f"DC={self.domain},DC=local",
-            ""  # 根搜尋
-        ]
+        # 搜尋使用者（優先使用目錄快取）
+        user_search_start = time.time()
+        record = directory_cache.get_user(self.domain, username)
+        if record is MISS:
+            record = self._load_user_record(conn, username)
+        timing['user_search'] = time.time() - user_search_start
         
-        user_info = None
-        manager_info = None
-        subordinates = []
-        user_dn = None
+        if record is None:
+            return None, None, [], timing
         
-        # 搜尋使用者
-        user_search_start = time.time()
+        manager_dn = record['manager_dn'] if get_manager_info else ''
+        report_dns = record['report_dns'] if get_subordinates else []
         
-        for base_dn in base_dn_options:
-            try:
-                search_filter = f"(sAMAccountName={username})"
-                
-                success = conn.search(
-                    search_base=base_dn,
-                    search_filter=search_filter,
-                    search_scope="SUBTREE",
-                    attributes=[
-                        'sAMAccountName', 'displayName', 'givenName', 'sn', 'cn',
-                        'mail', 'userPrincipalName', 'department', 'title',
-                        'telephoneNumber', 'mobile', 'manager', 'employeeID',
-                        'company', 'distinguishedName', 'directReports'
-                    ]
-                )
-                
-                if success and conn.entries:
-                    entry = conn.entries[0]
-                    user_dn = str(getattr(entry, 'distinguishedName', ''))
-                    
-                    # 取得使用者基本資訊
-                    user_info = {
-                        'sam_account': str(getattr(entry, 'sAMAccountName', '') or ''),
-                        'display_name': str(getattr(entry, 'displayName', '') or ''),
-                        'given_name': str(getattr(entry, 'givenName', '') or ''),
-                        'surname': str(getattr(entry, 'sn', '') or ''),
-                        'cn': str(getattr(entry, 'cn', '') or ''),
-                        'mail': str(getattr(entry, 'mail', '') or ''),
-                        'upn': str(getattr(entry, 'userPrincipalName', '') or ''),
-                        'department': str(getattr(entry, 'department', '') or ''),
-                        'title': str(getattr(entry, 'title', '') or ''),
-                        'phone': str(getattr(entry, 'telephoneNumber', '') or ''),
-                        'mobile': str(getattr(entry, 'mobile', '') or ''),
-                        'employee_id': str(getattr(entry, 'employeeID', '') or ''),
-                        'company': str(getattr(entry, 'company', '') or ''),
-                        'dn': user_dn
-                    }
-                    
-                    # 檢查是否有直屬下屬
-                    direct_reports = getattr(entry, 'directReports', None)
-                    if direct_reports:
-                        pass
-                    
-                    break
-                    
-            except Exception:
-                continue
+        # 主管與下屬：快取未命中的 DN 以同一批次查詢取回
+        related_start = time.time()
+        related = {}
+        missing = []
+        for dn in ([manager_dn] if manager_dn else []) + report_dns:
+            cached = directory_cache.get_entry(dn)
+            if cached is MISS:
+                missing.append(dn)
+            else:
+                related[dn.lower()] = cached
+        if missing:
+            related.update(self._load_entries(conn, record['base_dn'], missing))
+        related_time = time.time() - related_start
+        
+        user_info, manager_info, subordinates = self._assemble_org_info(record, related, manager_dn, report_dns)
+        if manager_dn:
+            timing['manager_search'] = related_time
+        if report_dns:
+            timing['subordinates_search'] = related_time
+        
+        return user_info, manager_info, subordinates, timing
+    
+    def _get_cached_org_info(self, username: str, get_manager_info: bool = True, get_subordinates: bool = True) -> Optional[Tuple[Optional[Dict], Optional[Dict], List[Dict], Dict[str, float]]]:
+        """
+        完全由目錄快取組出使用者、主管與下屬資訊（不需 LDAP 查詢）
+        
+        Returns:
+            tuple: 與 _get_user_and_manager_info 相同；任一項目未命中時返回 None
+        """
+        timing = {
+            'user_search': 0,
+            'manager_search': 0,
+            'subordinates_search': 0
+        }
+        
+        record = directory_cache.get_user(self.domain, username)
+        if record is MISS:
+            return None
+        if record is None:
+            return None, None, [], timing
         
+        manager_dn = record['manager_dn'] if get_manager_info else ''
+        report_dns = record['report_dns'] if get_subordinates else []
+        
+        related = {}
+        for dn in ([manager_dn] if manager_dn else []) + report_dns:
+            cached = directory_cache.get_entry(dn)
+            if cached is MISS:
+                return None
+            related[dn.lower()] = cached
+        
+        user_info, manager_info, subordinates = self._assemble_org_info(record, related, manager_dn, report_dns)
+        return user_info, manager_info, subordinates, timing
+    
+    def _get_user_summary(self, conn: Connection, username: str, get_subordinates: bool = True) -> Tuple[Optional[Dict], int, Dict[str, float]]:
+        """
+        只取得使用者本身資訊與直屬下屬數（不查詢主管與下屬項目）
+        
+        Returns:
+            tuple: (使用者資訊, 直屬下屬數, 時間統計)
+        """
+        timing = {
+            'user_search': 0,
+            'manager_search': 0,
+            'subordinates_search': 0
+        }
+        
+        user_search_start = time.time()
+        record = directory_cache.get_user(self.domain, username)
+        if record is MISS:
+            record = self._load_user_record(conn, username)
         timing['user_search'] = time.time() - user_search_start
         
-        # 取得管理人員資訊
-        if user_info and get_manager_info:
-            manager_search_start = time.time()
-            
-            # 從使用者資料中找到主管 DN
-            for base_dn in base_dn_options:
-                try:
-                    search_filter = f"(sAMAccountName={username})"
-                    success = conn.search(
-                        search_base=base_dn,
-                        search_filter=search_filter,
-                        search_scope="SUBTREE",
-                        attributes=['manager']
-                    )
-                    
-                    if success and conn.entries:
-                        entry = conn.entries[0]
-                        manager_dn = getattr(entry, 'manager', None)
-                        if manager_dn:
-                            manager_info = self._get_manager_details(conn, str(manager_dn))
-                            break
-                        else:
-                            break
-                except Exception:
-                    continue
-            
-            timing['manager_search'] = time.time() - manager_search_start
+        if record is None:
+            return None, 0, timing
+        return dict(record['user']), len(record['report_dns']) if get_subordinates else 0, timing
+    
+    def lookup_org_info(self, username: str, get_manager_info: bool = True, get_subordinates: bool = True) -> Optional[Tuple[Optional[Dict], Optional[Dict], List[Dict], Dict[str, float]]]:
+        """
+        不需使用者密碼查詢組織資訊（目錄快取 → 組織樹索引 → 服務帳號 LDAP 查詢）
         
-        # 如果找到使用者且需要搜尋下屬，搜尋其下屬員工
-        if user_dn and get_subordinates:
-            subordinates_start = time.time()
-            
-            subordinates = self._get_subordinates(conn, user_dn, base_dn_options)
+        Returns:
+            tuple: 與 _get_user_and_manager_info 相同；無法查詢時返回 None
+        """
+        org_info = self._get_cached_org_info(username, get_manager_info, get_subordinates)
+        if org_info is None and org_tree.covers(self.domain):
+            org_info = org_tree.get_org_info(username, get_manager_info, get_subordinates)
+        if org_info is not None or not LDAP_AVAILABLE:
+            return org_info
+        
+        pool = self._get_pool()
+        if not pool.has_service_account:
+            return None
+        with pool.connection() as conn:
+            return self._get_user_and_manager_info(conn, username, get_manager_info, get_subordinates)
+    
+    def _assemble_org_info(self, record: Dict[str, Any], related: Dict[str, Optional[Dict]],
+                           manager_dn: str, report_dns: List[str]) -> Tuple[Dict, Optional[Dict], List[Dict]]:
+        """由使用者記錄與 DN 資訊組出 (使用者資訊, 管理人員資訊, 下屬員工清單)"""
+        manager_info = None
+        if manager_dn:
+            manager = related.get(manager_dn.lower())
+            if manager is not None:
+                manager_info = dict(manager['manager'])
+        
+        subordinates = []
+        for report_dn in report_dns:
+            report = related.get(report_dn.lower())
+            if report is not None:
+                subordinates.append(dict(report['subordinate']))
+        
+        return dict(record['user']), manager_info, subordinates
+    
+    def _load_user_record(self, conn: Connection, username: str) -> Optional[Dict[str, Any]]:
+        """
+        搜尋使用者並寫入目錄快取（所有 Base DN 皆搜尋成功且找不到時才寫入負向快取）
+        
+        Returns:
+            dict: {'user': 使用者資訊, 'base_dn', 'manager_dn', 'report_dns'}，找不到時返回 None
             
-            timing['subordinates_search'] = time.time() - subordinates_start
+        Raises:
+            LDAPException: 連接逾時、中斷等暫時性錯誤（不寫入快取；借用的連接由連接池標記為失效）
+        """
+        entry, base_dn = self._search_user(conn, username)
+        if entry is None:
+            directory_cache.set_user(self.domain, username, None)
+            return None
+        
+        record = {
+            'user': self._build_user_info(entry),
+            'base_dn': base_dn,
+            'manager_dn': self._attr(entry, 'manager'),
+            'report_dns': self._attr_values(entry, 'directReports')
+        }
+        directory_cache.set_user(self.domain, username, record)
+        return record
+    
+    def _load_entries(self, conn: Connection, base_dn: str, dns: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        依 DN 批次查詢主管 / 下屬資訊並寫入目錄快取（找不到的 DN 寫入負向快取）
         
-        return user_info, manager_info, subordinates, timing
+        Returns:
+            dict: 小寫 DN -> {'manager': 主管格式資訊, 'subordinate': 下屬格式資訊} 或 None
+        """
+        entries = self._get_entries_by_dn(conn, base_dn, dns)
+        for dn in dns:
+            if dn.lower() not in entries:
+                # 不在使用者的 Base DN 之下時（例如跨 OU 的主管），直接以其 DN 查詢
+                entries.update(self._get_entries_by_dn(conn, dn, [dn]))
+        
+        related = {}
+        for dn in dns:
+            entry = entries.get(dn.lower())
+            info = None
+            if entry is not None:
+                info = {
+                    'manager': self._build_manager_info(entry, dn),
+                    'subordinate': self._build_subordinate_info(entry)
+                }
+            directory_cache.set_entry(dn, info)
+            related[dn.lower()] = info
+        return related
     
-    def _get_subordinates(self, conn: Connection, manager_dn: str, base_dn_options: List[str]) -> List[Dict]:
+    def warm_directory_cache(self, usernames: List[str]) -> int:
         """
-        取得指定主管的所有下屬員工 (最佳化版本)
+        重新查詢使用者及其主管、下屬並更新目錄快取（略過快取，由背景任務執行）
+        
+        需設置 LDAP 服務帳號；所有使用者的主管與下屬 DN 合併後批次查詢
         
         Args:
-            conn: LDAP 連接物件
-            manager_dn: 主管的 Distinguished Name
-            base_dn_options: 可能的 Base DN 列表
+            usernames: 要預熱的使用者名稱列表
             
         Returns:
-            list: 下屬員工清單
+            int: 成功更新的使用者數
         """
-        subordinates = []
+        if not LDAP_AVAILABLE or not usernames:
+            return 0
+        
+        pool = self._get_pool()
+        if not pool.has_service_account:
+            return 0
+        
+        warmed = 0
+        with pool.connection() as conn:
+            dns_by_base: Dict[str, List[str]] = {}
+            for username in usernames:
+                record = self._load_user_record(conn, username)
+                if record is None:
+                    continue
+                warmed += 1
+                dns = dns_by_base.setdefault(record['base_dn'], [])
+                if record['manager_dn']:
+                    dns.append(record['manager_dn'])
+                dns.extend(record['report_dns'])
+            
+            for base_dn, dns in dns_by_base.items():
+                unique_dns = list(dict.fromkeys(dns))
+                if unique_dns:
+                    self._load_entries(conn, base_dn, unique_dns)
         
-        # 最佳化：優先使用較具體的 Base DN，避免根目錄搜尋
-        optimized_base_dn = [dn for dn in base_dn_options if dn != ""]  # 排除根目錄
-        if "" in base_dn_options:
-            optimized_base_dn.append("")  # 根目錄放最後
+        return warmed
+    
+    def _search_user(self, conn: Connection, username: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        依 sAMAccountName 搜尋使用者（依序嘗試各 Base DN）
         
-        for base_dn in optimized_base_dn:
+        Returns:
+            tuple: (使用者項目, 找到使用者的 Base DN)，找不到時返回 (None, None)
+            
+        Raises:
+            LDAPException: 非伺服器結果碼的錯誤（逾時、連接中斷等），呼叫端不可視為找不到
+        """
+        search_filter = f"(sAMAccountName={escape_filter_chars(username)})"
+        
+        for base_dn in self._get_base_dn_options():
             try:
-                # 搜尋以此人為主管的所有員工
-                search_filter = f"(manager={manager_dn})"
-                base_desc = base_dn if base_dn else "根目錄"
-                
-                search_start = time.time()
                 success = conn.search(
                     search_base=base_dn,
                     search_filter=search_filter,
                     search_scope="SUBTREE",
-                    attributes=[
-                        'sAMAccountName', 'displayName', 'givenName', 'sn',
-                        'mail', 'department', 'title', 'telephoneNumber',
-                        'mobile', 'employeeID', 'distinguishedName'
-                    ],
-                    size_limit=100,  # 限制最多100個結果，避免過大查詢
-                    time_limit=15    # 單次搜尋最多15秒
+                    attributes=self.USER_ATTRIBUTES
                 )
-                
-                search_time = time.time() - search_start
-                
                 if success and conn.entries:
-                    for entry in conn.entries:
-                        subordinate = {
-                            'sam_account': str(getattr(entry, 'sAMAccountName', '') or ''),
-                            'display_name': str(getattr(entry, 'displayName', '') or ''),
-                            'given_name': str(getattr(entry, 'givenName', '') or ''),
-                            'surname': str(getattr(entry, 'sn', '') or ''),
-                            'mail': str(getattr(entry, 'mail', '') or ''),
-                            'department': str(getattr(entry, 'department', '') or ''),
-                            'title': str(getattr(entry, 'title', '') or ''),
-                            'phone': str(getattr(entry, 'telephoneNumber', '') or ''),
-                            'mobile': str(getattr(entry, 'mobile', '') or ''),
-                            'employee_id': str(getattr(entry, 'employeeID', '') or ''),
-                            'dn': str(getattr(entry, 'distinguishedName', '') or '')
-                        }
-                        subordinates.append(subordinate)
-                    
-                    break  # 找到結果就立即停止，不搜尋其他 Base DN
-                else:
-                    # 如果在具體的 Base DN 中沒找到，但搜尋很快，可能真的沒有下屬
-                    # 如果搜尋時間很短（< 2秒），就不再嘗試其他 Base DN
-                    if search_time < 2.0 and base_dn != "":
-                        break
-                        
-            except Exception:
-                # 如果是超時錯誤，直接跳過後續搜尋
-                if "time limit" in str(e).lower() or search_time > 10:
-                    break
+                    return conn.entries[0], base_dn
+            except LDAPOperationResult:
+                # 伺服器已回應（例如 Base DN 不存在、轉介），此 Base DN 確實沒有該使用者
                 continue
         
-        return subordinates
+        return None, None
     
-    def _get_manager_details(self, conn: Connection, manager_dn: str) -> Optional[Dict]:
+    def _get_entries_by_dn(self, conn: Connection, base_dn: str, dns: List[str]) -> Dict[str, Any]:
         """
-        取得管理人員的詳細資訊
+        以 OR 過濾條件批次依 DN 取回項目
         
         Args:
             conn: LDAP 連接物件
-            manager_dn: 管理人員的 Distinguished Name
+            base_dn: 搜尋起點
+            dns: Distinguished Name 列表
             
         Returns:
-            dict: 管理人員資訊
+            dict: 小寫 DN -> 項目
         """
-        try:
-            success = conn.search(
-                search_base=manager_dn,
-                search_filter="(objectClass=user)",
-                search_scope="BASE",
-                attributes=[
-                    'sAMAccountName',
-                    'displayName',
-                    'givenName',
-                    'sn',
-                    'mail',
-                    'department',
-                    'title',
-                    'telephoneNumber',
-                    'mobile',
-                    'manager'  # 管理人員的上級主管
-                ]
-            )
+        entries = {}
+        unique_dns = list(dict.fromkeys(dn for dn in dns if dn))
+        
+        for index in range(0, len(unique_dns), self.DN_BATCH_SIZE):
+            chunk = unique_dns[index:index + self.DN_BATCH_SIZE]
+            conditions = ''.join(f"(distinguishedName={escape_filter_chars(dn)})" for dn in chunk)
+            search_filter = conditions if len(chunk) == 1 else f"(|{conditions})"
             
-            if success and conn.entries:
-                entry = conn.entries[0]
-                
-                manager_info = {
-                    'sam_account': str(getattr(entry, 'sAMAccountName', '') or ''),
-                    'display_name': str(getattr(entry, 'displayName', '') or ''),
-                    'given_name': str(getattr(entry, 'givenName', '') or ''),
-                    'surname': str(getattr(entry, 'sn', '') or ''),
-                    'mail': str(getattr(entry, 'mail', '') or ''),
-                    'department': str(getattr(entry, 'department', '') or ''),
-                    'title': str(getattr(entry, 'title', '') or ''),
-                    'phone': str(getattr(entry, 'telephoneNumber', '') or ''),
-                    'mobile': str(getattr(entry, 'mobile', '') or ''),
-                    'dn': manager_dn
-                }
-                
-                # 如果管理人員還有上級主管，也取得其資訊
-                upper_manager_dn = getattr(entry, 'manager', None)
-                if upper_manager_dn:
-                    manager_info['upper_manager_dn'] = str(upper_manager_dn)
-                    # 從 DN 中提取上級主管名稱
-                    upper_manager_cn = str(upper_manager_dn).split(',')[0].replace('CN=', '')
-                    manager_info['upper_manager_name'] = upper_manager_cn
-                
-                return manager_info
-                
-        except Exception:
-            pass
+            try:
+                success = conn.search(
+                    search_base=base_dn,
+                    search_filter=search_filter,
+                    search_scope="SUBTREE",
+                    attributes=self.RELATED_ATTRIBUTES,
+                    time_limit=15  # 單次搜尋最多15秒
+                )
+            except LDAPOperationResult:
+                # 伺服器已回應（例如 Base DN 不存在）；逾時、連接中斷等錯誤向上拋出，不寫入負向快取
+                continue
+            
+            if success:
+                for entry in conn.entries:
+                    dn = self._attr(entry, 'distinguishedName') or entry.entry_dn
+                    entries[dn.lower()] = entry
         
-        return None 
+        return entries
+    
+    def _build_user_info(self, entry) -> Dict[str, str]:
+        """將使用者項目轉換為字典"""
+        return {
+            'sam_account': self._attr(entry, 'sAMAccountName'),
+            'display_name': self._attr(entry, 'displayName'),
+            'given_name': self._attr(entry, 'givenName'),
+            'surname': self._attr(entry, 'sn'),
+            'cn': self._attr(entry, 'cn'),
+            'mail': self._attr(entry, 'mail'),
+            'upn': self._attr(entry, 'userPrincipalName'),
+            'department': self._attr(entry, 'department'),
+            'title': self._attr(entry, 'title'),
+            'phone': self._attr(entry, 'telephoneNumber'),
+            'mobile': self._attr(entry, 'mobile'),
+            'employee_id': self._attr(entry, 'employeeID'),
+            'company': self._attr(entry, 'company'),
+            'dn': self._attr(entry, 'distinguishedName')
+        }
+    
+    def _build_subordinate_info(self, entry) -> Dict[str, str]:
+        """將下屬項目轉換為字典"""
+        return {
+            'sam_account': self._attr(entry, 'sAMAccountName'),
+            'display_name': self._attr(entry, 'displayName'),
+            'given_name': self._attr(entry, 'givenName'),
+            'surname': self._attr(entry, 'sn'),
+            'mail': self._attr(entry, 'mail'),
+            'department': self._attr(entry, 'department'),
+            'title': self._attr(entry, 'title'),
+            'phone': self._attr(entry, 'telephoneNumber'),
+            'mobile': self._attr(entry, 'mobile'),
+            'employee_id': self._attr(entry, 'employeeID'),
+            'dn': self._attr(entry, 'distinguishedName')
+        }
+    
+    def _build_manager_info(self, entry, manager_dn: str) -> Dict[str, str]:
+        """將主管項目轉換為字典（含上級主管名稱）"""
+        manager_info = {
+            'sam_account': self._attr(entry, 'sAMAccountName'),
+            'display_name': self._attr(entry, 'displayName'),
+            'given_name': self._attr(entry, 'givenName'),
+            'surname': self._attr(entry, 'sn'),
+            'mail': self._attr(entry, 'mail'),
+            'department': self._attr(entry, 'department'),
+            'title': self._attr(entry, 'title'),
+            'phone': self._attr(entry, 'telephoneNumber'),
+            'mobile': self._attr(entry, 'mobile'),
+            'dn': manager_dn
+        }
+        
+        # 如果管理人員還有上級主管，記錄其 DN 與名稱
+        upper_manager_dn = self._attr(entry, 'manager')
+        if upper_manager_dn:
+            manager_info['upper_manager_dn'] = upper_manager_dn
+            # 從 DN 中提取上級主管名稱
+            manager_info['upper_manager_name'] = upper_manager_dn.split(',')[0].replace('CN=', '')
+        
+        return manager_info
     
 class ADAuth:
     """AD 認證擴展類別 - Flask 擴展包裝器"""
@@ -440,6 +744,7 @@ class ADAuth:
         """
         self.app = None
         self.authenticator = None
+        self._authenticators: Dict[Tuple[str, str, str], ADAuthenticator] = {}
         self._logger = None
         
         if app is not None:
@@ -482,6 +787,27 @@ class ADAuth:
         
         self._logger.info(f"AD Authentication extension initialized (LDAP Available: {LDAP_AVAILABLE})")
     
+    def get_authenticator(self, server_ip: str, domain: str, organization: Optional[str] = None) -> ADAuthenticator:
+        """
+        獲取可重用的 AD 認證器（同一伺服器與網域共用一個實例及其連接池）
+        
+        Args:
+            server_ip: AD 伺服器 IP
+            domain: 網域名稱
+            organization: 組織名稱
+            
+        Returns:
+            ADAuthenticator: 認證器實例
+        """
+        key = (server_ip, domain, organization or '')
+        authenticator = self._authenticators.get(key)
+        if authenticator is None:
+            authenticator = ADAuthenticator(server_ip, domain, organization)
+            # 伺服器與網域可由請求指定，只保存有限數量的實例
+            if len(self._authenticators) < 32:
+                self._authenticators[key] = authenticator
+        return authenticator
+    
     def authenticate(self, username: str, password: str, get_manager_info: bool = True, get_subordinates: bool = True) -> Dict[str, Any]:
         """
         認證使用者
@@ -566,6 +892,15 @@ class ADAuth:
             'data': None
         }
     
+    def get_bind_statistics(self) -> List[Dict[str, Any]]:
+        """
+        獲取各網域的綁定格式統計
+        
+        Returns:
+            list: 每個網域的優先格式、各格式嘗試/成功/失敗次數
+        """
+        return get_bind_statistics()
+    
     def validate_token(self, token: str) -> Dict[str, Any]:
         """
         驗證令牌（如果有實現令牌機制的話）
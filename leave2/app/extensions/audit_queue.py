@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+稽核記錄寫入佇列模組
+將會話、登入歷史與登入嘗試記錄放入有界佇列，由背景執行緒批量寫入資料庫，
+認證請求不需等待稽核記錄寫入
+"""
+import atexit
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class AuditWriteBehindQueue:
+    """稽核記錄的寫入佇列（write-behind）"""
+
+    # 記錄類型 -> bulk_insert_audit_records 的參數名稱
+    KINDS = {
+        'session': 'sessions',
+        'login_history': 'histories',
+        'login_attempt': 'attempts'
+    }
+
+    def __init__(self, jwt_db=None):
+        """
+        初始化稽核寫入佇列
+
+        Args:
+            jwt_db: JWTDatabaseManager 實例
+        """
+        self.jwt_db = jwt_db
+        self.app = None
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=10000)
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.enqueue_timeout = 0.05
+        self.shutdown_timeout = 10
+
+        # 統計計數器
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.sync_fallbacks = 0
+        self.write_errors = 0
+        self.last_batch_size = 0
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式並啟動寫入執行緒"""
+        self.app = app
+
+        app.config.setdefault('AUDIT_QUEUE_CONFIG', {})
+        config = app.config['AUDIT_QUEUE_CONFIG']
+        self._queue = queue.Queue(maxsize=config.get('MAX_SIZE', 10000))
+        self.batch_size = config.get('BATCH_SIZE', 500)
+        self.flush_interval = config.get('FLUSH_INTERVAL', 1.0)
+        self.enqueue_timeout = config.get('ENQUEUE_TIMEOUT', 0.05)
+        self.shutdown_timeout = config.get('SHUTDOWN_TIMEOUT', 10)
+
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._worker.start()
+
+        # 關閉時寫完佇列中剩餘的記錄
+        atexit.register(self.shutdown)
+        logger.info(f"稽核寫入佇列初始化完成，容量 {self._queue.maxsize}，批量 {self.batch_size}")
+
+    def enqueue(self, kind: str, row: Dict[str, Any], critical: bool = False) -> bool:
+        """
+        放入一筆稽核記錄
+
+        佇列已滿時最多等待 ENQUEUE_TIMEOUT 秒（背壓）；仍無空間時，
+        重要記錄（會話）改為同步寫入，其餘記錄丟棄並計數
+
+        Args:
+            kind: 記錄類型（session、login_history、login_attempt）
+            row: JWTDatabaseManager.build_*_row 的輸出
+            critical: 是否不可丟棄
+
+        Returns:
+            bool: 是否已放入佇列或寫入
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"未知的稽核記錄類型: {kind}")
+
+        if self._worker is None or self._stop_event.is_set():
+            # 寫入執行緒未啟動或已關閉，直接同步寫入
+            return self._write([(kind, row)])
+
+        try:
+            self._queue.put((kind, row), timeout=self.enqueue_timeout)
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            if critical:
+                self.sync_fallbacks += 1
+                return self._write([(kind, row)])
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"稽核寫入佇列已滿，已丟棄 {self.dropped} 筆記錄")
+            return False
+
+    def _run(self):
+        """寫入執行緒：累積一批記錄後寫入，停止時寫完剩餘記錄"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    break
+                continue
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop_event.is_set():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # 停止時不再等待，直接取出剩餘記錄
+            while self._stop_event.is_set() and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """批量寫入（失敗時重試一次）"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.KINDS.values()}
+        for kind, row in batch:
+            grouped[self.KINDS[kind]].append(row)
+
+        for attempt in range(2):
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        self.jwt_db.bulk_insert_audit_records(**grouped)
+                else:
+                    self.jwt_db.bulk_insert_audit_records(**grouped)
+                self.written += len(batch)
+                self.batches += 1
+                self.last_batch_size = len(batch)
+                return True
+            except Exception as e:
+                if attempt == 0:
+                    time.sleep(0.5)
+                    continue
+                self.write_errors += 1
+                logger.error(f"稽核記錄批量寫入失敗，{len(batch)} 筆記錄未寫入: {str(e)}")
+        return False
+
+    def shutdown(self):
+        """停止寫入執行緒並寫完佇列中剩餘的記錄"""
+        if self._worker is None or self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._worker.join(timeout=self.shutdown_timeout)
+        if self._worker.is_alive():
+            logger.warning(f"稽核寫入佇列關閉逾時，剩餘 {self._queue.qsize()} 筆記錄")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取稽核寫入佇列統計信息"""
+        return {
+            'running': self._worker is not None and self._worker.is_alive(),
+            'pending': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'batch_size': self.batch_size,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'dropped': self.dropped,
+            'sync_fallbacks': self.sync_fallbacks,
+            'write_errors': self.write_errors
+        }
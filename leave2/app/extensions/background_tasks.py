@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+背景任務擴展模組
+提供在 Flask 應用上下文中執行的非同步任務與週期性任務排程
+"""
+import atexit
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class PeriodicTask:
+    """週期性任務描述"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], Any]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = time.monotonic() + interval
+        self.running = False
+        self.run_count = 0
+        self.error_count = 0
+        self.last_run_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class BackgroundTaskManager:
+    """背景任務管理器"""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._periodic_tasks: Dict[str, PeriodicTask] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wakeup_event = threading.Event()
+        self._scheduler_thread: Optional[threading.Thread] = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式"""
+        self.app = app
+
+        app.config.setdefault('BACKGROUND_TASK_WORKERS', 4)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config['BACKGROUND_TASK_WORKERS'],
+            thread_name_prefix='bg-task'
+        )
+        self._stop_event.clear()
+
+        # 註冊應用程式關閉時的清理函數
+        atexit.register(self.shutdown)
+
+        app.extensions['background_tasks'] = self
+        logger.info("背景任務管理器初始化完成")
+
+    def _run_in_context(self, func: Callable, *args, **kwargs) -> Any:
+        """在應用上下文中執行函數並記錄例外"""
+        try:
+            with self.app.app_context():
+                return func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"背景任務 {getattr(func, '__name__', func)} 執行失敗: {str(e)}", exc_info=True)
+            raise
+
+    def submit(self, func: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        提交一次性背景任務
+
+        Args:
+            func: 任務函數（會在應用上下文中執行）
+
+        Returns:
+            Future: 任務結果，管理器未初始化時同步執行並返回 None
+        """
+        if self._executor is None or self._stop_event.is_set():
+            # 尚未初始化或已關閉，直接同步執行
+            if self.app is not None:
+                self._run_in_context(func, *args, **kwargs)
+            else:
+                func(*args, **kwargs)
+            return None
+
+        return self._executor.submit(self._run_in_context, func, *args, **kwargs)
+
+    def schedule_periodic(self, name: str, interval: float, func: Callable[[], Any],
+                          run_immediately: bool = False) -> None:
+        """
+        註冊週期性任務
+
+        Args:
+            name: 任務名稱（重複註冊會取代舊任務）
+            interval: 執行間隔（秒）
+            func: 任務函數（會在應用上下文中執行）
+            run_immediately: 是否立即執行第一次
+        """
+        if interval <= 0:
+            raise ValueError(f"無效的任務間隔: {interval}")
+
+        task = PeriodicTask(name, interval, func)
+        if run_immediately:
+            task.next_run = time.monotonic()
+
+        with self._lock:
+            self._periodic_tasks[name] = task
+
+        self._ensure_scheduler()
+        self._wakeup_event.set()
+        logger.info(f"已註冊週期性任務 '{name}'，間隔 {interval} 秒")
+
+    def cancel_periodic(self, name: str) -> bool:
+        """取消週期性任務"""
+        with self._lock:
+            return self._periodic_tasks.pop(name, None) is not None
+
+    def _ensure_scheduler(self):
+        """確保排程執行緒已啟動"""
+        if self._scheduler_thread and self._scheduler_thread.is_alive():
+            return
+        self._scheduler_thread = threading.Thread(
+            target=self._scheduler_loop,
+            name='bg-task-scheduler',
+            daemon=True
+        )
+        self._scheduler_thread.start()
+
+    def _scheduler_loop(self):
+        """排程主迴圈"""
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            next_wakeup = now + 60
+
+            with self._lock:
+                tasks = list(self._periodic_tasks.values())
+
+            for task in tasks:
+                if task.next_run <= now and not task.running:
+                    task.running = True
+                    task.next_run = now + task.interval
+                    try:
+                        self.submit(self._run_periodic, task)
+                    except RuntimeError:
+                        # 執行器已關閉
+                        task.running = False
+                        return
+                next_wakeup = min(next_wakeup, task.next_run)
+
+            self._wakeup_event.wait(max(0.05, next_wakeup - time.monotonic()))
+            self._wakeup_event.clear()
+
+    def _run_periodic(self, task: PeriodicTask):
+        """執行單次週期性任務"""
+        start = time.monotonic()
+        try:
+            task.func()
+            task.last_error = None
+        except Exception as e:
+            task.error_count += 1
+            task.last_error = str(e)
+            logger.error(f"週期性任務 '{task.name}' 執行失敗: {str(e)}")
+        finally:
+            task.run_count += 1
+            task.last_run_at = time.time()
+            task.last_duration = round(time.monotonic() - start, 3)
+            task.running = False
+
+    def shutdown(self, wait: bool = True):
+        """停止排程並關閉執行器"""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._wakeup_event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        logger.info("背景任務管理器已關閉")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取背景任務統計信息"""
+        with self._lock:
+            tasks = list(self._periodic_tasks.values())
+
+        return {
+            'initialized': self._executor is not None,
+            'stopped': self._stop_event.is_set(),
+            'periodic_tasks': {
+                task.name: {
+                    'interval': task.interval,
+                    'running': task.running,
+                    'run_count': task.run_count,
+                    'error_count': task.error_count,
+                    'last_run_at': task.last_run_at,
+                    'last_duration': task.last_duration,
+                    'last_error': task.last_error
+                }
+                for task in tasks
+            }
+        }
+
+
+# 創建全局實例
+background_tasks = BackgroundTaskManager()
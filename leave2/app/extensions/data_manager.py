@@ -6,7 +6,8 @@
 支援同時管理多個不同類型的資料庫（MySQL、PostgreSQL、SQLite、SQL Server等）
 """
 import os
-from typing import Optional, Dict, Any
+import re
+from typing import Optional, Dict, Any, Iterator, List, Sequence
 from sqlalchemy import text
 from contextlib import contextmanager
 # import logging
@@ -15,6 +16,7 @@ from pathlib import Path
 # 修正導入路徑
 from app.core.database.base.db_connection import DBConfig, DBConnection
 from app.extensions import get_logger
+from app.extensions.request_timing import request_timing
 
 # 使用模組特定的 logger
 logger = get_logger(__name__)  # 或者指定名稱
@@ -24,9 +26,17 @@ logger = get_logger(__name__)  # 或者指定名稱
 
 # logger = logging.getLogger(__name__)
 
+# 合法的資料表 / 欄位名稱（可含結構描述前綴，例如 dbo.Leave_Record）
+_IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+
+
 class DatabaseManager:
     """資料庫連接池管理類別"""
     
+    # SQL Server 限制：單一 INSERT ... VALUES 最多 1000 列，單一請求最多 2100 個參數
+    MSSQL_MAX_ROWS_PER_INSERT = 1000
+    MSSQL_MAX_PARAMETERS = 2100
+    
     def __init__(
         self,
         db_type: str = "mysql",
@@ -40,6 +50,7 @@ class DatabaseManager:
         pool_timeout: int = 30,
         pool_recycle: int = 3600,
         echo: bool = False,
+        batch_size: int = 1000,
         section: str = "hr",
         config_path: Path = None
     ):
@@ -55,6 +66,7 @@ class DatabaseManager:
             pool_timeout: 連接池超時時間（秒）
             pool_recycle: 連接回收時間（秒）
             echo: 是否輸出 SQL 語句
+            batch_size: 批量執行 / 批量插入每批的預設列數
         """
         self.db_type = db_type.lower()
         self.section = section
@@ -71,6 +83,7 @@ class DatabaseManager:
         self.pool_timeout = pool_timeout
         self.pool_recycle = pool_recycle
         self.echo = echo
+        self.batch_size = max(1, batch_size)
         
         # 初始化資料庫連接
         self._init_connection(host, port, database, username, password)
@@ -126,7 +139,7 @@ class DatabaseManager:
         Yields:
             Session: 資料庫會話對象
         """
-        with self.db_conn.get_session() as session:
+        with request_timing.span('db'), self.db_conn.get_session() as session:
             yield session
     
     def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> Any:
@@ -145,26 +158,126 @@ class DatabaseManager:
                 result = session.execute(text(query), params or {})
                 return result.fetchall()
             except Exception as e:
-                logger.error(f"查詢執行失敗: {str(e)}")
+                logger.error("查詢執行失敗: %s", e)
+                raise
+    
+    def stream_query(self, query: str, params: Optional[Dict[str, Any]] = None,
+                     chunk_size: Optional[int] = None) -> Iterator[List[Any]]:
+        """
+        串流執行 SQL 查詢（伺服器端游標，逐批返回結果列，不一次載入整個結果集）
+        
+        連接在迭代期間保持占用，迭代結束或產生器關閉時才歸還連接池；
+        呼叫端應完整迭代或呼叫 close()
+        
+        Args:
+            query: SQL 查詢語句
+            params: 查詢參數
+            chunk_size: 每批列數，預設為連接池的 batch_size
+            
+        Yields:
+            list: 一批結果列（Row）
+        """
+        chunk_size = chunk_size or self.batch_size
+        with self.get_session() as session:
+            try:
+                result = session.execute(
+                    text(query), params or {},
+                    execution_options={'stream_results': True, 'max_row_buffer': chunk_size}
+                )
+                for partition in result.partitions(chunk_size):
+                    yield partition
+            except Exception as e:
+                logger.error(f"串流查詢執行失敗: {str(e)}")
                 raise
     
-    def execute_many(self, query: str, params_list: list) -> None:
+    def execute_many(self, query: str, params_list: Sequence[Dict[str, Any]],
+                     chunk_size: Optional[int] = None) -> int:
         """
-        批量執行 SQL 語句
+        批量執行 SQL 語句（每批以驅動程式的 executemany 送出，整體為單一交易）
         
         Args:
             query: SQL 語句
             params_list: 參數列表
+            chunk_size: 每批列數，預設為連接池的 batch_size
+            
+        Returns:
+            int: 影響的列數（驅動程式無法回報時不計入）
         """
+        params_list = list(params_list)
+        if not params_list:
+            return 0
+        
+        chunk_size = chunk_size or self.batch_size
+        statement = text(query)
+        affected = 0
         with self.get_session() as session:
             try:
-                for params in params_list:
-                    session.execute(text(query), params)
+                for start in range(0, len(params_list), chunk_size):
+                    result = session.execute(statement, params_list[start:start + chunk_size])
+                    if result.rowcount and result.rowcount > 0:
+                        affected += result.rowcount
                 session.commit()
+                return affected
             except Exception as e:
                 logger.error(f"批量執行失敗: {str(e)}")
                 raise
     
+    def bulk_insert(self, table: str, rows: Sequence[Dict[str, Any]],
+                    columns: Optional[List[str]] = None, chunk_size: Optional[int] = None) -> int:
+        """
+        批量插入（多列 INSERT ... VALUES，整體為單一交易）
+        
+        每批組成一條多列 INSERT；SQL Server 依 1000 列與 2100 個參數的限制自動縮小每批列數
+        
+        Args:
+            table: 資料表名稱（可含結構描述前綴）
+            rows: 欄位名稱 -> 值 的字典列表
+            columns: 插入的欄位，預設為第一列的鍵
+            chunk_size: 每批列數，預設為連接池的 batch_size
+            
+        Returns:
+            int: 插入的列數
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        
+        columns = list(columns or rows[0].keys())
+        for name in [table, *columns]:
+            if not _IDENTIFIER_PATTERN.match(name):
+                raise ValueError(f"無效的資料表或欄位名稱: {name}")
+        
+        chunk_size = chunk_size or self.batch_size
+        if self.db_type == 'mssql':
+            max_rows = (self.MSSQL_MAX_PARAMETERS - 1) // len(columns)
+            chunk_size = min(chunk_size, self.MSSQL_MAX_ROWS_PER_INSERT, max(1, max_rows))
+        
+        column_list = ', '.join(columns)
+        inserted = 0
+        with self.get_session() as session:
+            try:
+                for start in range(0, len(rows), chunk_size):
+                    chunk = rows[start:start + chunk_size]
+                    params = {}
+                    values = []
+                    for index, row in enumerate(chunk):
+                        placeholders = []
+                        for position, column in enumerate(columns):
+                            key = f"p{index}_{position}"
+                            params[key] = row.get(column)
+                            placeholders.append(f":{key}")
+                        values.append(f"({', '.join(placeholders)})")
+                    session.execute(
+                        text(f"INSERT INTO {table} ({column_list}) VALUES {', '.join(values)}"), params
+                    )
+                    inserted += len(chunk)
+                session.commit()
+                logger.info("批量插入 %s 完成，共 %d 列", table, inserted)
+                return inserted
+            except Exception as e:
+                logger.error(f"批量插入 {table} 失敗: {str(e)}")
+                raise
+    
     def get_connection_stats(self) -> Dict[str, Any]:
         """
         獲取連接池統計信息
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+目錄快取擴展模組
+快取 AD 組織資料（使用者、主管、下屬），支援 TTL、負向快取與背景預熱
+"""
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+
+from app.extensions import get_logger
+from app.utils.cache_utils import LRUTTLCache
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+# 快取未命中標記（與負向快取的 None 區分）
+MISS = object()
+
+
+class DirectoryCache:
+    """
+    AD 目錄資料快取
+
+    快取鍵格式：
+        ('user', domain, sAMAccountName) -> {'user': 使用者資訊, 'manager_dn': 主管 DN, 'report_dns': 下屬 DN 列表}
+        ('dn', DN) -> {'manager': 主管格式資訊, 'subordinate': 下屬格式資訊}
+    查無資料時寫入 None（負向快取），以較短的 NEGATIVE_TTL 保存
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self.enabled = True
+        self.negative_ttl = 300
+        self._cache = LRUTTLCache(max_size=5000, ttl=21600, name='directory')
+        self.warm_runs = 0
+        self.warmed_users = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式並排程背景預熱"""
+        self.app = app
+
+        app.config.setdefault('DIRECTORY_CACHE_CONFIG', {})
+        config = app.config['DIRECTORY_CACHE_CONFIG']
+        self.enabled = config.get('ENABLED', True)
+        self.negative_ttl = config.get('NEGATIVE_TTL', 300)
+        self._cache = LRUTTLCache(
+            max_size=config.get('MAX_SIZE', 5000),
+            ttl=config.get('TTL', 21600),
+            name='directory'
+        )
+
+        warm_interval = config.get('WARM_INTERVAL', 0)
+        if self.enabled and warm_interval > 0:
+            from .background_tasks import background_tasks
+            background_tasks.schedule_periodic('directory_cache:warm', warm_interval, self.warm)
+
+        app.extensions['directory_cache'] = self
+        logger.info(f"目錄快取初始化完成 (啟用: {self.enabled})")
+
+    @staticmethod
+    def _user_key(domain: str, username: str):
+        return ('user', domain.lower(), username.lower())
+
+    @staticmethod
+    def _dn_key(dn: str):
+        return ('dn', dn.lower())
+
+    def _set(self, key, value):
+        if not self.enabled:
+            return
+        self._cache.set(key, value, ttl=self.negative_ttl if value is None else None)
+
+    def get_user(self, domain: str, username: str) -> Any:
+        """
+        獲取使用者記錄
+
+        Returns:
+            dict / None / MISS: 使用者記錄、負向快取或未命中
+        """
+        if not self.enabled:
+            return MISS
+        return self._cache.get(self._user_key(domain, username), MISS)
+
+    def set_user(self, domain: str, username: str, record: Optional[Dict[str, Any]]):
+        """寫入使用者記錄（None 表示查無此使用者）"""
+        self._set(self._user_key(domain, username), record)
+
+    def get_entry(self, dn: str) -> Any:
+        """
+        獲取 DN 對應的主管 / 下屬資訊
+
+        Returns:
+            dict / None / MISS: 資訊、負向快取或未命中
+        """
+        if not self.enabled:
+            return MISS
+        return self._cache.get(self._dn_key(dn), MISS)
+
+    def set_entry(self, dn: str, record: Optional[Dict[str, Any]]):
+        """寫入 DN 對應的資訊（None 表示查無此 DN）"""
+        self._set(self._dn_key(dn), record)
+
+    def cached_users(self) -> List[tuple]:
+        """返回快取中的 (domain, username)，供預熱使用"""
+        return [(key[1], key[2]) for key in self._cache.keys() if key[0] == 'user']
+
+    def invalidate_user(self, domain: str, username: str) -> bool:
+        """使單一使用者記錄失效"""
+        return self._cache.invalidate(self._user_key(domain, username))
+
+    def clear(self):
+        """清空目錄快取"""
+        self._cache.clear()
+
+    def warm(self) -> int:
+        """
+        重新查詢快取中的使用者及其主管、下屬（由背景任務定期執行）
+
+        需設置 LDAP 服務帳號；預熱後的使用者再次登入時只需密碼綁定
+
+        Returns:
+            int: 預熱的使用者數
+        """
+        users = self.cached_users()
+        if not users or self.app is None:
+            return 0
+
+        from .ad_authenticator import ad_auth
+        ad_config = self.app.config.get('AD_CONFIG', {})
+        authenticator = ad_auth.get_authenticator(
+            ad_config.get('DEFAULT_AD_SERVER'),
+            ad_config.get('DEFAULT_DOMAIN'),
+            ad_config.get('DEFAULT_ORGANIZATION')
+        )
+
+        usernames = [username for domain, username in users if domain == authenticator.domain.lower()]
+        warmed = authenticator.warm_directory_cache(usernames)
+        self.warm_runs += 1
+        self.warmed_users += warmed
+        if warmed:
+            logger.info(f"目錄快取預熱完成，共 {warmed} 位使用者")
+        return warmed
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取目錄快取統計信息"""
+        return {
+            'enabled': self.enabled,
+            'negative_ttl': self.negative_ttl,
+            'warm_runs': self.warm_runs,
+            'warmed_users': self.warmed_users,
+            **self._cache.get_stats()
+        }
+
+
+# 創建全局實例
+directory_cache = DirectoryCache()
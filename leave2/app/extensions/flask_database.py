@@ -7,7 +7,7 @@ Flask 資料庫擴展模組
 from flask import Flask, current_app
 from contextlib import contextmanager
 import atexit
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from sqlalchemy import text
 from pathlib import Path
 import os
@@ -113,7 +113,8 @@ class FlaskDatabaseManager:
                     max_overflow=config.get('max_overflow', 10),
                     pool_timeout=config.get('pool_timeout', 30),
                     pool_recycle=config.get('pool_recycle', 3600),
-                    echo=config.get('echo', False)
+                    echo=config.get('echo', False),
+                    batch_size=config.get('batch_size', 1000)
                 )
                 
                 logger.info(f"連接池 '{pool_name}' 初始化成功")
@@ -170,6 +171,24 @@ class FlaskDatabaseManager:
         pool = self.get_pool(pool_name)
         return pool.execute_query(query, params)
     
+    def stream_query(self, pool_name: str, query: str, params: Optional[Dict[str, Any]] = None,
+                     chunk_size: Optional[int] = None) -> Iterator[List[Any]]:
+        """在指定連接池上串流執行查詢，逐批返回結果列"""
+        pool = self.get_pool(pool_name)
+        return pool.stream_query(query, params, chunk_size)
+    
+    def execute_many(self, pool_name: str, query: str, params_list: List[Dict[str, Any]],
+                     chunk_size: Optional[int] = None) -> int:
+        """在指定連接池上批量執行 SQL 語句，返回影響的列數"""
+        pool = self.get_pool(pool_name)
+        return pool.execute_many(query, params_list, chunk_size)
+    
+    def bulk_insert(self, pool_name: str, table: str, rows: List[Dict[str, Any]],
+                    columns: Optional[List[str]] = None, chunk_size: Optional[int] = None) -> int:
+        """在指定連接池上批量插入，返回插入的列數"""
+        pool = self.get_pool(pool_name)
+        return pool.bulk_insert(table, rows, columns, chunk_size)
+    
     def execute_transaction(self, pool_name: str, operations: List[Dict[str, Any]]) -> bool:
         """在指定連接池上執行事務"""
         pool = self.get_pool(pool_name)
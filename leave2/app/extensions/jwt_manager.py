@@ -11,6 +11,7 @@ from typing import Optional, Dict, Any
 # import logging
 import secrets
 from app.extensions import get_logger
+from .request_timing import request_timing
 import pytz
 
 def get_app_timezone():
@@ -39,6 +40,9 @@ class EnhancedJWTManager:
         self.app = app
         self.db_manager = db_manager
         self.jwt_db = None
+        self.revocation_cache = None
+        self.session_activity = None
+        self.audit_queue = None
         
         if app is not None:
             self.init_app(app)
@@ -71,6 +75,24 @@ class EnhancedJWTManager:
             except Exception as e:
                 logger.error(f"JWT 資料庫表格初始化失敗: {str(e)}")
         
+        # 初始化黑名單撤銷快取（驗證令牌時免查資料庫）
+        if self.jwt_db and app.config.get('JWT_REVOCATION_CACHE', {}).get('ENABLED', True):
+            from .token_revocation import TokenRevocationCache
+            self.revocation_cache = TokenRevocationCache(self.jwt_db)
+            self.revocation_cache.init_app(app)
+        
+        # 初始化會話活動緩衝（最後訪問時間定期批量寫回）
+        if self.jwt_db and app.config.get('SESSION_ACTIVITY_CONFIG', {}).get('ENABLED', True):
+            from .session_activity import SessionActivityBuffer
+            self.session_activity = SessionActivityBuffer(self.jwt_db)
+            self.session_activity.init_app(app)
+        
+        # 初始化稽核寫入佇列（會話、登入歷史、登入嘗試由背景執行緒批量寫入）
+        if self.jwt_db and app.config.get('AUDIT_QUEUE_CONFIG', {}).get('ENABLED', True):
+            from .audit_queue import AuditWriteBehindQueue
+            self.audit_queue = AuditWriteBehindQueue(self.jwt_db)
+            self.audit_queue.init_app(app)
+        
         # 將 JWT 管理器附加到應用程式
         app.extensions['enhanced_jwt_manager'] = self
         logger.info("增強的 JWT 管理器初始化完成")
@@ -141,8 +163,16 @@ class EnhancedJWTManager:
         
         return device_info
     
-    def generate_tokens(self, user_data: Dict[str, Any], auth_info: Dict[str, Any] = None) -> Dict[str, str]:
-        """生成訪問令牌和刷新令牌（含資料庫記錄）"""
+    def generate_tokens(self, user_data: Dict[str, Any], auth_info: Dict[str, Any] = None,
+                        defer_persistence: bool = False) -> Dict[str, str]:
+        """
+        生成訪問令牌和刷新令牌（含資料庫記錄）
+        
+        Args:
+            user_data: 用戶信息
+            auth_info: 認證資訊（server、domain）
+            defer_persistence: 登入歷史與登入嘗試記錄改由背景任務寫入，不阻塞響應（會話記錄一律同步寫入）
+        """
         # now = datetime.datetime.utcnow()
         now = get_local_datetime()
         
@@ -201,11 +231,9 @@ class EnhancedJWTManager:
         
         # 記錄到資料庫
         if self.jwt_db and current_app.config.get('JWT_DATABASE_ENABLED', True):
-            try:
-                self._record_session_to_db(user_data, access_token, refresh_token, 
-                                         access_expires, refresh_expires, client_info, auth_info)
-            except Exception as e:
-                logger.error(f"記錄 JWT 會話到資料庫失敗: {str(e)}")
+            self._record_session_safely(user_data, session_id, access_token, refresh_token,
+                                        access_expires, refresh_expires, client_info, auth_info,
+                                        defer_audit=defer_persistence)
         
         return {
             'access_token': access_token,
@@ -215,11 +243,31 @@ class EnhancedJWTManager:
             'session_id': session_id
         }
     
-    def _record_session_to_db(self, user_data, access_token, refresh_token, 
-                             access_expires, refresh_expires, client_info, auth_info):
-        """記錄會話到資料庫"""
-        # 創建會話記錄
-        db_session_id = self.jwt_db.create_user_session(
+    def _record_session_safely(self, *args, **kwargs):
+        """記錄會話到資料庫（失敗時只記錄錯誤，不影響登入）"""
+        try:
+            self._record_session_to_db(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"記錄 JWT 會話到資料庫失敗: {str(e)}")
+    
+    def _write_audit_rows_safely(self, histories, attempts):
+        """寫入登入歷史與登入嘗試（背景任務使用，失敗時只記錄錯誤）"""
+        try:
+            self.jwt_db.bulk_insert_audit_records(histories=histories, attempts=attempts)
+        except Exception as e:
+            logger.error(f"記錄登入歷史到資料庫失敗: {str(e)}")
+    
+    def _record_session_to_db(self, user_data, session_id, access_token, refresh_token,
+                             access_expires, refresh_expires, client_info, auth_info,
+                             defer_audit: bool = False):
+        """
+        記錄會話、登入歷史與成功的登入嘗試
+        
+        會話 ID 與 JWT payload 中的 session_id 相同，登出時才能找到對應的會話記錄；
+        會話記錄一律於請求中同步寫入，否則在寫入前登出或停用會話會更新 0 列，之後寫入的會話仍為啟用狀態。
+        啟用稽核寫入佇列時登入歷史與嘗試記錄放入佇列，defer_audit 時交由背景任務寫入，否則三者以單一交易寫入
+        """
+        session_row = self.jwt_db.build_session_row(
             username=user_data.get('username'),
             user_id=user_data.get('user_id'),
             access_token=access_token,
@@ -228,14 +276,13 @@ class EnhancedJWTManager:
             refresh_expires_at=refresh_expires,
             ip_address=client_info['ip_address'],
             user_agent=client_info['user_agent'],
-            device_info=client_info['device_info']
+            device_info=client_info['device_info'],
+            session_id=session_id
         )
-        
-        # 記錄登入歷史
-        self.jwt_db.record_login_history(
+        history_row = self.jwt_db.build_login_history_row(
             username=user_data.get('username'),
             user_id=user_data.get('user_id'),
-            session_id=db_session_id,
+            session_id=session_id,
             login_successful=True,
             auth_method='ad',
             auth_server=auth_info.get('server') if auth_info else None,
@@ -244,38 +291,59 @@ class EnhancedJWTManager:
             user_agent=client_info['user_agent'],
             device_info=client_info['device_info']
         )
-        
-        # 記錄成功的登入嘗試
-        self.jwt_db.record_login_attempt(
+        attempt_row = self.jwt_db.build_login_attempt_row(
             username=user_data.get('username'),
             ip_address=client_info['ip_address'],
             is_successful=True,
             user_agent=client_info['user_agent']
         )
+        
+        if self.audit_queue is not None:
+            self.jwt_db.bulk_insert_audit_records(sessions=[session_row])
+            self.audit_queue.enqueue('login_history', history_row)
+            self.audit_queue.enqueue('login_attempt', attempt_row)
+        elif defer_audit:
+            self.jwt_db.bulk_insert_audit_records(sessions=[session_row])
+            from .background_tasks import background_tasks
+            background_tasks.submit(self._write_audit_rows_safely, [history_row], [attempt_row])
+        else:
+            self.jwt_db.bulk_insert_audit_records(
+                sessions=[session_row], histories=[history_row], attempts=[attempt_row]
+            )
     
-    def record_failed_login(self, username: str, failure_reason: str):
-        """記錄失敗的登入嘗試"""
+    def record_failed_login(self, username: str, failure_reason: str, is_suspicious: bool = None):
+        """記錄失敗的登入嘗試（is_suspicious 由登入節流提供時不再查詢資料庫計算）"""
         if self.jwt_db and current_app.config.get('JWT_DATABASE_ENABLED', True):
             try:
                 client_info = self._get_client_info()
-                self.jwt_db.record_login_attempt(
+                attempt_row = self.jwt_db.build_login_attempt_row(
                     username=username,
                     ip_address=client_info['ip_address'],
                     is_successful=False,
                     failure_reason=failure_reason,
-                    user_agent=client_info['user_agent']
+                    user_agent=client_info['user_agent'],
+                    is_suspicious=is_suspicious
                 )
+                if self.audit_queue is not None:
+                    self.audit_queue.enqueue('login_attempt', attempt_row)
+                else:
+                    self.jwt_db.bulk_insert_audit_records(attempts=[attempt_row])
             except Exception as e:
                 logger.error(f"記錄失敗登入嘗試失敗: {str(e)}")
     
+    def _is_token_blacklisted(self, token: str, token_hash: str) -> bool:
+        """檢查令牌是否已加入黑名單（優先使用撤銷快取，快取未就緒時查詢資料庫）"""
+        if self.revocation_cache is not None:
+            revoked = self.revocation_cache.is_revoked(token_hash)
+            if revoked is not None:
+                return revoked
+        return self.jwt_db.is_token_blacklisted(token)
+    
+    @request_timing.timed('jwt')
     def verify_token(self, token: str, token_type: str = 'access') -> Optional[Dict[str, Any]]:
-        """驗證 JWT 令牌（含資料庫黑名單檢查）"""
+        """驗證 JWT 令牌（含黑名單檢查）"""
         try:
-            # 檢查資料庫黑名單
-            if self.jwt_db and self.jwt_db.is_token_blacklisted(token):
-                logger.warning("嘗試使用已加入資料庫黑名單的令牌")
-                return None
-            
+            # 先驗證簽章與期限，無效令牌不必檢查黑名單
             payload = jwt.decode(
                 token,
                 current_app.config['JWT_SECRET_KEY'],
@@ -284,15 +352,26 @@ class EnhancedJWTManager:
             
             # 檢查令牌類型
             if payload.get('type') != token_type:
-                logger.warning(f"令牌類型不匹配: 期望 {token_type}, 實際 {payload.get('type')}")
+                logger.warning("令牌類型不匹配: 期望 %s, 實際 %s", token_type, payload.get('type'))
                 return None
             
-            # 更新會話最後訪問時間
-            if token_type == 'access' and self.jwt_db:
-                try:
-                    self.jwt_db.update_session_access_time(token)
-                except Exception as e:
-                    logger.error(f"更新會話訪問時間失敗: {str(e)}")
+            if self.jwt_db:
+                token_hash = self.jwt_db.hash_token(token)
+                
+                # 檢查黑名單
+                if self._is_token_blacklisted(token, token_hash):
+                    logger.warning("嘗試使用已加入資料庫黑名單的令牌")
+                    return None
+                
+                # 更新會話最後訪問時間（啟用緩衝時只記錄於記憶體，由背景任務批量寫回）
+                if token_type == 'access':
+                    try:
+                        if self.session_activity is not None:
+                            self.session_activity.touch(token_hash)
+                        else:
+                            self.jwt_db.update_session_access_time(token)
+                    except Exception as e:
+                        logger.error("更新會話訪問時間失敗: %s", e)
             
             return payload
             
@@ -300,10 +379,10 @@ class EnhancedJWTManager:
             logger.warning("JWT 令牌已過期")
             return None
         except jwt.InvalidTokenError as e:
-            logger.warning(f"無效的 JWT 令牌: {str(e)}")
+            logger.warning("無效的 JWT 令牌: %s", e)
             return None
         except Exception as e:
-            logger.error(f"JWT 令牌驗證錯誤: {str(e)}")
+            logger.error("JWT 令牌驗證錯誤: %s", e)
             return None
     
     def blacklist_token(self, token: str, token_type: str = 'access', 
@@ -322,6 +401,10 @@ class EnhancedJWTManager:
             username = username or payload.get('username')
             session_id = payload.get('session_id')
             
+            # 先寫入本行程的撤銷快取，使撤銷立即生效（其他行程於下次同步時生效）
+            if self.jwt_db and self.revocation_cache is not None:
+                self.revocation_cache.add(self.jwt_db.hash_token(token), payload.get('exp', 0))
+            
             if self.jwt_db:
                 self.jwt_db.blacklist_token(
                     token=token,
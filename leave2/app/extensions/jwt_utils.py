@@ -75,12 +75,14 @@ class JWTUtils:
         
         user_data = ad_result['data'].get('user', {})
         subordinates = ad_result['data'].get('subordinates', [])
+        # 下屬清單延後補齊時，以 AD 回報的直屬下屬數判斷
+        subordinates_count = ad_result['data'].get('subordinates_count', len(subordinates))
         
         # 判斷是否為主管
-        is_manager = len(subordinates) > 0
+        is_manager = subordinates_count > 0
         
         user_info = {
-            'username': user_data.get('username', ''),
+            'username': user_data.get('username') or user_data.get('sam_account', ''),
             'user_id': user_data.get('employee_id', ''),
             'sam_account': user_data.get('sam_account', ''),
             'display_name': user_data.get('display_name', ''),
@@ -88,7 +90,7 @@ class JWTUtils:
             'department': user_data.get('department', ''),
             'title': user_data.get('title', ''),
             'is_manager': is_manager,
-            'subordinates_count': len(subordinates),
+            'subordinates_count': subordinates_count,
             'subordinates': subordinates, # 下屬列表 add 2025-06-16
             'manager_info': ad_result['data'].get('manager', {})
         }
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+LDAP 連接池擴展模組
+以服務帳號維持可重用的目錄查詢連接，並提供短暫的使用者密碼綁定
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+try:
+    from ldap3 import Server, Connection, SIMPLE, NONE
+    from ldap3.core.exceptions import LDAPException, LDAPBindError
+    LDAP_AVAILABLE = True
+except ImportError:
+    LDAP_AVAILABLE = False
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class PooledConnection:
+    """連接池中的單一連接與其使用記錄"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.broken = False
+
+
+class LDAPConnectionPool:
+    """單一 AD 伺服器的 LDAP 連接池"""
+
+    def __init__(self, server_ip: str, port: int = 389,
+                 service_user: Optional[str] = None, service_password: Optional[str] = None,
+                 size: int = 5, connect_timeout: int = 5, receive_timeout: int = 15,
+                 health_check_interval: int = 60, max_lifetime: int = 1800,
+                 acquire_timeout: int = 10):
+        """
+        初始化連接池
+
+        Args:
+            server_ip: AD 伺服器 IP
+            port: LDAP 連接埠
+            service_user: 服務帳號（未設置時不提供目錄查詢連接）
+            service_password: 服務帳號密碼
+            size: 最大連接數
+            connect_timeout: 建立 TCP 連接逾時（秒）
+            receive_timeout: 等待回應逾時（秒）
+            health_check_interval: 閒置超過此秒數的連接在取用前先檢查
+            max_lifetime: 連接最長使用秒數，超過後重新建立
+            acquire_timeout: 等待可用連接的逾時（秒）
+        """
+        self.server_ip = server_ip
+        self.port = port
+        self.service_user = service_user
+        self.service_password = service_password
+        self.size = size
+        self.receive_timeout = receive_timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+
+        # Server 物件只建立一次；不讀取 schema / DSE 資訊以縮短連接時間
+        self.server = Server(server_ip, port=port, get_info=NONE, connect_timeout=connect_timeout)
+
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+        # 統計計數器
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self.health_check_failures = 0
+        self.user_binds = 0
+        self.user_bind_failures = 0
+
+    @property
+    def has_service_account(self) -> bool:
+        """是否已設置服務帳號"""
+        return bool(self.service_user and self.service_password)
+
+    def bind_user(self, user: str, password: str):
+        """
+        以使用者帳號密碼建立短暫綁定（用於密碼驗證）
+
+        Args:
+            user: 綁定帳號（UPN、DOMAIN\\user 等格式）
+            password: 密碼
+
+        Returns:
+            Connection: 已綁定的連接，呼叫端用畢須 unbind
+
+        Raises:
+            LDAPBindError: 帳號或密碼錯誤（訊息包含 AD 診斷碼，例如 data 52e）
+            LDAPException: 連接失敗
+        """
+        self.user_binds += 1
+        conn = Connection(
+            self.server,
+            user=user,
+            password=password,
+            authentication=SIMPLE,
+            receive_timeout=self.receive_timeout
+        )
+        try:
+            bound = conn.bind()
+        except LDAPException:
+            self.user_bind_failures += 1
+            raise
+
+        if not bound:
+            self.user_bind_failures += 1
+            # 保留 AD 的診斷訊息，讓呼叫端區分「帳號不存在」與「密碼錯誤」
+            result = conn.result or {}
+            conn.unbind()
+            raise LDAPBindError(f"{result.get('description', 'bind failed')} - {result.get('message', '')}")
+        return conn
+
+    def _create(self) -> PooledConnection:
+        """建立新的服務帳號連接"""
+        conn = Connection(
+            self.server,
+            user=self.service_user,
+            password=self.service_password,
+            authentication=SIMPLE,
+            auto_bind=True,
+            receive_timeout=self.receive_timeout
+        )
+        with self._lock:
+            self.created += 1
+        return PooledConnection(conn)
+
+    def _discard(self, pooled: PooledConnection):
+        """關閉並丟棄連接"""
+        with self._lock:
+            self.discarded += 1
+        try:
+            pooled.conn.unbind()
+        except Exception:
+            pass
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        """檢查連接是否仍可使用（閒置過久時以 Who Am I 探測）"""
+        conn = pooled.conn
+        now = time.monotonic()
+        if pooled.broken or conn.closed or not conn.bound:
+            return False
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            return False
+        if now - pooled.last_used_at > self.health_check_interval:
+            try:
+                conn.extend.standard.who_am_i()
+            except Exception:
+                self.health_check_failures += 1
+                return False
+        return True
+
+    def _acquire(self) -> PooledConnection:
+        """取得可用連接（優先重用閒置連接，失效者自動重建）"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"等待 LDAP 連接逾時 ({self.server_ip})")
+
+        try:
+            while True:
+                try:
+                    pooled = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create()
+
+                if self._is_healthy(pooled):
+                    with self._lock:
+                        self.reused += 1
+                    return pooled
+                self._discard(pooled)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, pooled: PooledConnection):
+        """歸還連接"""
+        try:
+            if pooled.broken or pooled.conn.closed:
+                self._discard(pooled)
+            else:
+                pooled.last_used_at = time.monotonic()
+                self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        借用服務帳號連接進行目錄查詢
+
+        使用期間發生 LDAP 錯誤時，該連接不會放回池中
+
+        Yields:
+            Connection: 已綁定的服務帳號連接
+        """
+        if not self.has_service_account:
+            raise RuntimeError("未設置 LDAP 服務帳號")
+
+        pooled = self._acquire()
+        try:
+            yield pooled.conn
+        except LDAPException:
+            pooled.broken = True
+            raise
+        finally:
+            self._release(pooled)
+
+    def health_check(self) -> Dict[str, int]:
+        """
+        檢查所有閒置連接並丟棄失效者（由背景任務定期執行）
+
+        Returns:
+            dict: 檢查與丟棄的連接數
+        """
+        checked = 0
+        healthy = []
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked += 1
+            if self._is_healthy(pooled):
+                healthy.append(pooled)
+            else:
+                self._discard(pooled)
+
+        for pooled in reversed(healthy):
+            self._idle.put(pooled)
+        return {'checked': checked, 'discarded': checked - len(healthy)}
+
+    def close(self):
+        """關閉所有閒置連接"""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取連接池統計信息"""
+        return {
+            'server': f"{self.server_ip}:{self.port}",
+            'service_account': self.has_service_account,
+            'size': self.size,
+            'idle': self._idle.qsize(),
+            'created': self.created,
+            'reused': self.reused,
+            'discarded': self.discarded,
+            'health_check_failures': self.health_check_failures,
+            'user_binds': self.user_binds,
+            'user_bind_failures': self.user_bind_failures
+        }
+
+
+class LDAPPoolManager:
+    """LDAP 連接池管理器（每個 AD 伺服器一個連接池）"""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self.config: Dict[str, Any] = {}
+        self._pools: Dict[Tuple[str, int], LDAPConnectionPool] = {}
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式"""
+        self.app = app
+
+        app.config.setdefault('LDAP_POOL_CONFIG', {})
+        self.config = app.config['LDAP_POOL_CONFIG']
+
+        if LDAP_AVAILABLE:
+            from .background_tasks import background_tasks
+            background_tasks.schedule_periodic(
+                'ldap_pool:health_check',
+                self.config.get('HEALTH_CHECK_INTERVAL', 60),
+                self.health_check
+            )
+
+        app.extensions['ldap_pools'] = self
+        logger.info(f"LDAP 連接池管理器初始化完成 (LDAP Available: {LDAP_AVAILABLE})")
+
+    def get_pool(self, server_ip: str, port: int = 389) -> LDAPConnectionPool:
+        """
+        獲取指定伺服器的連接池（首次使用時建立）
+
+        服務帳號只會綁定到 SERVICE_SERVERS 中列出的伺服器，避免將其密碼送往請求指定的任意伺服器
+
+        Args:
+            server_ip: AD 伺服器 IP
+            port: LDAP 連接埠
+
+        Returns:
+            LDAPConnectionPool: 連接池
+        """
+        key = (server_ip, port)
+        pool = self._pools.get(key)
+        if pool is not None:
+            return pool
+
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                config = self.config
+                if len(self._pools) >= config.get('MAX_POOLS', 8):
+                    # 伺服器可由請求指定，超過上限時不再保存新的連接池
+                    logger.warning(f"LDAP 連接池數量已達上限，{server_ip} 使用臨時連接池")
+                    return LDAPConnectionPool(server_ip, port=port, size=1,
+                                              connect_timeout=config.get('CONNECT_TIMEOUT', 5),
+                                              receive_timeout=config.get('RECEIVE_TIMEOUT', 15))
+                trusted = server_ip in config.get('SERVICE_SERVERS', [])
+                pool = LDAPConnectionPool(
+                    server_ip,
+                    port=port,
+                    service_user=config.get('SERVICE_USER') if trusted else None,
+                    service_password=config.get('SERVICE_PASSWORD') if trusted else None,
+                    size=config.get('SIZE', 5),
+                    connect_timeout=config.get('CONNECT_TIMEOUT', 5),
+                    receive_timeout=config.get('RECEIVE_TIMEOUT', 15),
+                    health_check_interval=config.get('HEALTH_CHECK_INTERVAL', 60),
+                    max_lifetime=config.get('MAX_LIFETIME', 1800),
+                    acquire_timeout=config.get('ACQUIRE_TIMEOUT', 10)
+                )
+                self._pools[key] = pool
+                logger.info(f"已建立 LDAP 連接池 {server_ip}:{port} (服務帳號: {pool.has_service_account})")
+        return pool
+
+    def health_check(self):
+        """檢查所有連接池的閒置連接"""
+        for pool in list(self._pools.values()):
+            result = pool.health_check()
+            if result['discarded']:
+                logger.info(f"LDAP 連接池 {pool.server_ip} 丟棄 {result['discarded']} 個失效連接")
+
+    def close_all(self):
+        """關閉所有連接池"""
+        for pool in list(self._pools.values()):
+            pool.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取所有連接池統計信息"""
+        return {
+            'ldap_available': LDAP_AVAILABLE,
+            'pools': [pool.get_statistics() for pool in list(self._pools.values())]
+        }
+
+
+# 創建全局實例
+ldap_pools = LDAPPoolManager()
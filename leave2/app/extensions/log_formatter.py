@@ -0,0 +1,74 @@
+# app/extensions/log_formatter.py
+"""
+結構化日誌模組
+RequestContextFilter 在記錄產生的執行緒中附加請求 ID 與使用者，
+StructuredFormatter 於寫入執行緒將記錄輸出為單行 JSON，供日誌收集器解析
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from flask import g, has_request_context
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# LogRecord 本身的屬性，其餘屬性視為 extra 欄位輸出
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord('', logging.INFO, '', 0, '', None, None).__dict__
+) | {'message', 'asctime', 'taskName', 'request_id', 'user'}
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    附加請求上下文欄位（request_id、user）
+
+    需加在處理器上：寫入執行緒沒有請求上下文，欄位必須在記錄產生時取得
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            if has_request_context():
+                record.request_id = g.get('request_id')
+                current_user = g.get('current_user')
+                record.user = current_user.get('username') if current_user else None
+            else:
+                record.request_id = None
+                record.user = None
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """單行 JSON 日誌格式器"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'timestamp': datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'user': getattr(record, 'user', None)
+        }
+
+        # extra={...} 傳入的欄位（例如 duration_ms、status）
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+
+        if orjson is not None:
+            try:
+                return orjson.dumps(entry, default=str).decode('utf-8')
+            except TypeError:
+                pass
+        return json.dumps(entry, ensure_ascii=False, default=str)
@@ -0,0 +1,154 @@
+# app/extensions/log_sampler.py
+"""
+日誌抽樣與去重模組
+依記錄器名稱前綴抽樣（同一請求的記錄一起保留或捨棄），時間視窗內相同訊息只記錄一次，
+視窗結束後寫入一行「已抑制 N 筆」摘要；ERROR 以上級別一律記錄
+"""
+import logging
+import random
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import g, has_request_context
+
+# 記錄上保存的判斷結果（同一筆記錄經過多個處理器時只判斷一次）
+_DECISION_ATTR = '_sampler_keep'
+
+
+class LogSampler(logging.Filter):
+    """日誌抽樣 / 去重過濾器（加在根日誌記錄器的處理器上）"""
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None, dedup_window: float = 60.0,
+                 dedup_max_keys: int = 10000, always_log_level: int = logging.ERROR):
+        """
+        Args:
+            sample_rates: 記錄器名稱前綴 -> 保留比例（0~1，'app.request' 同時匹配 'app.request.xxx'）
+            dedup_window: 去重時間視窗（秒），0 表示不去重
+            dedup_max_keys: 同時追蹤的訊息數上限
+            always_log_level: 此級別以上不抽樣也不去重
+        """
+        super().__init__()
+        # 最長前綴優先
+        self._rates: List[Tuple[str, float]] = sorted(
+            (sample_rates or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self._resolved: Dict[str, float] = {}
+        self.dedup_window = dedup_window
+        self.dedup_max_keys = dedup_max_keys
+        self.always_log_level = always_log_level
+
+        # (記錄器名稱, 級別, 訊息) -> [視窗開始時間, 抑制筆數]
+        self._seen: Dict[Tuple[str, int, str], List[Any]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+        # 統計計數器
+        self.passed = 0
+        self.sampled_out = 0
+        self.suppressed = 0
+        self.summaries = 0
+
+    def _rate_for(self, logger_name: str) -> float:
+        """取得記錄器的保留比例（結果依記錄器名稱快取）"""
+        rate = self._resolved.get(logger_name)
+        if rate is None:
+            rate = 1.0
+            for prefix, prefix_rate in self._rates:
+                if logger_name == prefix or logger_name.startswith(prefix + '.'):
+                    rate = prefix_rate
+                    break
+            self._resolved[logger_name] = rate
+        return rate
+
+    @staticmethod
+    def _sample(rate: float) -> bool:
+        """依比例決定是否保留；請求中以請求 ID 決定，使同一請求的記錄一起保留"""
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        request_id = g.get('request_id') if has_request_context() else None
+        if request_id:
+            return zlib.crc32(request_id.encode('utf-8')) % 10000 < rate * 10000
+        return random.random() < rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        keep = getattr(record, _DECISION_ATTR, None)
+        if keep is None:
+            keep = self._decide(record)
+            setattr(record, _DECISION_ATTR, keep)
+        return keep
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.always_log_level or getattr(record, 'suppressed_count', None) is not None:
+            self.passed += 1
+            return True
+
+        if not self._sample(self._rate_for(record.name)):
+            self.sampled_out += 1
+            return False
+
+        if self.dedup_window > 0:
+            now = time.monotonic()
+            if now - self._last_sweep >= self.dedup_window:
+                self.flush(now)
+
+            try:
+                key = (record.name, record.levelno, record.getMessage())
+            except Exception:
+                # 訊息參數錯誤由處理器回報
+                self.passed += 1
+                return True
+            with self._lock:
+                entry = self._seen.get(key)
+                if entry is not None and now - entry[0] < self.dedup_window:
+                    entry[1] += 1
+                    self.suppressed += 1
+                    return False
+                if entry is None and len(self._seen) >= self.dedup_max_keys:
+                    # 追蹤數已達上限：不去重，直接記錄
+                    self.passed += 1
+                    return True
+                self._seen[key] = [now, 0]
+            if entry is not None and entry[1] > 0:
+                self._emit_summary(key, entry[1])
+
+        self.passed += 1
+        return True
+
+    def flush(self, now: Optional[float] = None):
+        """寫入已結束視窗的抑制摘要並移除過期的追蹤記錄"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._lock:
+            self._last_sweep = now
+            for key, (started, count) in list(self._seen.items()):
+                if now - started >= self.dedup_window:
+                    del self._seen[key]
+                    if count > 0:
+                        expired.append((key, count))
+        for key, count in expired:
+            self._emit_summary(key, count)
+
+    def _emit_summary(self, key: Tuple[str, int, str], count: int):
+        """以原記錄器與級別寫入抑制摘要"""
+        logger_name, level, message = key
+        self.summaries += 1
+        logging.getLogger(logger_name).log(
+            level, "已抑制 %d 筆重複日誌（%d 秒內）: %s", count, self.dedup_window, message,
+            extra={'suppressed_count': count}
+        )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取抽樣 / 去重統計信息"""
+        return {
+            'sample_rates': dict(self._rates),
+            'dedup_window': self.dedup_window,
+            'tracked_messages': len(self._seen),
+            'passed': self.passed,
+            'sampled_out': self.sampled_out,
+            'suppressed': self.suppressed,
+            'summaries': self.summaries
+        }
@@ -0,0 +1,314 @@
+# app/extensions/log_sink.py
+"""
+批量日誌寫入模組
+所有日誌檔案共用一個有界佇列與一個寫入執行緒：每批記錄依檔案合併為一次寫入，
+定期 fsync；佇列已滿時依溢出策略丟棄 / 抽樣 / 短暫等待，請求執行緒不會等待磁碟
+"""
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+OVERFLOW_POLICIES = ('drop', 'sample', 'block')
+
+
+class _LogTarget:
+    """寫入目標（輪替日誌檔案或串流）"""
+
+    def __init__(self, name: str, formatter: logging.Formatter, handler: logging.StreamHandler):
+        self.name = name
+        self.formatter = formatter
+        # 只使用處理器的串流與輪替邏輯，寫入由 BatchingLogSink 批量進行
+        self.handler = handler
+        self.written = 0
+        self.dropped = 0
+        self.reported_dropped = 0
+
+    def write(self, records: List[logging.LogRecord]):
+        """格式化並以一次寫入輸出一批記錄"""
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(f"{record.levelname} in {record.name}: <日誌格式化失敗> {record.msg!r}")
+        text = '\n'.join(lines) + '\n'
+
+        handler = self.handler
+        if isinstance(handler, logging.handlers.RotatingFileHandler) and handler.maxBytes > 0:
+            if handler.stream is None:
+                handler.stream = handler._open()
+            handler.stream.seek(0, 2)
+            if handler.stream.tell() + len(text.encode(handler.encoding or 'utf-8')) >= handler.maxBytes:
+                handler.doRollover()
+        if handler.stream is None:
+            handler.stream = handler._open()
+        handler.stream.write(text)
+        handler.stream.flush()
+        self.written += len(records)
+
+    def fsync(self):
+        """將作業系統緩衝寫入磁碟（僅檔案）"""
+        stream = self.handler.stream
+        if isinstance(self.handler, logging.FileHandler) and stream is not None:
+            try:
+                os.fsync(stream.fileno())
+            except (OSError, ValueError):
+                pass
+
+    def close(self):
+        try:
+            self.handler.flush()
+            if isinstance(self.handler, logging.FileHandler):
+                self.handler.close()
+        except Exception:
+            pass
+
+
+class SinkHandler(logging.Handler):
+    """將記錄放入 BatchingLogSink 佇列的處理器（請求執行緒只做訊息合併與入列）"""
+
+    def __init__(self, sink: 'BatchingLogSink', target: str, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.sink = sink
+        self.target = target
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # 不需要處理器鎖：佇列本身是執行緒安全的
+        if not self.filter(record):
+            return False
+        self.sink.put(self.target, record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        self.sink.put(self.target, record)
+
+
+class BatchingLogSink:
+    """有界、批量寫入的日誌佇列"""
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 0.5,
+                 fsync_interval: float = 5.0, overflow_policy: str = 'drop', sample_rate: int = 10,
+                 block_timeout: float = 0.05):
+        """
+        Args:
+            max_size: 佇列容量（記憶體上限）
+            batch_size: 單批最多記錄數
+            flush_interval: 最長累積秒數
+            fsync_interval: fsync 間隔秒數（0 表示每批 fsync）
+            overflow_policy: 佇列已滿時的策略
+                drop   - 丟棄新記錄
+                sample - 每 sample_rate 筆保留一筆（短暫等待佇列空間），其餘丟棄
+                block  - 最多等待 block_timeout 秒，仍無空間時丟棄
+            sample_rate: sample 策略的抽樣間隔
+            block_timeout: 等待佇列空間的最長秒數
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的日誌溢出策略: {overflow_policy}")
+
+        self._queue: "queue.Queue[Tuple[Any, Any]]" = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.overflow_policy = overflow_policy
+        self.sample_rate = max(1, sample_rate)
+        self.block_timeout = block_timeout
+
+        self.targets: Dict[str, _LogTarget] = {}
+        self._worker: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._last_fsync = time.monotonic()
+
+        # 統計計數器
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled = 0
+        self.batches = 0
+        self.write_errors = 0
+        self._overflow_count = 0
+
+    def add_file(self, name: str, filename: str, formatter: logging.Formatter, level: int = logging.INFO,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5) -> SinkHandler:
+        """
+        註冊輪替日誌檔案
+
+        Returns:
+            SinkHandler: 寫入此檔案的處理器
+        """
+        handler = logging.handlers.RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+        self.targets[name] = _LogTarget(name, formatter, handler)
+        return SinkHandler(self, name, level)
+
+    def add_stream(self, name: str, formatter: logging.Formatter, level: int = logging.INFO,
+                   stream=None) -> SinkHandler:
+        """註冊串流（例如控制台）"""
+        self.targets[name] = _LogTarget(name, formatter, logging.StreamHandler(stream))
+        return SinkHandler(self, name, level)
+
+    def start(self):
+        """啟動寫入執行緒"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def _prepare(record: logging.LogRecord) -> logging.LogRecord:
+        """合併訊息參數並保存例外文字（與 QueueHandler.prepare 相同，不保留參數與 traceback 物件）"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def put(self, target: str, record: logging.LogRecord):
+        """放入一筆記錄（不會等待磁碟；佇列已滿時依溢出策略處理）"""
+        try:
+            item = (target, self._prepare(record))
+        except Exception:
+            self.write_errors += 1
+            return
+
+        try:
+            self._queue.put_nowait(item)
+            self.enqueued += 1
+            return
+        except queue.Full:
+            pass
+
+        # 錯誤以上級別與 block 策略：短暫等待佇列空間
+        wait = record.levelno >= logging.ERROR or self.overflow_policy == 'block'
+        if not wait and self.overflow_policy == 'sample':
+            self._overflow_count += 1
+            wait = self._overflow_count % self.sample_rate == 0
+            if wait:
+                self.sampled += 1
+        if wait:
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+                self.enqueued += 1
+                return
+            except queue.Full:
+                pass
+
+        self.dropped += 1
+        log_target = self.targets.get(target)
+        if log_target is not None:
+            log_target.dropped += 1
+
+    def _run(self):
+        """寫入執行緒：累積一批記錄後依檔案合併寫入"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    break
+                self._maybe_fsync()
+                continue
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[Any, Any]]):
+        grouped: Dict[str, List[logging.LogRecord]] = {}
+        waiters = []
+        for target, record in batch:
+            if target is None:
+                # flush() 的同步標記
+                waiters.append(record)
+                continue
+            grouped.setdefault(target, []).append(record)
+
+        for name, records in grouped.items():
+            log_target = self.targets.get(name)
+            if log_target is None:
+                continue
+            summary = self._drop_summary(log_target)
+            if summary is not None:
+                records.append(summary)
+            try:
+                log_target.write(records)
+            except Exception as e:
+                self.write_errors += 1
+                if self.write_errors % 100 == 1:
+                    print(f"❌ 日誌寫入 {name} 失敗: {e}")
+        self.batches += 1
+        self._maybe_fsync(force=bool(waiters))
+
+        for event in waiters:
+            event.set()
+
+    @staticmethod
+    def _drop_summary(log_target: _LogTarget) -> Optional[logging.LogRecord]:
+        """溢出丟棄記錄後，於該檔案寫入一行摘要"""
+        dropped = log_target.dropped - log_target.reported_dropped
+        if dropped <= 0:
+            return None
+        log_target.reported_dropped = log_target.dropped
+        return logging.LogRecord(
+            'logging', logging.WARNING, __file__, 0,
+            f"日誌佇列已滿，已丟棄 {dropped} 筆記錄", None, None
+        )
+
+    def _maybe_fsync(self, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self.fsync_interval:
+            for log_target in self.targets.values():
+                log_target.fsync()
+            self._last_fsync = now
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待佇列中已有的記錄寫入磁碟"""
+        if self._worker is None or not self._worker.is_alive():
+            return False
+        event = threading.Event()
+        try:
+            self._queue.put((None, event), timeout=timeout)
+        except queue.Full:
+            return False
+        return event.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0):
+        """停止寫入執行緒，寫完剩餘記錄並關閉檔案"""
+        if self._worker is not None:
+            self._stop_event.set()
+            self._worker.join(timeout=timeout)
+            self._worker = None
+        for log_target in self.targets.values():
+            log_target.fsync()
+            log_target.close()
+        self.targets.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取日誌佇列統計信息"""
+        return {
+            'running': self._worker is not None and self._worker.is_alive(),
+            'pending': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'overflow_policy': self.overflow_policy,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'sampled': self.sampled,
+            'batches': self.batches,
+            'write_errors': self.write_errors,
+            'targets': {
+                name: {'written': target.written, 'dropped': target.dropped}
+                for name, target in self.targets.items()
+            }
+        }
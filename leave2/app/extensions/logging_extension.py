@@ -8,17 +8,82 @@ import logging
 import logging.handlers
 import os
 import atexit
-import queue
-import time
-from typing import Dict
+from typing import Dict, Iterable, List, Optional
+
+from .log_formatter import RequestContextFilter, StructuredFormatter
+from .log_sampler import LogSampler
+from .log_sink import BatchingLogSink
+
+
+class LogRouter(logging.Handler):
+    """
+    依記錄器名稱分派日誌記錄
+    
+    每筆記錄只送到名稱對應的檔案（例如 auth → auth.log，未對應者送到預設檔案），
+    另外依級別送到接收所有記錄器的檔案（例如 error.log、security.log），
+    不再將每筆記錄格式化並放入所有檔案的佇列
+    """
+    
+    def __init__(self, handlers: Dict[str, logging.Handler], routes: Dict[str, Iterable[str]],
+                 level_routes: Iterable[str] = (), default_route: Optional[str] = 'app'):
+        """
+        Args:
+            handlers: 日誌檔案名稱 -> 處理器
+            routes: 日誌檔案名稱 -> 記錄器名稱前綴列表（'auth' 同時匹配 'auth.xxx'）
+            level_routes: 依級別接收所有記錄器記錄的日誌檔案名稱
+            default_route: 名稱未匹配時的日誌檔案名稱
+        """
+        super().__init__(logging.NOTSET)
+        self.targets = handlers
+        # 最長前綴優先
+        self._prefixes = sorted(
+            ((prefix, name) for name, prefixes in routes.items() if name in handlers for prefix in prefixes),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+        self._level_targets = [handlers[name] for name in level_routes if name in handlers]
+        self._default = handlers.get(default_route)
+        self._resolved: Dict[str, List[logging.Handler]] = {}
+        self.routed = {name: 0 for name in handlers}
+        self._names = {handler: name for name, handler in handlers.items()}
+    
+    def _resolve(self, logger_name: str) -> List[logging.Handler]:
+        """取得記錄器對應的處理器（結果依記錄器名稱快取）"""
+        targets = self._resolved.get(logger_name)
+        if targets is None:
+            target = self._default
+            for prefix, name in self._prefixes:
+                if logger_name == prefix or logger_name.startswith(prefix + '.'):
+                    target = self.targets[name]
+                    break
+            targets = [target] if target is not None else []
+            targets += [handler for handler in self._level_targets if handler not in targets]
+            self._resolved[logger_name] = targets
+        return targets
+    
+    def handle(self, record: logging.LogRecord) -> bool:
+        if not self.filter(record):
+            return False
+        for handler in self._resolve(record.name):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+                self.routed[self._names[handler]] += 1
+        return True
+    
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
 
 class CompleteLoggingExtension:
     """完整的 Flask 日誌擴展"""
     
     def __init__(self):
-        self.listeners = []
-        self.file_handlers = []
-        self.queue_handlers = []
+        self.sink: Optional[BatchingLogSink] = None
+        self.file_queue_handlers: Dict[str, logging.Handler] = {}
+        self.console_handler = None
+        self.router = None
+        self.sampler: Optional[LogSampler] = None
+        self.structured = False
         self._initialized = False
         self.log_files_created = []
     
@@ -32,9 +97,11 @@ class CompleteLoggingExtension:
         
         try:
             # 1. 獲取配置
-            log_dir = getattr(app.config, 'LOG_DIR', 'logs')
-            log_files = getattr(app.config, 'LOG_FILES', {})
-            console_enabled = getattr(app.config, 'CONSOLE_LOG_ENABLED', True)
+            log_dir = app.config.get('LOG_DIR', 'logs')
+            log_files = app.config.get('LOG_FILES', {})
+            console_enabled = app.config.get('CONSOLE_LOG_ENABLED', True)
+            log_routes = app.config.get('LOG_ROUTES') or self._create_default_routes()
+            self.structured = app.config.get('STRUCTURED_LOGGING', False)
             
             print(f"📁 日誌目錄: {log_dir}")
             print(f"📋 配置文件數量: {len(log_files)}")
@@ -50,11 +117,12 @@ class CompleteLoggingExtension:
             # 4. 完全重置日誌系統
             self._reset_logging_system()
             
-            # 5. 創建所有日誌處理器
-            self._create_all_handlers(log_files, console_enabled)
+            # 5. 創建所有日誌處理器（共用一個有界批量寫入佇列）
+            self._create_all_handlers(log_files, console_enabled, app.config.get('LOG_QUEUE_CONFIG', {}))
             
-            # 6. 設置根日誌記錄器
-            self._setup_root_logger()
+            # 6. 設置根日誌記錄器（依記錄器名稱分派到各檔案）
+            self._setup_root_logger(log_routes)
+            self._setup_sampler(app.config.get('LOG_SAMPLING_CONFIG', {}))
             
             # 7. 驗證設置
             self._verify_complete_setup()
@@ -117,6 +185,20 @@ class CompleteLoggingExtension:
             }
         }
     
+    def _create_default_routes(self):
+        """創建默認日誌分派配置"""
+        return {
+            'routes': {
+                'auth': ['auth'],
+                'leave': ['leave'],
+                'notification': ['notification'],
+                'security': ['security'],
+                'error': ['error']
+            },
+            'level_routes': ['error', 'security'],
+            'default': 'app'
+        }
+    
     def _reset_logging_system(self):
         """完全重置日誌系統"""
         print("🧹 重置日誌系統...")
@@ -150,21 +232,35 @@ class CompleteLoggingExtension:
         
         print("✅ 日誌系統重置完成")
     
-    def _create_all_handlers(self, log_files: Dict, console_enabled: bool):
+    def _create_all_handlers(self, log_files: Dict, console_enabled: bool, queue_config: Dict):
         """創建所有日誌處理器"""
         print("🔨 創建日誌處理器...")
         
-        # 創建格式器
-        file_formatter = logging.Formatter(
-            '[%(asctime)s] %(levelname)s in %(name)s: %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        # 創建格式器（結構化模式下日誌文件為單行 JSON，控制台維持文字格式）
+        if self.structured:
+            file_formatter = StructuredFormatter()
+        else:
+            file_formatter = logging.Formatter(
+                '[%(asctime)s] %(levelname)s in %(name)s: %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
         
         console_formatter = logging.Formatter(
             '[%(asctime)s] %(levelname)s: %(message)s',
             datefmt='%H:%M:%S'
         )
         
+        # 所有檔案與控制台共用一個有界佇列與一個寫入執行緒
+        self.sink = BatchingLogSink(
+            max_size=queue_config.get('MAX_SIZE', 10000),
+            batch_size=queue_config.get('BATCH_SIZE', 500),
+            flush_interval=queue_config.get('FLUSH_INTERVAL', 0.5),
+            fsync_interval=queue_config.get('FSYNC_INTERVAL', 5.0),
+            overflow_policy=queue_config.get('OVERFLOW_POLICY', 'drop'),
+            sample_rate=queue_config.get('SAMPLE_RATE', 10),
+            block_timeout=queue_config.get('BLOCK_TIMEOUT', 0.05)
+        )
+        
         # 為每個日誌文件創建處理器
         for log_name, log_config in log_files.items():
             success = self._create_single_file_handler(
@@ -177,8 +273,9 @@ class CompleteLoggingExtension:
         if console_enabled:
             self._create_console_handler(console_formatter)
         
-        print(f"✅ 創建了 {len(self.queue_handlers)} 個隊列處理器")
-        print(f"✅ 創建了 {len(self.listeners)} 個監聽器")
+        self.sink.start()
+        
+        print(f"✅ 創建了 {len(self.sink.targets)} 個寫入目標（佇列容量 {self.sink.get_statistics()['capacity']}，溢出策略 {self.sink.overflow_policy}）")
         print(f"✅ 將創建 {len(self.log_files_created)} 個日誌文件")
     
     def _create_single_file_handler(self, log_name: str, log_config: Dict, formatter):
@@ -186,37 +283,15 @@ class CompleteLoggingExtension:
         try:
             print(f"  📄 配置 {log_name}: {log_config['filename']}")
             
-            # 1. 創建隊列
-            log_queue = queue.Queue()
-            
-            # 2. 創建隊列處理器
-            queue_handler = logging.handlers.QueueHandler(log_queue)
-            queue_handler.setLevel(log_config.get('level', logging.INFO))
-            
-            # 3. 創建文件處理器
-            file_handler = logging.handlers.RotatingFileHandler(
+            handler = self.sink.add_file(
+                log_name,
                 log_config['filename'],
-                maxBytes=log_config.get('max_bytes', 10*1024*1024),
-                backupCount=log_config.get('backup_count', 5),
-                encoding='utf-8'
+                formatter,
+                level=log_config.get('level', logging.INFO),
+                max_bytes=log_config.get('max_bytes', 10*1024*1024),
+                backup_count=log_config.get('backup_count', 5)
             )
-            file_handler.setLevel(log_config.get('level', logging.INFO))
-            file_handler.setFormatter(formatter)
-            
-            # 4. 創建隊列監聽器
-            listener = logging.handlers.QueueListener(
-                log_queue, 
-                file_handler,
-                respect_handler_level=True
-            )
-            
-            # 5. 啟動監聽器
-            listener.start()
-            
-            # 6. 保存引用
-            self.listeners.append(listener)
-            self.file_handlers.append(file_handler)
-            self.queue_handlers.append(queue_handler)
+            self.file_queue_handlers[log_name] = handler
             
             print(f"    ✅ {log_name} 處理器創建成功")
             return True
@@ -229,49 +304,51 @@ class CompleteLoggingExtension:
         """創建控制台處理器"""
         try:
             print("  🖥️ 配置控制台處理器...")
-            
-            # 1. 創建隊列
-            console_queue = queue.Queue()
-            
-            # 2. 創建隊列處理器
-            queue_handler = logging.handlers.QueueHandler(console_queue)
-            queue_handler.setLevel(logging.INFO)
-            
-            # 3. 創建控制台處理器
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            console_handler.setFormatter(formatter)
-            
-            # 4. 創建隊列監聽器
-            listener = logging.handlers.QueueListener(
-                console_queue, 
-                console_handler,
-                respect_handler_level=True
-            )
-            
-            # 5. 啟動監聽器
-            listener.start()
-            
-            # 6. 保存引用
-            self.listeners.append(listener)
-            self.queue_handlers.append(queue_handler)
-            
+            self.console_handler = self.sink.add_stream('console', formatter, level=logging.INFO)
             print("    ✅ 控制台處理器創建成功")
             
         except Exception as e:
             print(f"    ❌ 控制台處理器創建失敗: {e}")
     
-    def _setup_root_logger(self):
-        """設置根日誌記錄器"""
+    def _setup_root_logger(self, log_routes: Dict):
+        """設置根日誌記錄器：檔案處理器由分派器依名稱選擇，控制台接收所有記錄"""
         print("🌳 設置根日誌記錄器...")
         
         root_logger = logging.getLogger()
         
-        # 添加所有隊列處理器到根日誌記錄器
-        for queue_handler in self.queue_handlers:
-            root_logger.addHandler(queue_handler)
+        self.router = LogRouter(
+            self.file_queue_handlers,
+            log_routes.get('routes', {}),
+            log_routes.get('level_routes', ()),
+            log_routes.get('default', 'app')
+        )
+        root_logger.addHandler(self.router)
+        if self.console_handler is not None:
+            root_logger.addHandler(self.console_handler)
+        
+        # 結構化模式：在記錄產生時附加請求 ID 與使用者
+        if self.structured:
+            context_filter = RequestContextFilter()
+            for handler in root_logger.handlers:
+                handler.addFilter(context_filter)
         
-        print(f"✅ 根日誌記錄器設置完成，添加了 {len(self.queue_handlers)} 個處理器")
+        print(f"✅ 根日誌記錄器設置完成，分派 {len(self.file_queue_handlers)} 個日誌文件")
+    
+    def _setup_sampler(self, sampling_config: Dict):
+        """在根日誌記錄器的處理器上加入抽樣 / 去重過濾器"""
+        if not sampling_config.get('ENABLED', False):
+            return
+        
+        self.sampler = LogSampler(
+            sample_rates=sampling_config.get('SAMPLE_RATES', {}),
+            dedup_window=sampling_config.get('DEDUP_WINDOW', 60),
+            dedup_max_keys=sampling_config.get('DEDUP_MAX_KEYS', 10000),
+            always_log_level=sampling_config.get('ALWAYS_LOG_LEVEL', logging.ERROR)
+        )
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(self.sampler)
+        
+        print(f"✅ 日誌抽樣已啟用（去重視窗 {self.sampler.dedup_window} 秒）")
     
     def _verify_complete_setup(self):
         """驗證完整設置"""
@@ -283,12 +360,11 @@ class CompleteLoggingExtension:
         if len(root_logger.handlers) == 0:
             raise Exception("❌ 根日誌記錄器沒有處理器！")
         
-        if len(self.listeners) == 0:
-            raise Exception("❌ 沒有隊列監聽器！")
+        if self.sink is None or not self.sink.get_statistics()['running']:
+            raise Exception("❌ 日誌寫入執行緒未啟動！")
         
         print(f"✅ 根日誌記錄器: {len(root_logger.handlers)} 個處理器")
-        print(f"✅ 隊列監聽器: {len(self.listeners)} 個")
-        print(f"✅ 文件處理器: {len(self.file_handlers)} 個")
+        print(f"✅ 文件處理器: {len(self.file_queue_handlers)} 個")
         print("✅ 日誌系統驗證通過")
     
     def _test_all_loggers(self):
@@ -322,53 +398,50 @@ class CompleteLoggingExtension:
         print("🔄 所有測試消息已刷新")
     
     def flush_all_logs(self):
-        """強制刷新所有日誌"""
-        # 等待隊列處理
-        time.sleep(0.5)
-        
-        # 刷新所有文件處理器
-        for handler in self.file_handlers:
-            try:
-                handler.flush()
-            except:
-                pass
+        """強制刷新所有日誌（等待佇列中已有的記錄寫入磁碟）"""
+        if self.sampler is not None:
+            self.sampler.flush()
+        if self.sink is not None:
+            self.sink.flush()
     
     def get_statistics(self):
         """獲取統計信息"""
         return {
             'initialized': self._initialized,
-            'listeners': len(self.listeners),
-            'file_handlers': len(self.file_handlers),
-            'queue_handlers': len(self.queue_handlers),
+            'structured': self.structured,
+            'file_handlers': len(self.file_queue_handlers),
             'root_handlers': len(logging.getLogger().handlers),
-            'log_files_created': self.log_files_created
+            'log_files_created': self.log_files_created,
+            'routed': dict(self.router.routed) if self.router is not None else {},
+            'queue': self.sink.get_statistics() if self.sink is not None else None,
+            'sampling': self.sampler.get_statistics() if self.sampler is not None else None
         }
     
     def _cleanup(self):
         """清理資源"""
         print("🧹 正在清理完整日誌系統...")
         
-        # 停止所有監聽器
-        for i, listener in enumerate(self.listeners):
+        # 寫入尚未輸出的抑制摘要
+        if self.sampler is not None:
             try:
-                listener.stop()
-                print(f"  ✅ 停止監聽器 {i}")
-            except Exception as e:
-                print(f"  ❌ 停止監聽器 {i} 失敗: {e}")
+                self.sampler.flush(float('inf'))
+            except Exception:
+                pass
         
-        # 刷新並關閉所有文件處理器
-        for i, handler in enumerate(self.file_handlers):
+        # 停止寫入執行緒，寫完剩餘記錄並關閉檔案
+        if self.sink is not None:
             try:
-                handler.flush()
-                handler.close()
-                print(f"  ✅ 關閉文件處理器 {i}")
+                self.sink.shutdown()
+                print("  ✅ 日誌寫入執行緒已停止")
             except Exception as e:
-                print(f"  ❌ 關閉文件處理器 {i} 失敗: {e}")
+                print(f"  ❌ 停止日誌寫入執行緒失敗: {e}")
         
         # 清理引用
-        self.listeners.clear()
-        self.file_handlers.clear()
-        self.queue_handlers.clear()
+        self.sink = None
+        self.file_queue_handlers.clear()
+        self.console_handler = None
+        self.router = None
+        self.sampler = None
         self.log_files_created.clear()
         self._initialized = False
         
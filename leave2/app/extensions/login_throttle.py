@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+登入節流模組
+以（帳號, IP）為鍵在記憶體中記錄最近的失敗時間（環形緩衝區），
+超過門檻即暫時封鎖，封鎖期間的登入請求不會進行 AD 綁定也不會查詢資料庫
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class LoginThrottle:
+    """登入失敗的滑動視窗計數與封鎖"""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self.enabled = True
+        self.max_failures = 5
+        self.window = 900
+        self.lockout = 900
+        self.suspicious_threshold = 3
+        self.max_keys = 100000
+
+        # (帳號, IP) -> 最近失敗時間（最多保留 max_failures 筆，最舊的先被覆蓋）
+        self._failures: "OrderedDict[Tuple[str, str], Deque[float]]" = OrderedDict()
+        # (帳號, IP) -> 封鎖到期時間
+        self._blocked_until: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+        # 統計計數器
+        self.failures_recorded = 0
+        self.lockouts = 0
+        self.blocked_requests = 0
+        self.evictions = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式"""
+        self.app = app
+
+        app.config.setdefault('LOGIN_THROTTLE_CONFIG', {})
+        config = app.config['LOGIN_THROTTLE_CONFIG']
+        self.enabled = config.get('ENABLED', True)
+        self.max_failures = max(1, config.get('MAX_FAILURES', 5))
+        self.window = config.get('WINDOW', 900)
+        self.lockout = config.get('LOCKOUT', 900)
+        self.suspicious_threshold = config.get('SUSPICIOUS_THRESHOLD', 3)
+        self.max_keys = config.get('MAX_KEYS', 100000)
+
+        cleanup_interval = config.get('CLEANUP_INTERVAL', 300)
+        if self.enabled and cleanup_interval > 0:
+            from .background_tasks import background_tasks
+            background_tasks.schedule_periodic('login_throttle:cleanup', cleanup_interval, self.cleanup)
+
+        app.extensions['login_throttle'] = self
+        logger.info(f"登入節流初始化完成 (啟用: {self.enabled}，{self.window} 秒內失敗 {self.max_failures} 次封鎖 {self.lockout} 秒)")
+
+    @staticmethod
+    def _key(username: str, ip_address: Optional[str]) -> Tuple[str, str]:
+        """帳號不分大小寫（AD 帳號不分大小寫）"""
+        return (username or '').strip().lower(), ip_address or 'unknown'
+
+    def check(self, username: str, ip_address: Optional[str]) -> int:
+        """
+        檢查是否允許登入嘗試（於 AD 綁定之前呼叫）
+
+        Args:
+            username: 使用者帳號
+            ip_address: 客戶端 IP
+
+        Returns:
+            int: 仍需等待的秒數；0 表示允許
+        """
+        if not self.enabled:
+            return 0
+
+        key = self._key(username, ip_address)
+        with self._lock:
+            blocked_until = self._blocked_until.get(key)
+            if blocked_until is None:
+                return 0
+            remaining = blocked_until - time.monotonic()
+            if remaining <= 0:
+                del self._blocked_until[key]
+                return 0
+            self.blocked_requests += 1
+            return max(1, math.ceil(remaining))
+
+    def record_failure(self, username: str, ip_address: Optional[str]) -> Optional[bool]:
+        """
+        記錄一次認證失敗，視窗內失敗達 MAX_FAILURES 次時開始封鎖
+
+        Args:
+            username: 使用者帳號
+            ip_address: 客戶端 IP
+
+        Returns:
+            bool: 是否可疑（視窗內先前已失敗 SUSPICIOUS_THRESHOLD 次以上）；未啟用時返回 None
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(username, ip_address)
+        now = time.monotonic()
+        size = max(self.max_failures, self.suspicious_threshold)
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None or failures.maxlen != size:
+                failures = deque(failures or (), maxlen=size)
+                self._failures[key] = failures
+                if len(self._failures) > self.max_keys:
+                    self._failures.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._failures.move_to_end(key)
+
+            since = now - self.window
+            recent = sum(1 for failed_at in failures if failed_at > since)
+            failures.append(now)
+            self.failures_recorded += 1
+
+            # 環形緩衝區已滿且最舊的一筆仍在視窗內，表示視窗內已失敗 max_failures 次
+            if len(failures) >= self.max_failures and failures[-self.max_failures] > since:
+                self._blocked_until[key] = now + self.lockout
+                failures.clear()
+                self.lockouts += 1
+                logger.warning(f"帳號 {key[0]} 自 {key[1]} 登入失敗次數過多，封鎖 {self.lockout} 秒")
+
+            return recent >= self.suspicious_threshold
+
+    def record_success(self, username: str, ip_address: Optional[str]):
+        """登入成功時清除該鍵的失敗記錄"""
+        if not self.enabled:
+            return
+        key = self._key(username, ip_address)
+        with self._lock:
+            self._failures.pop(key, None)
+            self._blocked_until.pop(key, None)
+
+    def unblock(self, username: str, ip_address: Optional[str] = None) -> int:
+        """
+        解除封鎖（管理員操作）
+
+        Args:
+            username: 使用者帳號
+            ip_address: 客戶端 IP；未指定時解除該帳號所有 IP 的封鎖
+
+        Returns:
+            int: 解除的鍵數
+        """
+        name = self._key(username, ip_address)[0]
+        with self._lock:
+            keys = [key for key in set(self._blocked_until) | set(self._failures)
+                    if key[0] == name and (ip_address is None or key[1] == ip_address)]
+            for key in keys:
+                self._failures.pop(key, None)
+                self._blocked_until.pop(key, None)
+        return len(keys)
+
+    def cleanup(self) -> int:
+        """移除已過期的封鎖與視窗外的失敗記錄（週期性任務）"""
+        now = time.monotonic()
+        since = now - self.window
+        with self._lock:
+            expired_blocks = [key for key, until in self._blocked_until.items() if until <= now]
+            for key in expired_blocks:
+                del self._blocked_until[key]
+            stale = [key for key, failures in self._failures.items() if not failures or failures[-1] <= since]
+            for key in stale:
+                del self._failures[key]
+        return len(expired_blocks) + len(stale)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取登入節流統計信息"""
+        now = time.monotonic()
+        with self._lock:
+            blocked = sum(1 for until in self._blocked_until.values() if until > now)
+            tracked = len(self._failures)
+        return {
+            'enabled': self.enabled,
+            'max_failures': self.max_failures,
+            'window': self.window,
+            'lockout': self.lockout,
+            'tracked_keys': tracked,
+            'blocked_keys': blocked,
+            'failures_recorded': self.failures_recorded,
+            'lockouts': self.lockouts,
+            'blocked_requests': self.blocked_requests,
+            'evictions': self.evictions
+        }
+
+
+# 創建全局實例
+login_throttle = LoginThrottle()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+組織樹擴展模組
+定期以分頁 LDAP 查詢同步全部 AD 使用者，建立主管→下屬鄰接表與遞移閉包（跨級主管），
+並保存到資料庫，讓登入與下屬查詢直接讀取記憶體索引
+"""
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+# 使用者資訊 / 主管資訊 / 下屬資訊的欄位（與 ADAuthenticator 的輸出格式一致）
+USER_INFO_FIELDS = (
+    'sam_account', 'display_name', 'given_name', 'surname', 'cn', 'mail', 'upn',
+    'department', 'title', 'phone', 'mobile', 'employee_id', 'company', 'dn'
+)
+MANAGER_INFO_FIELDS = (
+    'sam_account', 'display_name', 'given_name', 'surname', 'mail',
+    'department', 'title', 'phone', 'mobile', 'dn'
+)
+SUBORDINATE_INFO_FIELDS = (
+    'sam_account', 'display_name', 'given_name', 'surname', 'mail',
+    'department', 'title', 'phone', 'mobile', 'employee_id', 'dn'
+)
+
+# LDAP 屬性 -> 使用者資訊欄位
+LDAP_ATTRIBUTE_MAP = {
+    'sAMAccountName': 'sam_account',
+    'displayName': 'display_name',
+    'givenName': 'given_name',
+    'sn': 'surname',
+    'cn': 'cn',
+    'mail': 'mail',
+    'userPrincipalName': 'upn',
+    'department': 'department',
+    'title': 'title',
+    'telephoneNumber': 'phone',
+    'mobile': 'mobile',
+    'employeeID': 'employee_id',
+    'company': 'company',
+    'distinguishedName': 'dn',
+    'manager': 'manager_dn'
+}
+
+
+class OrgTreeIndex:
+    """組織樹記憶體索引（建立後不再修改，同步時整份替換）"""
+
+    def __init__(self, users: Iterable[Dict[str, Any]], closure: Optional[Iterable[Tuple[str, str, int]]] = None):
+        """
+        建立索引
+
+        Args:
+            users: 使用者資訊字典（需含 sam_account、dn、manager_dn）
+            closure: (主管帳號, 下屬帳號, 層級) 列表，未提供時由主管關係計算
+        """
+        self.users: Dict[str, Dict[str, Any]] = {}
+        dn_index: Dict[str, str] = {}
+        for user in users:
+            sam = (user.get('sam_account') or '').lower()
+            if not sam:
+                continue
+            self.users[sam] = user
+            if user.get('dn'):
+                dn_index[user['dn'].lower()] = sam
+
+        # 鄰接表：主管 -> 直屬下屬
+        self.managers: Dict[str, str] = {}
+        self.reports: Dict[str, List[str]] = {}
+        for sam, user in self.users.items():
+            manager_sam = dn_index.get((user.get('manager_dn') or '').lower())
+            if manager_sam and manager_sam != sam:
+                user['manager_sam'] = self.users[manager_sam]['sam_account']
+                self.managers[sam] = manager_sam
+                self.reports.setdefault(manager_sam, []).append(sam)
+            else:
+                user['manager_sam'] = None
+
+        for report_list in self.reports.values():
+            report_list.sort(key=lambda sam: self.users[sam].get('display_name') or sam)
+
+        # 遞移閉包：主管 -> [(下屬, 層級)]
+        self.descendants: Dict[str, List[Tuple[str, int]]] = {}
+        if closure is None:
+            closure = self._compute_closure()
+        for ancestor, descendant, depth in closure:
+            ancestor, descendant = ancestor.lower(), descendant.lower()
+            if ancestor in self.users and descendant in self.users:
+                self.descendants.setdefault(ancestor, []).append((descendant, depth))
+        for descendant_list in self.descendants.values():
+            descendant_list.sort(key=lambda item: item[1])
+
+    def _compute_closure(self) -> List[Tuple[str, str, int]]:
+        """沿主管鏈向上走，產生每位使用者的所有上級（遇到循環時停止）"""
+        closure = []
+        for sam in self.users:
+            visited = {sam}
+            depth = 1
+            ancestor = self.managers.get(sam)
+            while ancestor is not None and ancestor not in visited:
+                closure.append((ancestor, sam, depth))
+                visited.add(ancestor)
+                depth += 1
+                ancestor = self.managers.get(ancestor)
+        return closure
+
+    def closure_rows(self) -> List[Tuple[str, str, int]]:
+        """閉包列（使用原始大小寫的帳號，供保存到資料庫）"""
+        return [
+            (self.users[ancestor]['sam_account'], self.users[descendant]['sam_account'], depth)
+            for ancestor, descendant_list in self.descendants.items()
+            for descendant, depth in descendant_list
+        ]
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+
+class OrgTree:
+    """組織樹同步與查詢服務"""
+
+    DEFAULT_SEARCH_FILTER = '(&(objectCategory=person)(objectClass=user)(!(userAccountControl:1.2.840.113556.1.4.803:=2)))'
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self.enabled = True
+        self.config: Dict[str, Any] = {}
+        self.org_db = None
+        self.domain: Optional[str] = None
+        self._index: Optional[OrgTreeIndex] = None
+
+        # 統計計數器
+        self.source: Optional[str] = None
+        self.synced_at: Optional[datetime] = None
+        self.sync_count = 0
+        self.sync_errors = 0
+        self.last_sync_duration = 0.0
+        self.last_error: Optional[str] = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式並排程定期同步"""
+        self.app = app
+
+        app.config.setdefault('ORG_TREE_CONFIG', {})
+        self.config = app.config['ORG_TREE_CONFIG']
+        self.enabled = self.config.get('ENABLED', True)
+        self.domain = app.config.get('AD_CONFIG', {}).get('DEFAULT_DOMAIN')
+
+        if self.enabled and self.config.get('PERSIST', True):
+            db_manager = app.extensions.get('database_manager')
+            if db_manager is not None:
+                try:
+                    from app.models.org_models import OrgTreeDatabaseManager
+                    self.org_db = OrgTreeDatabaseManager(db_manager)
+                    self.org_db.create_tables()
+                except Exception as e:
+                    self.org_db = None
+                    logger.warning(f"組織樹資料庫不可用，僅使用記憶體索引: {str(e)}")
+
+        if self.enabled:
+            from .background_tasks import background_tasks
+            background_tasks.schedule_periodic(
+                'org_tree:sync', self.config.get('SYNC_INTERVAL', 3600), self.sync, run_immediately=True
+            )
+
+        app.extensions['org_tree'] = self
+        logger.info(f"組織樹初始化完成 (啟用: {self.enabled}, 資料庫: {self.org_db is not None})")
+
+    @property
+    def is_ready(self) -> bool:
+        """索引是否已載入"""
+        return self._index is not None
+
+    def covers(self, domain: Optional[str]) -> bool:
+        """索引是否涵蓋指定網域（只同步預設網域）"""
+        return self.is_ready and bool(domain) and bool(self.domain) and domain.lower() == self.domain.lower()
+
+    # ------------------------------------------------------------------
+    # 同步
+    # ------------------------------------------------------------------
+
+    def sync(self) -> int:
+        """
+        從 AD 同步組織樹（由背景任務定期執行）
+
+        首次執行時先載入資料庫快照，讓索引在 LDAP 同步完成前即可使用
+
+        Returns:
+            int: 同步的使用者數
+        """
+        if self._index is None and self.org_db is not None:
+            self._load_from_database()
+
+        start_time = time.time()
+        try:
+            users = self._fetch_users()
+            if users is None:
+                return 0
+            index = OrgTreeIndex(users)
+        except Exception as e:
+            self.sync_errors += 1
+            self.last_error = str(e)
+            logger.error(f"組織樹同步失敗: {str(e)}")
+            return 0
+
+        self._index = index
+        self.source = 'ldap'
+        self.synced_at = datetime.utcnow()
+        self.sync_count += 1
+        self.last_sync_duration = time.time() - start_time
+        self.last_error = None
+
+        if self.org_db is not None:
+            try:
+                self.org_db.replace_snapshot(list(index.users.values()), index.closure_rows())
+            except Exception as e:
+                self.sync_errors += 1
+                self.last_error = str(e)
+                logger.error(f"保存組織樹快照失敗: {str(e)}")
+
+        logger.info(f"組織樹同步完成: {len(index)} 位使用者，耗時 {self.last_sync_duration:.2f} 秒")
+        return len(index)
+
+    def _load_from_database(self):
+        """載入資料庫中的組織樹快照"""
+        try:
+            users, closure = self.org_db.load_snapshot()
+        except Exception as e:
+            logger.warning(f"載入組織樹快照失敗: {str(e)}")
+            return
+        if users:
+            self._index = OrgTreeIndex(users, closure)
+            self.source = 'database'
+            logger.info(f"已從資料庫載入組織樹快照: {len(users)} 位使用者")
+
+    def _fetch_users(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        以分頁查詢取回所有使用者（需 LDAP 服務帳號）
+
+        Returns:
+            list: 使用者資訊字典；未設置服務帳號時返回 None
+        """
+        from .ad_authenticator import LDAP_AVAILABLE, ad_auth
+        if not LDAP_AVAILABLE:
+            return None
+
+        ad_config = self.app.config.get('AD_CONFIG', {})
+        authenticator = ad_auth.get_authenticator(
+            ad_config.get('DEFAULT_AD_SERVER'),
+            ad_config.get('DEFAULT_DOMAIN'),
+            ad_config.get('DEFAULT_ORGANIZATION')
+        )
+        pool = authenticator._get_pool()
+        if not pool.has_service_account:
+            logger.debug("未設置 LDAP 服務帳號，略過組織樹同步")
+            return None
+
+        search_base = self.config.get('SEARCH_BASE') or authenticator._get_base_dn_options()[0]
+        users = []
+        with pool.connection() as conn:
+            for item in conn.extend.standard.paged_search(
+                search_base=search_base,
+                search_filter=self.config.get('SEARCH_FILTER') or self.DEFAULT_SEARCH_FILTER,
+                search_scope='SUBTREE',
+                attributes=list(LDAP_ATTRIBUTE_MAP),
+                paged_size=self.config.get('PAGE_SIZE', 500),
+                generator=True
+            ):
+                if item.get('type') != 'searchResEntry':
+                    continue
+                user = self._convert_entry(item)
+                if user['sam_account']:
+                    users.append(user)
+        return users
+
+    @staticmethod
+    def _convert_entry(item: Dict[str, Any]) -> Dict[str, Any]:
+        """將分頁查詢結果轉換為使用者資訊字典"""
+        attributes = item.get('attributes', {})
+        user = {}
+        for attribute, field in LDAP_ATTRIBUTE_MAP.items():
+            value = attributes.get(attribute)
+            if isinstance(value, (list, tuple)):
+                value = value[0] if value else ''
+            user[field] = str(value or '')
+        user['dn'] = user['dn'] or item.get('dn', '')
+        return user
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pick(user: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, str]:
+        return {field: user.get(field) or '' for field in fields}
+
+    def get_user(self, username: str) -> Optional[Dict[str, str]]:
+        """獲取使用者資訊"""
+        index = self._index
+        if index is None:
+            return None
+        user = index.users.get(username.lower())
+        return self._pick(user, USER_INFO_FIELDS) if user else None
+
+    def get_manager(self, username: str) -> Optional[Dict[str, str]]:
+        """獲取直屬主管資訊（含上級主管名稱）"""
+        index = self._index
+        if index is None:
+            return None
+        manager_sam = index.managers.get(username.lower())
+        if manager_sam is None:
+            return None
+
+        manager = index.users[manager_sam]
+        manager_info = self._pick(manager, MANAGER_INFO_FIELDS)
+        upper_manager_dn = manager.get('manager_dn')
+        if upper_manager_dn:
+            manager_info['upper_manager_dn'] = upper_manager_dn
+            manager_info['upper_manager_name'] = upper_manager_dn.split(',')[0].replace('CN=', '')
+        return manager_info
+
+    def get_direct_reports(self, username: str) -> List[Dict[str, str]]:
+        """獲取直屬下屬"""
+        index = self._index
+        if index is None:
+            return []
+        return [self._pick(index.users[sam], SUBORDINATE_INFO_FIELDS)
+                for sam in index.reports.get(username.lower(), [])]
+
+    def get_subordinates(self, username: str, max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        獲取所有下屬（含跨級），依層級排序
+
+        Args:
+            username: 主管帳號
+            max_depth: 最大層級，None 表示不限
+
+        Returns:
+            list: 下屬資訊（含 depth 與 manager_sam）
+        """
+        index = self._index
+        if index is None:
+            return []
+        subordinates = []
+        for sam, depth in index.descendants.get(username.lower(), []):
+            if max_depth is not None and depth > max_depth:
+                break
+            user = index.users[sam]
+            info = self._pick(user, SUBORDINATE_INFO_FIELDS)
+            info['depth'] = depth
+            info['manager_sam'] = user.get('manager_sam') or ''
+            subordinates.append(info)
+        return subordinates
+
+    def is_subordinate(self, manager: str, employee: str) -> bool:
+        """判斷 employee 是否為 manager 的（直屬或跨級）下屬"""
+        index = self._index
+        if index is None:
+            return False
+        employee = employee.lower()
+        return any(sam == employee for sam, _ in index.descendants.get(manager.lower(), []))
+
+    def get_org_info(self, username: str, get_manager_info: bool = True,
+                     get_subordinates: bool = True) -> Optional[Tuple[Dict, Optional[Dict], List[Dict], Dict[str, float]]]:
+        """
+        以 ADAuthenticator 相同格式返回使用者、主管與直屬下屬
+
+        Returns:
+            tuple: (使用者資訊, 管理人員資訊, 下屬員工清單, 時間統計)；索引未就緒或查無使用者時返回 None
+        """
+        user_info = self.get_user(username)
+        if user_info is None:
+            return None
+
+        timing = {
+            'user_search': 0,
+            'manager_search': 0,
+            'subordinates_search': 0
+        }
+        manager_info = self.get_manager(username) if get_manager_info else None
+        subordinates = self.get_direct_reports(username) if get_subordinates else []
+        return user_info, manager_info, subordinates, timing
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取組織樹統計信息"""
+        index = self._index
+        return {
+            'enabled': self.enabled,
+            'ready': index is not None,
+            'domain': self.domain,
+            'source': self.source,
+            'users': len(index) if index is not None else 0,
+            'managers': len(index.reports) if index is not None else 0,
+            'closure_rows': sum(len(items) for items in index.descendants.values()) if index is not None else 0,
+            'persisted': self.org_db is not None,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None,
+            'sync_count': self.sync_count,
+            'sync_errors': self.sync_errors,
+            'last_sync_duration': round(self.last_sync_duration, 2),
+            'last_error': self.last_error
+        }
+
+
+# 創建全局實例
+org_tree = OrgTree()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+參考資料快取擴展模組
+將變動極少的查詢表（如假別清單）載入行程記憶體，定期或手動刷新，並提供 ETag
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask
+
+from app.extensions import get_logger
+from app.utils.http_cache import compute_etag
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class ReferenceDataEntry:
+    """單一參考資料集的快取內容"""
+
+    def __init__(self, name: str, data: Any):
+        self.name = name
+        self.data = data
+        self.etag = compute_etag(name, data)
+        self.loaded_at = datetime.utcnow().replace(microsecond=0)
+        self.loaded_monotonic = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'etag': self.etag,
+            'loaded_at': self.loaded_at.isoformat(),
+            'size': len(self.data) if hasattr(self.data, '__len__') else None
+        }
+
+
+class ReferenceDataCache:
+    """參考資料快取管理器"""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._intervals: Dict[str, float] = {}
+        self._entries: Dict[str, ReferenceDataEntry] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式"""
+        self.app = app
+
+        app.config.setdefault('REFERENCE_DATA_CONFIG', {})
+        config = app.config['REFERENCE_DATA_CONFIG']
+        self.default_interval = config.get('REFRESH_INTERVAL', 3600)
+
+        # 已在 init_app 前註冊的資料集，補上週期性刷新
+        for name in list(self._loaders):
+            self._schedule_refresh(name)
+
+        app.extensions['reference_data'] = self
+        logger.info("參考資料快取初始化完成")
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 refresh_interval: Optional[float] = None) -> None:
+        """
+        註冊參考資料集
+
+        Args:
+            name: 資料集名稱
+            loader: 載入函數（在應用上下文中執行，返回可 JSON 序列化的資料）
+            refresh_interval: 刷新間隔（秒），未指定時使用 REFERENCE_DATA_CONFIG 的預設值
+        """
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._stats.setdefault(name, {'loads': 0, 'load_errors': 0, 'hits': 0})
+            if refresh_interval is not None:
+                self._intervals[name] = refresh_interval
+
+        if self.app is not None:
+            self._schedule_refresh(name)
+
+    def _schedule_refresh(self, name: str):
+        """為資料集註冊週期性刷新任務"""
+        from .background_tasks import background_tasks
+
+        interval = self._intervals.get(name, self.default_interval)
+        if interval and interval > 0:
+            background_tasks.schedule_periodic(
+                f'reference_data:{name}', interval, lambda: self.refresh(name)
+            )
+
+    def get(self, name: str) -> ReferenceDataEntry:
+        """
+        獲取參考資料（首次存取時載入）
+
+        Args:
+            name: 資料集名稱
+
+        Returns:
+            ReferenceDataEntry: 快取內容
+        """
+        entry = self._entries.get(name)
+        if entry is not None:
+            self._stats[name]['hits'] += 1
+            return entry
+
+        if name not in self._loaders:
+            raise KeyError(f"參考資料 '{name}' 未註冊")
+
+        # 同一資料集只允許一個執行緒載入
+        with self._locks[name]:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._load(name)
+        return entry
+
+    def _load(self, name: str) -> ReferenceDataEntry:
+        """執行載入函數並更新快取"""
+        try:
+            data = self._loaders[name]()
+        except Exception:
+            self._stats[name]['load_errors'] += 1
+            raise
+
+        entry = ReferenceDataEntry(name, data)
+        previous = self._entries.get(name)
+        # 內容未變時保留原本的載入時間，讓 Last-Modified 穩定
+        if previous is not None and previous.etag == entry.etag:
+            entry = previous
+        self._entries[name] = entry
+        self._stats[name]['loads'] += 1
+        return entry
+
+    def refresh(self, name: Optional[str] = None) -> List[str]:
+        """
+        重新載入參考資料（載入失敗時保留舊資料）
+
+        Args:
+            name: 資料集名稱，未指定時刷新全部
+
+        Returns:
+            list: 成功刷新的資料集名稱
+        """
+        names = [name] if name else list(self._loaders)
+        refreshed = []
+        for item in names:
+            if item not in self._loaders:
+                raise KeyError(f"參考資料 '{item}' 未註冊")
+            try:
+                with self._locks[item]:
+                    self._load(item)
+                refreshed.append(item)
+            except Exception as e:
+                logger.error(f"刷新參考資料 '{item}' 失敗: {str(e)}")
+        if refreshed:
+            logger.info(f"已刷新參考資料: {', '.join(refreshed)}")
+        return refreshed
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """清除快取內容，下次存取時重新載入"""
+        if name:
+            self._entries.pop(name, None)
+        else:
+            self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取參考資料快取統計信息"""
+        return {
+            name: {
+                **self._stats.get(name, {}),
+                'refresh_interval': self._intervals.get(name, getattr(self, 'default_interval', None)),
+                'entry': self._entries[name].to_dict() if name in self._entries else None
+            }
+            for name in self._loaders
+        }
+
+
+# 創建全局實例
+reference_data = ReferenceDataCache()
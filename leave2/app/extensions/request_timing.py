@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+請求計時模組
+在 g 上累計本次請求各階段的耗時（資料庫會話、LDAP、JWT 驗證、序列化），
+作為 Response 日誌的 timings 欄位；Server-Timing 標頭會向客戶端揭露內部耗時，僅在設定啟用時輸出
+"""
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from flask import Flask, g, has_request_context
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class RequestTiming:
+    """請求範圍的計時（g.request_timings: 名稱 -> [累計秒數, 次數]）"""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self.enabled = False
+        self.server_timing_header = False
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式"""
+        self.app = app
+
+        app.config.setdefault('REQUEST_TIMING_CONFIG', {})
+        config = app.config['REQUEST_TIMING_CONFIG']
+        self.enabled = config.get('ENABLED', True)
+        self.server_timing_header = config.get('SERVER_TIMING_HEADER', False)
+
+        if self.enabled and self.server_timing_header:
+            app.after_request(self._add_server_timing)
+
+        app.extensions['request_timing'] = self
+        logger.info("請求計時初始化完成 (啟用: %s，Server-Timing 標頭: %s)", self.enabled, self.server_timing_header)
+
+    def record(self, name: str, seconds: float):
+        """累計一段耗時（不在請求中或未啟用時忽略）"""
+        if not self.enabled or not has_request_context():
+            return
+        timings = g.get('request_timings')
+        if timings is None:
+            timings = g.request_timings = {}
+        entry = timings.get(name)
+        if entry is None:
+            timings[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def record_many(self, timing: Optional[Mapping[str, float]], prefix: str):
+        """
+        累計一組已量測的耗時（例如 ADAuthenticator 返回的 timing）
+
+        Args:
+            timing: 階段名稱 -> 秒數；'total' 記錄為 prefix 本身
+            prefix: 名稱前綴（例如 'ldap'）
+        """
+        for key, seconds in (timing or {}).items():
+            if seconds:
+                self.record(prefix if key == 'total' else f"{prefix}_{key}", seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """量測區塊耗時"""
+        if not self.enabled or not has_request_context():
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable:
+        """量測函數耗時的裝飾器"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or not has_request_context():
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        本次請求的耗時摘要（毫秒），供結構化日誌使用
+
+        Returns:
+            Dict: 名稱 -> 毫秒數（多次時為 {'ms': 毫秒數, 'count': 次數}）
+        """
+        if not has_request_context():
+            return {}
+        result = {}
+        for name, (seconds, count) in (g.get('request_timings') or {}).items():
+            ms = round(seconds * 1000, 2)
+            result[name] = ms if count == 1 else {'ms': ms, 'count': count}
+        return result
+
+    def header_value(self) -> str:
+        """組合 Server-Timing 標頭值（含自請求開始的 total）"""
+        parts = []
+        for name, (seconds, count) in (g.get('request_timings') or {}).items():
+            part = f"{name};dur={seconds * 1000:.2f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        request_start = g.get('request_start')
+        if request_start is not None:
+            parts.append(f"total;dur={(time.perf_counter() - request_start) * 1000:.2f}")
+        return ', '.join(parts)
+
+    def _add_server_timing(self, response):
+        """after_request：寫入 Server-Timing 標頭"""
+        value = self.header_value()
+        if value:
+            response.headers['Server-Timing'] = value
+        return response
+
+
+# 創建全局實例
+request_timing = RequestTiming()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+會話活動緩衝模組
+在記憶體中累積會話最後訪問時間，定期以單次批量 UPDATE 寫回資料庫，避免每個請求都寫入
+"""
+import atexit
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class SessionActivityBuffer:
+    """會話最後訪問時間的寫入緩衝"""
+
+    def __init__(self, jwt_db=None):
+        """
+        初始化會話活動緩衝
+
+        Args:
+            jwt_db: JWTDatabaseManager 實例
+        """
+        self.jwt_db = jwt_db
+        self._pending: Dict[str, datetime] = {}   # access token hash -> 最後訪問時間（UTC）
+        self._recorded: Dict[str, datetime] = {}  # access token hash -> 最近一次記錄的時間
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self.flush_interval = 30
+        self.precision = timedelta(seconds=60)
+
+        # 統計計數器
+        self.touches = 0
+        self.coalesced = 0
+        self.flush_count = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+        self.last_flush_at: Optional[datetime] = None
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式並排程定期寫回"""
+        app.config.setdefault('SESSION_ACTIVITY_CONFIG', {})
+        config = app.config['SESSION_ACTIVITY_CONFIG']
+        self.flush_interval = config.get('FLUSH_INTERVAL', 30)
+        self.precision = timedelta(seconds=config.get('PRECISION', 60))
+
+        from .background_tasks import background_tasks
+        background_tasks.schedule_periodic('session_activity:flush', self.flush_interval, self.flush)
+
+        # 關閉時寫回剩餘的訪問時間
+        atexit.register(self.flush)
+        logger.info(f"會話活動緩衝初始化完成，寫回間隔 {self.flush_interval} 秒，"
+                    f"精度 {int(self.precision.total_seconds())} 秒")
+
+    def touch(self, token_hash: str, accessed_at: Optional[datetime] = None):
+        """
+        記錄會話訪問（僅更新記憶體）
+
+        同一會話在精度範圍內的多次訪問只記錄一次
+
+        Args:
+            token_hash: access token 的 SHA256 hash
+            accessed_at: 訪問時間（UTC），預設為現在
+        """
+        accessed_at = accessed_at or datetime.utcnow()
+        with self._lock:
+            self.touches += 1
+            recorded = self._recorded.get(token_hash)
+            if recorded is not None and accessed_at - recorded < self.precision:
+                self.coalesced += 1
+                return
+            self._recorded[token_hash] = accessed_at
+            self._pending[token_hash] = accessed_at
+
+    def flush(self) -> int:
+        """
+        將累積的訪問時間以單次批量 UPDATE 寫回資料庫
+
+        Returns:
+            int: 寫回的會話數
+        """
+        if self.jwt_db is None:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                # 清理超過精度範圍的記錄，避免字典無限成長
+                cutoff = datetime.utcnow() - self.precision
+                self._recorded = {key: value for key, value in self._recorded.items() if value >= cutoff}
+
+            if not pending:
+                return 0
+
+            try:
+                self.jwt_db.bulk_update_session_access_times(pending)
+            except Exception as e:
+                # 寫回失敗時放回緩衝，下次再試（保留較新的時間）
+                with self._lock:
+                    for key, value in pending.items():
+                        current = self._pending.get(key)
+                        if current is None or current < value:
+                            self._pending[key] = value
+                self.flush_errors += 1
+                logger.error(f"寫回會話訪問時間失敗: {str(e)}")
+                return 0
+
+            self.flush_count += 1
+            self.flushed_rows += len(pending)
+            self.last_flush_at = datetime.utcnow()
+            logger.debug("已寫回 %d 個會話的訪問時間", len(pending))
+            return len(pending)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取會話活動緩衝統計信息"""
+        return {
+            'pending': len(self._pending),
+            'flush_interval': self.flush_interval,
+            'precision': int(self.precision.total_seconds()),
+            'touches': self.touches,
+            'coalesced': self.coalesced,
+            'flush_count': self.flush_count,
+            'flushed_rows': self.flushed_rows,
+            'flush_errors': self.flush_errors,
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None
+        }
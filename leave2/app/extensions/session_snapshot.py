@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+會話快照模組
+登入時保存使用者資料、主管與下屬清單，供 /user 端點直接讀取；
+快照過舊時先返回現有資料並於背景刷新，不需重新向 AD 認證
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from flask import Flask
+
+from app.extensions import get_logger
+from app.utils.cache_utils import LRUTTLCache
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class SessionSnapshotStore:
+    """以 JWT 會話 ID 為鍵的使用者資料快照"""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.app = None
+        self.enabled = True
+        self.refresh_after = 900
+        self._cache = LRUTTLCache(max_size=5000, ttl=86400, name='session_snapshot')
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+
+        # 統計計數器
+        self.captures = 0
+        self.enrichments = 0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式"""
+        self.app = app
+
+        app.config.setdefault('SESSION_SNAPSHOT_CONFIG', {})
+        config = app.config['SESSION_SNAPSHOT_CONFIG']
+        self.enabled = config.get('ENABLED', True)
+        self.refresh_after = config.get('REFRESH_AFTER', 900)
+
+        ttl = config.get('TTL')
+        if ttl is None:
+            # 快照存活到 refresh token 過期為止
+            refresh_expires = app.config.get('JWT_REFRESH_TOKEN_EXPIRES', 86400)
+            ttl = refresh_expires.total_seconds() if hasattr(refresh_expires, 'total_seconds') else refresh_expires
+        self._cache = LRUTTLCache(max_size=config.get('MAX_SIZE', 5000), ttl=ttl, name='session_snapshot')
+
+        app.extensions['session_snapshots'] = self
+        logger.info(f"會話快照初始化完成 (啟用: {self.enabled})")
+
+    def capture(self, session_id: str, user_info: Dict[str, Any],
+                auth_info: Optional[Dict[str, Any]] = None, enrich: bool = False) -> Dict[str, Any]:
+        """
+        保存會話快照（登入成功時呼叫）
+
+        Args:
+            session_id: JWT payload 中的會話 ID
+            user_info: JWTUtils.extract_user_info_from_ad_result 的輸出
+            auth_info: 認證資訊（server、domain）
+            enrich: 主管與下屬尚未取得，於背景補齊（狀態為 pending，完成後為 complete）
+
+        Returns:
+            dict: 快照
+        """
+        auth_info = auth_info or {}
+        snapshot = {
+            'user_info': user_info,
+            'server': auth_info.get('server'),
+            'domain': auth_info.get('domain'),
+            'status': 'pending' if enrich else 'complete',
+            'captured_at': datetime.utcnow().isoformat(),
+            'refreshed_at': time.monotonic()
+        }
+        if self.enabled and session_id:
+            self._cache.set(session_id, snapshot)
+            self.captures += 1
+            if enrich:
+                self.enrichments += 1
+                self._schedule_refresh(session_id, snapshot)
+        return snapshot
+
+    def get(self, session_id: str, username: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        獲取會話快照
+
+        快照超過 REFRESH_AFTER 秒時返回現有資料並排程背景刷新；
+        找不到快照（例如服務重啟）時，依 username 從目錄快取 / 組織樹 / 服務帳號重建
+
+        Args:
+            session_id: JWT payload 中的會話 ID
+            username: 使用者帳號（重建快照用）
+
+        Returns:
+            dict: 快照；無法取得時返回 None
+        """
+        if not self.enabled or not session_id:
+            return None
+
+        snapshot = self._cache.get(session_id)
+        if snapshot is None:
+            if not username:
+                return None
+            snapshot = self._build(username)
+            if snapshot is not None:
+                self._cache.set(session_id, snapshot)
+                self.rebuilds += 1
+            return snapshot
+
+        if time.monotonic() - snapshot['refreshed_at'] > self.refresh_after:
+            self._schedule_refresh(session_id, snapshot)
+        return snapshot
+
+    def discard(self, session_id: str) -> bool:
+        """移除會話快照（登出時呼叫）"""
+        return self._cache.invalidate(session_id)
+
+    def _schedule_refresh(self, session_id: str, snapshot: Dict[str, Any]):
+        """排程背景刷新（同一會話同時只刷新一次）"""
+        with self._lock:
+            if session_id in self._refreshing:
+                return
+            self._refreshing.add(session_id)
+
+        from .background_tasks import background_tasks
+        username = snapshot['user_info'].get('sam_account') or snapshot['user_info'].get('username')
+        background_tasks.submit(self._refresh, session_id, username, snapshot)
+
+    def _refresh(self, session_id: str, username: str, snapshot: Dict[str, Any]):
+        """背景刷新會話快照"""
+        try:
+            refreshed = self._build(username, snapshot.get('server'), snapshot.get('domain'))
+            if refreshed is None:
+                # 無法取得新資料時延後下次刷新，避免每個請求都重試
+                self._mark_failed(snapshot)
+                return
+            refreshed['captured_at'] = snapshot['captured_at']
+            if self._cache.get(session_id) is not None:
+                self._cache.set(session_id, refreshed)
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_errors += 1
+            self._mark_failed(snapshot)
+            logger.error(f"刷新會話快照失敗: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(session_id)
+
+    @staticmethod
+    def _mark_failed(snapshot: Dict[str, Any]):
+        """刷新失敗：保留現有資料，補齊中的快照標記為 failed"""
+        snapshot['refreshed_at'] = time.monotonic()
+        if snapshot.get('status') == 'pending':
+            snapshot['status'] = 'failed'
+
+    def _build(self, username: str, server: Optional[str] = None,
+               domain: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """不需使用者密碼重建快照（目錄快取 → 組織樹 → 服務帳號查詢）"""
+        if not username or self.app is None:
+            return None
+
+        from .ad_authenticator import ad_auth
+        from .jwt_utils import JWTUtils
+
+        ad_config = self.app.config.get('AD_CONFIG', {})
+        server = server or ad_config.get('DEFAULT_AD_SERVER')
+        domain = domain or ad_config.get('DEFAULT_DOMAIN')
+        authenticator = ad_auth.get_authenticator(server, domain, ad_config.get('DEFAULT_ORGANIZATION'))
+
+        org_info = authenticator.lookup_org_info(username)
+        if org_info is None or org_info[0] is None:
+            return None
+
+        user, manager, subordinates, _ = org_info
+        user_info = JWTUtils.extract_user_info_from_ad_result({
+            'success': True,
+            'data': {'user': user, 'manager': manager, 'subordinates': subordinates}
+        })
+        return {
+            'user_info': user_info,
+            'server': server,
+            'domain': domain,
+            'status': 'complete',
+            'captured_at': datetime.utcnow().isoformat(),
+            'refreshed_at': time.monotonic()
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取會話快照統計信息"""
+        return {
+            'enabled': self.enabled,
+            'refresh_after': self.refresh_after,
+            'refreshing': len(self._refreshing),
+            'captures': self.captures,
+            'enrichments': self.enrichments,
+            'rebuilds': self.rebuilds,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            **self._cache.get_stats()
+        }
+
+
+# 創建全局實例
+session_snapshots = SessionSnapshotStore()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Token 撤銷快取模組
+在行程內保存黑名單 Token 的 SHA256 hash，以增量同步保持最新，讓受保護請求免於每次查詢資料庫
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import Flask
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class TokenRevocationCache:
+    """黑名單 Token 的行程內快取"""
+
+    def __init__(self, jwt_db=None):
+        """
+        初始化撤銷快取
+
+        Args:
+            jwt_db: JWTDatabaseManager 實例
+        """
+        self.jwt_db = jwt_db
+        self._revoked: Dict[str, float] = {}  # token hash -> 過期時間（epoch 秒）
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._last_sync_started: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+
+        self.sync_interval = 30
+        self.max_staleness = 120
+
+        # 統計計數器
+        self.hits = 0
+        self.fallbacks = 0
+        self.sync_count = 0
+        self.sync_errors = 0
+
+    def init_app(self, app: Flask):
+        """初始化 Flask 應用程式並排程增量同步"""
+        app.config.setdefault('JWT_REVOCATION_CACHE', {})
+        config = app.config['JWT_REVOCATION_CACHE']
+        self.sync_interval = config.get('SYNC_INTERVAL', 30)
+        self.max_staleness = config.get('MAX_STALENESS', self.sync_interval * 4)
+
+        from .background_tasks import background_tasks
+        background_tasks.schedule_periodic(
+            'token_revocation:sync', self.sync_interval, self.sync, run_immediately=True
+        )
+        logger.info(f"Token 撤銷快取初始化完成，同步間隔 {self.sync_interval} 秒")
+
+    @property
+    def is_ready(self) -> bool:
+        """快取是否已完成同步且未過期（否則呼叫端應回退查詢資料庫）"""
+        return self._synced_at is not None and \
+            time.monotonic() - self._synced_at <= self.max_staleness
+
+    def is_revoked(self, token_hash: str) -> Optional[bool]:
+        """
+        檢查 Token 是否已撤銷
+
+        Args:
+            token_hash: Token 的 SHA256 hash
+
+        Returns:
+            bool: 是否已撤銷；快取尚未就緒時返回 None
+        """
+        if not self.is_ready:
+            self.fallbacks += 1
+            return None
+
+        self.hits += 1
+        expires_at = self._revoked.get(token_hash)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, token_hash: str, expires_at: float):
+        """
+        將 Token 加入撤銷快取（本行程撤銷時立即生效，不等待同步）
+
+        Args:
+            token_hash: Token 的 SHA256 hash
+            expires_at: Token 過期時間（epoch 秒）
+        """
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._revoked[token_hash] = expires_at
+
+    def sync(self) -> int:
+        """
+        從資料庫增量同步黑名單
+
+        以 id 遞增讀取新記錄，並重疊讀取上次同步前後寫入的記錄，避免並行交易延遲提交而遺漏
+
+        Returns:
+            int: 本次同步讀取的記錄數
+        """
+        if self.jwt_db is None:
+            return 0
+
+        started = datetime.utcnow()
+        since = None
+        if self._last_sync_started is not None:
+            since = self._last_sync_started - timedelta(seconds=self.sync_interval)
+
+        try:
+            entries = self.jwt_db.get_blacklist_entries(after_id=self._last_id, since=since)
+        except Exception as e:
+            self.sync_errors += 1
+            logger.error(f"同步 Token 黑名單失敗: {str(e)}")
+            return 0
+
+        now = time.time()
+        with self._lock:
+            for entry in entries:
+                expires_at = entry['expires_at'].timestamp()
+                if expires_at > now:
+                    self._revoked[entry['token_hash']] = expires_at
+                self._last_id = max(self._last_id, entry['id'])
+
+            # 移除已過期的項目，過期 Token 本身就無法通過驗證
+            expired = [key for key, value in self._revoked.items() if value <= now]
+            for key in expired:
+                del self._revoked[key]
+
+        self._last_sync_started = started
+        self._synced_at = time.monotonic()
+        self.sync_count += 1
+        if entries:
+            logger.debug("同步了 %d 筆 Token 黑名單記錄", len(entries))
+        return len(entries)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """獲取撤銷快取統計信息"""
+        return {
+            'ready': self.is_ready,
+            'size': len(self._revoked),
+            'last_id': self._last_id,
+            'sync_interval': self.sync_interval,
+            'seconds_since_sync': round(time.monotonic() - self._synced_at, 1)
+            if self._synced_at is not None else None,
+            'hits': self.hits,
+            'fallbacks': self.fallbacks,
+            'sync_count': self.sync_count,
+            'sync_errors': self.sync_errors
+        }
@@ -4,10 +4,11 @@
 JWT 相關的資料庫模型
 包含用戶會話、Token 黑名單、登入記錄等功能
 """
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, Index
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, Index, or_, update, bindparam, insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta,timezone
+import bisect
 import hashlib
 import uuid
 import json
@@ -209,35 +210,52 @@ class JWTDatabaseManager:
         """計算 Token 的 SHA256 hash"""
         return hashlib.sha256(token.encode()).hexdigest()
     
+    def build_session_row(self, username: str, user_id: str, access_token: str,
+                          refresh_token: str, access_expires_at: datetime,
+                          refresh_expires_at: datetime, ip_address: str = None,
+                          user_agent: str = None, device_info: dict = None,
+                          session_id: str = None) -> dict:
+        """
+        建立用戶會話記錄的欄位值（供單筆寫入或批量寫入）
+        
+        Args:
+            session_id: 會話 ID，應與 JWT payload 中的 session_id 相同；未提供時產生 UUID
+        """
+        now = datetime.utcnow()
+        return {
+            'session_id': session_id or str(uuid.uuid4()),
+            'username': username,
+            'user_id': user_id,
+            'access_token_hash': self.hash_token(access_token),
+            'refresh_token_hash': self.hash_token(refresh_token),
+            'created_at': now,
+            'access_expires_at': access_expires_at,
+            'refresh_expires_at': refresh_expires_at,
+            'last_accessed_at': now,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'device_info': json.dumps(device_info) if device_info else None,
+            'is_active': True
+        }
+    
     def create_user_session(self, username: str, user_id: str, access_token: str, 
                           refresh_token: str, access_expires_at: datetime, 
                           refresh_expires_at: datetime, ip_address: str = None, 
-                          user_agent: str = None, device_info: dict = None) -> str:
+                          user_agent: str = None, device_info: dict = None,
+                          session_id: str = None) -> str:
         """
         創建用戶會話記錄
         
         Returns:
             str: session_id
         """
+        row = self.build_session_row(username, user_id, access_token, refresh_token,
+                                     access_expires_at, refresh_expires_at, ip_address,
+                                     user_agent, device_info, session_id)
         with self.db_manager.get_session(self.pool_name) as session:
-            session_id = str(uuid.uuid4())
-            
-            user_session = UserSession(
-                session_id=session_id,
-                username=username,
-                user_id=user_id,
-                access_token_hash=self.hash_token(access_token),
-                refresh_token_hash=self.hash_token(refresh_token),
-                access_expires_at=access_expires_at,
-                refresh_expires_at=refresh_expires_at,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                device_info=json.dumps(device_info) if device_info else None
-            )
-            
-            session.add(user_session)
+            session.add(UserSession(**row))
             session.commit()
-            return session_id
+            return row['session_id']
     
     def update_session_access_time(self, access_token: str):
         """更新會話最後訪問時間"""
@@ -253,6 +271,28 @@ class JWTDatabaseManager:
                 user_session.last_accessed_at = datetime.utcnow()
                 session.commit()
     
+    def bulk_update_session_access_times(self, access_times: dict):
+        """
+        批量更新會話最後訪問時間（單次 executemany UPDATE）
+        
+        Args:
+            access_times: access token hash -> 最後訪問時間（UTC）
+        """
+        if not access_times:
+            return
+        
+        stmt = update(UserSession.__table__).where(
+            UserSession.__table__.c.access_token_hash == bindparam('b_token_hash'),
+            UserSession.__table__.c.is_active == True
+        ).values(last_accessed_at=bindparam('b_accessed_at'))
+        
+        with self.db_manager.get_session(self.pool_name) as session:
+            session.execute(stmt, [
+                {'b_token_hash': token_hash, 'b_accessed_at': accessed_at}
+                for token_hash, accessed_at in access_times.items()
+            ])
+            session.commit()
+    
     def deactivate_session(self, session_id: str = None, access_token: str = None, 
                           logout_reason: str = 'manual'):
         """停用用戶會話"""
@@ -313,53 +353,155 @@ class JWTDatabaseManager:
             
             return blacklisted is not None
     
+    def get_blacklist_entries(self, after_id: int = 0, since: datetime = None):
+        """
+        增量讀取黑名單記錄（供行程內撤銷快取同步）
+        
+        Args:
+            after_id: 只讀取 id 大於此值的記錄
+            since: 另外讀取此時間（UTC）之後加入的記錄，用於補齊延遲提交的交易
+            
+        Returns:
+            list: 包含 id、token_hash、expires_at 的字典列表
+        """
+        with self.db_manager.get_session(self.pool_name) as session:
+            condition = TokenBlacklist.id > after_id
+            if since is not None:
+                condition = or_(condition, TokenBlacklist.blacklisted_at >= since)
+            
+            rows = session.query(
+                TokenBlacklist.id,
+                TokenBlacklist.token_hash,
+                TokenBlacklist.expires_at
+            ).filter(condition).order_by(TokenBlacklist.id).all()
+            
+            return [{
+                'id': row.id,
+                'token_hash': row.token_hash,
+                'expires_at': row.expires_at
+            } for row in rows]
+    
+    @staticmethod
+    def build_login_history_row(username: str, user_id: str, session_id: str,
+                                login_successful: bool = True, auth_method: str = 'ad',
+                                auth_server: str = None, auth_domain: str = None,
+                                ip_address: str = None, user_agent: str = None,
+                                device_info: dict = None, failure_reason: str = None) -> dict:
+        """建立登入歷史記錄的欄位值（登入時間為建立當下）"""
+        return {
+            'username': username,
+            'user_id': user_id,
+            'session_id': session_id,
+            'login_time': datetime.utcnow(),
+            'login_successful': login_successful,
+            'auth_method': auth_method,
+            'auth_server': auth_server,
+            'auth_domain': auth_domain,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'device_info': json.dumps(device_info) if device_info else None,
+            'failure_reason': failure_reason
+        }
+    
+    @staticmethod
+    def build_login_attempt_row(username: str, ip_address: str,
+                                is_successful: bool = False, failure_reason: str = None,
+                                user_agent: str = None, is_suspicious: bool = None) -> dict:
+        """建立登入嘗試記錄的欄位值（is_suspicious 為 None 時，可疑標記於寫入時計算）"""
+        return {
+            'username': username,
+            'ip_address': ip_address,
+            'attempt_time': datetime.utcnow(),
+            'is_successful': is_successful,
+            'failure_reason': failure_reason,
+            'user_agent': user_agent,
+            'is_suspicious': is_suspicious
+        }
+    
     def record_login_history(self, username: str, user_id: str, session_id: str,
                            login_successful: bool = True, auth_method: str = 'ad',
                            auth_server: str = None, auth_domain: str = None,
                            ip_address: str = None, user_agent: str = None,
                            device_info: dict = None, failure_reason: str = None):
         """記錄登入歷史"""
+        row = self.build_login_history_row(username, user_id, session_id, login_successful,
+                                           auth_method, auth_server, auth_domain, ip_address,
+                                           user_agent, device_info, failure_reason)
         with self.db_manager.get_session(self.pool_name) as session:
-            login_record = LoginHistory(
-                username=username,
-                user_id=user_id,
-                session_id=session_id,
-                login_successful=login_successful,
-                auth_method=auth_method,
-                auth_server=auth_server,
-                auth_domain=auth_domain,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                device_info=json.dumps(device_info) if device_info else None,
-                failure_reason=failure_reason
-            )
-            session.add(login_record)
+            session.add(LoginHistory(**row))
             session.commit()
     
     def record_login_attempt(self, username: str, ip_address: str, 
                            is_successful: bool = False, failure_reason: str = None,
                            user_agent: str = None):
         """記錄登入嘗試"""
+        self.bulk_insert_audit_records(attempts=[
+            self.build_login_attempt_row(username, ip_address, is_successful, failure_reason, user_agent)
+        ])
+    
+    def _mark_suspicious_attempts(self, session, attempts: list):
+        """
+        標記可疑的登入嘗試（15分鐘內同帳號同 IP 已失敗3次以上）
+        
+        整批嘗試只查詢一次資料庫，批次內較早的失敗也計入；
+        已由登入節流判定（is_suspicious 不為 None）的嘗試不重新計算
+        """
+        pending = [attempt for attempt in attempts if attempt['is_suspicious'] is None]
+        if not pending:
+            return
+        
+        failed = [attempt for attempt in attempts if not attempt['is_successful']]
+        if not any(not attempt['is_successful'] for attempt in pending):
+            for attempt in pending:
+                attempt['is_suspicious'] = False
+            return
+        
+        window = timedelta(minutes=15)
+        since = min(attempt['attempt_time'] for attempt in failed) - window
+        rows = session.query(
+            UserLoginAttempt.username, UserLoginAttempt.ip_address, UserLoginAttempt.attempt_time
+        ).filter(
+            UserLoginAttempt.username.in_({attempt['username'] for attempt in failed}),
+            UserLoginAttempt.attempt_time > since,
+            UserLoginAttempt.is_successful == False
+        ).all()
+        
+        failures = {}
+        for row in rows:
+            failures.setdefault((row.username, row.ip_address), []).append(row.attempt_time)
+        for times in failures.values():
+            times.sort()
+        
+        for attempt in sorted(attempts, key=lambda item: item['attempt_time']):
+            key = (attempt['username'], attempt['ip_address'])
+            times = failures.setdefault(key, [])
+            start = bisect.bisect_right(times, attempt['attempt_time'] - window)
+            end = bisect.bisect_left(times, attempt['attempt_time'])
+            if attempt['is_suspicious'] is None:
+                attempt['is_suspicious'] = end - start >= 3  # 15分鐘內失敗3次視為可疑
+            if not attempt['is_successful']:
+                bisect.insort(times, attempt['attempt_time'])
+    
+    def bulk_insert_audit_records(self, sessions: list = None, histories: list = None, attempts: list = None):
+        """
+        以單一交易批量寫入會話、登入歷史與登入嘗試（每個表一次 executemany INSERT）
+        
+        Args:
+            sessions: build_session_row 的輸出列表
+            histories: build_login_history_row 的輸出列表
+            attempts: build_login_attempt_row 的輸出列表
+        """
+        sessions, histories, attempts = sessions or [], histories or [], attempts or []
+        if not (sessions or histories or attempts):
+            return
+        
         with self.db_manager.get_session(self.pool_name) as session:
-            # 檢查是否為可疑活動
-            recent_attempts = session.query(UserLoginAttempt).filter(
-                UserLoginAttempt.username == username,
-                UserLoginAttempt.ip_address == ip_address,
-                UserLoginAttempt.attempt_time > datetime.utcnow() - timedelta(minutes=15),
-                UserLoginAttempt.is_successful == False
-            ).count()
-            
-            is_suspicious = recent_attempts >= 3  # 15分鐘內失敗3次視為可疑
-            
-            attempt = UserLoginAttempt(
-                username=username,
-                ip_address=ip_address,
-                is_successful=is_successful,
-                failure_reason=failure_reason,
-                user_agent=user_agent,
-                is_suspicious=is_suspicious
-            )
-            session.add(attempt)
+            self._mark_suspicious_attempts(session, attempts)
+            for table, rows in ((UserSession.__table__, sessions),
+                                (LoginHistory.__table__, histories),
+                                (UserLoginAttempt.__table__, attempts)):
+                if rows:
+                    session.execute(insert(table), rows)
             session.commit()
     
     def get_user_active_sessions(self, username: str):
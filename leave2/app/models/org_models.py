@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+組織樹相關的資料庫模型
+保存自 AD 同步的使用者目錄與主管→下屬的遞移閉包，供重啟後立即載入
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Index, delete, insert
+from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+Base = declarative_base()
+
+class OrgDirectoryUser(Base):
+    """組織目錄使用者表 - AD 使用者快照"""
+    __tablename__ = 'org_directory_users'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sam_account = Column(String(64), unique=True, nullable=False, index=True)
+    dn = Column(String(400), nullable=False)
+    manager_dn = Column(String(400), nullable=True)
+    manager_sam = Column(String(64), nullable=True, index=True)
+
+    # 顯示資訊
+    display_name = Column(String(255), nullable=True)
+    given_name = Column(String(128), nullable=True)
+    surname = Column(String(128), nullable=True)
+    cn = Column(String(255), nullable=True)
+    mail = Column(String(255), nullable=True)
+    upn = Column(String(255), nullable=True)
+    department = Column(String(255), nullable=True)
+    title = Column(String(255), nullable=True)
+    phone = Column(String(64), nullable=True)
+    mobile = Column(String(64), nullable=True)
+    employee_id = Column(String(32), nullable=True, index=True)
+    company = Column(String(255), nullable=True)
+
+    synced_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class OrgTreeClosure(Base):
+    """組織樹遞移閉包表 - 每位主管與其所有（含跨級）下屬"""
+    __tablename__ = 'org_tree_closure'
+
+    ancestor_sam = Column(String(64), primary_key=True)
+    descendant_sam = Column(String(64), primary_key=True)
+    depth = Column(Integer, nullable=False)  # 1 為直屬下屬
+
+    __table_args__ = (
+        Index('idx_org_tree_descendant', 'descendant_sam'),
+    )
+
+# 使用者表中與使用者資訊字典對應的欄位
+USER_COLUMNS = (
+    'sam_account', 'dn', 'manager_dn', 'manager_sam', 'display_name', 'given_name',
+    'surname', 'cn', 'mail', 'upn', 'department', 'title', 'phone', 'mobile',
+    'employee_id', 'company'
+)
+
+class OrgTreeDatabaseManager:
+    """組織樹資料庫管理器"""
+
+    # 單次 executemany 的列數
+    INSERT_BATCH_SIZE = 1000
+
+    def __init__(self, db_manager):
+        """
+        初始化組織樹資料庫管理器
+
+        Args:
+            db_manager: FlaskDatabaseManager 實例
+        """
+        self.db_manager = db_manager
+        self.pool_name = 'mysql_hr'  # 使用哪個連接池
+
+    def create_tables(self):
+        """創建組織樹相關表格"""
+        try:
+            pool = self.db_manager.get_pool(self.pool_name)
+            Base.metadata.create_all(pool.engine)
+            return True
+        except Exception as e:
+            raise Exception(f"創建組織樹表格失敗: {str(e)}")
+
+    def replace_snapshot(self, users: List[Dict[str, Any]], closure: List[Tuple[str, str, int]]):
+        """
+        以單一交易整批替換組織樹快照
+
+        Args:
+            users: 使用者資訊字典列表（鍵對應 USER_COLUMNS）
+            closure: (主管帳號, 下屬帳號, 層級) 列表
+        """
+        synced_at = datetime.utcnow()
+        user_rows = [
+            dict({column: user.get(column) for column in USER_COLUMNS}, synced_at=synced_at)
+            for user in users
+        ]
+        closure_rows = [
+            {'ancestor_sam': ancestor, 'descendant_sam': descendant, 'depth': depth}
+            for ancestor, descendant, depth in closure
+        ]
+
+        with self.db_manager.get_session(self.pool_name) as session:
+            try:
+                session.execute(delete(OrgTreeClosure.__table__))
+                session.execute(delete(OrgDirectoryUser.__table__))
+                for table, rows in ((OrgDirectoryUser.__table__, user_rows),
+                                    (OrgTreeClosure.__table__, closure_rows)):
+                    for index in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                        session.execute(insert(table), rows[index:index + self.INSERT_BATCH_SIZE])
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+
+    def load_snapshot(self) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str, int]]]:
+        """
+        載入組織樹快照
+
+        Returns:
+            tuple: (使用者資訊字典列表, (主管帳號, 下屬帳號, 層級) 列表)
+        """
+        user_table = OrgDirectoryUser.__table__
+        closure_table = OrgTreeClosure.__table__
+
+        with self.db_manager.get_session(self.pool_name) as session:
+            users = [
+                {column: row._mapping[column] or '' for column in USER_COLUMNS}
+                for row in session.execute(user_table.select())
+            ]
+            closure = [
+                (row.ancestor_sam, row.descendant_sam, row.depth)
+                for row in session.execute(closure_table.select())
+            ]
+        return users, closure
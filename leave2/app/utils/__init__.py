@@ -1,12 +1,13 @@
 from .flask_helpers import (
     get_db_manager, get_db_session, get_mysql_session, 
-    get_mssql_session, with_database, QueryBuilder
+    get_mssql_session, with_database, QueryBuilder, build_in_clause
 )
 
 from .timezone_utils import TimezoneManager
+from .leave_balance import LeaveBalanceCalculator
 
 __all__ = [
     'get_db_manager', 'get_db_session', 'get_mysql_session', 
-    'get_mssql_session', 'with_database', 'QueryBuilder',
-    'TimezoneManager'
+    'get_mssql_session', 'with_database', 'QueryBuilder', 'build_in_clause',
+    'TimezoneManager', 'LeaveBalanceCalculator'
 ]
\ No newline at end of file
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+快取工具模組
+提供執行緒安全、容量受限（LRU）並具 TTL 的行程內快取
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """具 TTL 與 LRU 淘汰策略的記憶體快取"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300, name: str = 'cache'):
+        """
+        初始化快取
+
+        Args:
+            max_size: 最大項目數，超過時淘汰最久未使用的項目
+            ttl: 預設存活時間（秒）
+            name: 快取名稱（用於統計顯示）
+        """
+        if max_size < 1:
+            raise ValueError(f"無效的快取大小: {max_size}")
+
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 統計計數器
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        取得快取值
+
+        Args:
+            key: 快取鍵
+            default: 未命中時的返回值
+
+        Returns:
+            Any: 快取值或 default
+        """
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        寫入快取值
+
+        Args:
+            key: 快取鍵
+            value: 快取值
+            ttl: 存活時間（秒），未指定時使用預設值
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        使單一快取項目失效
+
+        Returns:
+            bool: 是否有項目被移除
+        """
+        with self._lock:
+            if self._data.pop(key, _MISSING) is _MISSING:
+                return False
+            self.invalidations += 1
+            return True
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        使所有符合條件的快取項目失效
+
+        Args:
+            predicate: 接收快取鍵並返回是否移除的函數
+
+        Returns:
+            int: 被移除的項目數
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空快取"""
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def keys(self) -> List[Hashable]:
+        """返回目前未過期的快取鍵（快照）"""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (_, expires_at) in self._data.items() if expires_at > now]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        獲取快取統計信息
+
+        Returns:
+            dict: 命中、未命中、淘汰等計數
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
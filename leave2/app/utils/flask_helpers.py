@@ -66,6 +66,25 @@ def with_database(pool_name: str):
         return wrapper
     return decorator
 
+def build_in_clause(prefix: str, values: List[Any], params: Dict[str, Any]) -> str:
+    """
+    為 IN 條件建立具名參數佔位符
+    
+    Args:
+        prefix: 參數名稱前綴
+        values: 參數值列表
+        params: 查詢參數字典（會被就地更新）
+        
+    Returns:
+        str: 例如 "(:eid_0, :eid_1)"
+    """
+    placeholders = []
+    for index, value in enumerate(values):
+        name = f"{prefix}_{index}"
+        params[name] = value
+        placeholders.append(f":{name}")
+    return "(" + ", ".join(placeholders) + ")"
+
 # 查詢建構器輔助類
 class QueryBuilder:
     """簡單的查詢建構器"""
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+HTTP 條件請求工具模組
+提供 ETag / Last-Modified 產生與 304 Not Modified 判斷
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from flask import request, Response
+
+
+def compute_etag(*parts: Any) -> str:
+    """
+    根據任意可序列化內容計算 ETag
+
+    Args:
+        *parts: 用於計算指紋的內容
+
+    Returns:
+        str: 不含引號的 ETag 值
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def is_not_modified(etag: Optional[str], last_modified: Optional[datetime] = None) -> bool:
+    """
+    判斷客戶端快取是否仍為最新
+
+    僅在 GET / HEAD 請求時生效；If-None-Match 優先於 If-Modified-Since，
+    並依 RFC 9110 使用弱比較（代理或 CDN 改為 W/"..." 的 ETag 仍可命中，* 匹配任何 ETag）
+
+    Args:
+        etag: 目前資源的 ETag
+        last_modified: 目前資源的最後修改時間
+
+    Returns:
+        bool: 客戶端副本是否仍為最新
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+
+    if request.if_none_match:
+        return bool(etag) and request.if_none_match.contains_weak(etag)
+
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0, tzinfo=None) <= \
+            request.if_modified_since.replace(tzinfo=None)
+
+    return False
+
+
+def set_cache_headers(response: Response, etag: Optional[str],
+                      last_modified: Optional[datetime] = None,
+                      max_age: int = 0) -> Response:
+    """
+    設置條件請求相關的響應標頭
+
+    Args:
+        response: Flask 響應對象
+        etag: ETag 值
+        last_modified: 最後修改時間
+        max_age: 客戶端可直接使用快取的秒數（0 表示每次都需重新驗證）
+
+    Returns:
+        Response: 同一個響應對象
+    """
+    if etag:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = f'private, max-age={max_age}, must-revalidate'
+    return response
+
+
+def not_modified_response(etag: Optional[str], last_modified: Optional[datetime] = None,
+                          max_age: int = 0) -> Response:
+    """
+    建立 304 Not Modified 響應
+
+    Returns:
+        Response: 不含內容的 304 響應
+    """
+    response = Response(status=304)
+    return set_cache_headers(response, etag, last_modified, max_age)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+JSON 序列化模組
+取代 Flask 預設的 JSON 提供者：安裝 orjson 時以 orjson 編碼 / 解碼，
+未安裝時使用標準 json 模組；兩者皆不排序鍵、不縮排，
+日期與 Decimal 的輸出格式與 Flask 預設相同
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from app.extensions.request_timing import request_timing
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(o: Any) -> Any:
+    """序列化 JSON 不支援的型別（與 Flask 預設相同，另支援 time）"""
+    if isinstance(o, date):
+        # datetime 為 date 的子類別；與 Flask 預設一致輸出 HTTP 日期格式
+        return http_date(o)
+    if isinstance(o, time):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """以 orjson 加速的 JSON 提供者（app.json）"""
+
+    default = staticmethod(_default)
+    sort_keys = False
+    compact = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        config = app.config.get('JSON_PROVIDER_CONFIG', {})
+        self.sort_keys = config.get('SORT_KEYS', False)
+        self.use_orjson = ORJSON_AVAILABLE and config.get('USE_ORJSON', True)
+
+        self._orjson_option = 0
+        if self.use_orjson:
+            # 日期時間交給 _default 處理，保持與 Flask 預設相同的輸出格式
+            self._orjson_option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                self._orjson_option |= orjson.OPT_SORT_KEYS
+
+    def _dumps_bytes(self, obj: Any) -> bytes:
+        """以 orjson 編碼；遇到 orjson 不支援的值（例如超過 64 位元的整數）時改用標準 json"""
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_option)
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.use_orjson and not kwargs:
+            return self._dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if self.use_orjson and not kwargs:
+            # orjson.JSONDecodeError 為 json.JSONDecodeError 的子類別，Flask 的錯誤處理不受影響
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    @request_timing.timed('serialize')
+    def response(self, *args: Any, **kwargs: Any):
+        """建立 JSON 響應（orjson 直接輸出 bytes，不經過 str）"""
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
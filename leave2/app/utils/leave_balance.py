@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+假期餘額計算模組
+以員工為單位一次性計算剩餘特休，避免在出勤記錄的每一列重複計算
+"""
+from typing import Dict, List, Optional
+
+from app.extensions import get_logger
+from .flask_helpers import get_db_manager, build_in_clause
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+
+class LeaveBalanceCalculator:
+    """員工假期餘額計算器"""
+
+    # 計入特休使用量的假別
+    ANNUAL_LEAVE_TYPES = ('PN', 'PT')
+
+    def __init__(self, pool_name: str = 'mssql_hr'):
+        """
+        初始化假期餘額計算器
+
+        Args:
+            pool_name: HR 資料庫連接池名稱
+        """
+        self.pool_name = pool_name
+
+    def get_balances(self, employee_ids: List[str]) -> Dict[str, Optional[int]]:
+        """
+        批量計算員工剩餘特休（單次集合查詢）
+
+        剩餘特休 = 到職月數 - 已使用特休數量
+
+        Args:
+            employee_ids: 員工編號列表
+
+        Returns:
+            dict: 員工編號 -> 剩餘特休，查無員工資料時為 None
+        """
+        balances = {employee_id: None for employee_id in employee_ids}
+        if not employee_ids:
+            return balances
+
+        params = {}
+        id_clause = build_in_clause('bal_eid', employee_ids, params)
+        type_clause = build_in_clause('bal_type', list(self.ANNUAL_LEAVE_TYPES), params)
+        query = f"""
+        SELECT C.EmployeeID,
+        CONVERT(int, DATEDIFF(MONTH, C.DateJoined, GETDATE()) - ISNULL(U.UsedQuantity, 0)) AS remain
+        FROM D09T0201 C
+        left join (
+            SELECT EmployeeID, SUM(Quantity) AS UsedQuantity
+            FROM D15T2020
+            WHERE LeaveDate IS NOT NULL
+                AND EmployeeID IN {id_clause}
+                AND LeaveTypeID IN {type_clause}
+                AND TransType != 'I03'
+            GROUP BY EmployeeID
+        ) U on C.EmployeeID = U.EmployeeID
+        WHERE C.EmployeeID IN {id_clause}
+        """
+
+        pool = get_db_manager().get_pool(self.pool_name)
+        for row in pool.execute_query(query, params):
+            employee_id = str(row.EmployeeID).strip()
+            balances[employee_id] = row.remain
+
+        logger.debug("計算了 %d 位員工的假期餘額", len(employee_ids))
+        return balances
+
+    def get_balance(self, employee_id: str) -> Optional[int]:
+        """
+        計算單一員工的剩餘特休
+
+        Args:
+            employee_id: 員工編號
+
+        Returns:
+            int: 剩餘特休，查無員工資料時為 None
+        """
+        return self.get_balances([employee_id]).get(employee_id)
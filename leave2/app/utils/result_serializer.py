@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+查詢結果序列化模組
+以欄為單位轉換查詢結果：每欄只判斷一次型別並選定轉換函數，不再逐列建立字典後逐格檢查
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from uuid import UUID
+
+# 型別 -> 轉換函數（日期時間一律轉為 ISO 8601 字串，與 API 既有格式一致）
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    time: time.isoformat,
+}
+
+# json_safe=True 時額外轉換 json 模組不支援的型別
+_JSON_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    **_CONVERTERS,
+    Decimal: str,
+    UUID: str,
+    bytes: lambda value: value.decode('utf-8', errors='replace'),
+}
+
+
+def _pick_converter(values: Sequence[Any], json_safe: bool) -> Optional[Callable[[Any], Any]]:
+    """依欄位中第一個非空值的型別選定轉換函數（資料庫欄位型別一致）"""
+    converters = _JSON_CONVERTERS if json_safe else _CONVERTERS
+    for value in values:
+        if value is not None:
+            value_type = type(value)
+            converter = converters.get(value_type)
+            if converter is None:
+                # 子類別（例如 pandas.Timestamp）依繼承關係尋找
+                for base, candidate in converters.items():
+                    if isinstance(value, base):
+                        return candidate
+            return converter
+    return None
+
+
+def rows_to_columns(rows: Iterable[Any], json_safe: bool = False) -> Dict[str, List[Any]]:
+    """
+    將查詢結果轉換為欄位導向格式
+
+    Args:
+        rows: execute_query 的結果（Row 列表）或 SQLAlchemy Result
+        json_safe: 是否將 Decimal / UUID / bytes 也轉為字串（可直接交給任何 JSON 編碼器）
+
+    Returns:
+        dict: 欄位名稱 -> 值列表
+    """
+    keys = list(rows.keys()) if hasattr(rows, 'keys') else None
+    rows = rows if isinstance(rows, list) else list(rows)
+    if not rows:
+        return {key: [] for key in keys or []}
+
+    keys = keys or list(rows[0]._fields)
+    columns = {}
+    for key, values in zip(keys, zip(*rows)):
+        converter = _pick_converter(values, json_safe)
+        if converter is None:
+            columns[key] = list(values)
+        else:
+            columns[key] = [None if value is None else converter(value) for value in values]
+    return columns
+
+
+def rows_to_records(rows: Iterable[Any], json_safe: bool = False) -> List[Dict[str, Any]]:
+    """
+    將查詢結果轉換為字典列表（取代逐列 dict(row._mapping) 與逐格型別檢查）
+
+    Args:
+        rows: execute_query 的結果（Row 列表）或 SQLAlchemy Result
+        json_safe: 是否將 Decimal / UUID / bytes 也轉為字串
+
+    Returns:
+        list: 欄位名稱 -> 值 的字典列表
+    """
+    columns = rows_to_columns(rows, json_safe)
+    if not columns:
+        return []
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
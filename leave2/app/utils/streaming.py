@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+串流響應工具模組
+將逐批產生的記錄以 NDJSON（每行一筆 JSON）串流輸出，匯出大量資料時不需在記憶體中組出完整響應
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+from flask import Response, stream_with_context
+
+from app.extensions import get_logger
+
+# 使用模組特定的 logger
+logger = get_logger(__name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _json_default(value: Any) -> Any:
+    """序列化 json 模組不支援的資料庫型別"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_lines(chunks: Iterable[Iterable[Dict[str, Any]]]) -> Iterable[str]:
+    """
+    將逐批產生的記錄轉為 NDJSON 文字（每批合併為一次寫出）
+
+    Args:
+        chunks: 記錄批次的可迭代物件（例如 stream_query 的輸出經轉換後）
+
+    Yields:
+        str: 一批記錄的 NDJSON 文字
+    """
+    for chunk in chunks:
+        lines = [json.dumps(record, ensure_ascii=False, default=_json_default) for record in chunk]
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+def ndjson_response(chunks: Iterable[Iterable[Dict[str, Any]]], filename: Optional[str] = None,
+                    headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    建立 NDJSON 串流響應
+
+    響應在迭代期間保留請求上下文；客戶端中斷時關閉來源產生器，使資料庫連接歸還連接池。
+    響應標頭送出後才發生的錯誤無法改變狀態碼，改以最後一行錯誤記錄
+    {"success": false, "message": ..., "error": ..., "count": 已輸出筆數} 告知客戶端檔案不完整
+
+    Args:
+        chunks: 記錄批次的可迭代物件
+        filename: 下載檔名（可選，設定 Content-Disposition）
+        headers: 其他響應標頭
+
+    Returns:
+        Response: 串流響應
+    """
+    def generate():
+        count = 0
+        try:
+            for text in ndjson_lines(chunks):
+                count += text.count('\n')
+                yield text
+        except Exception as e:
+            logger.error("NDJSON 串流輸出中斷（已輸出 %d 筆）: %s", count, e)
+            yield json.dumps({
+                'success': False,
+                'message': '串流輸出中斷，資料不完整',
+                'error': str(e),
+                'count': count
+            }, ensure_ascii=False) + '\n'
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+            logger.info("NDJSON 串流輸出結束，共 %d 筆", count)
+
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # 串流響應長度未知，且不應被代理伺服器緩衝
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    for key, value in (headers or {}).items():
+        response.headers[key] = value
+    return response
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化效能比較
+
+以 /leave/attendance/batch 形狀的響應（多位員工、每人多筆出勤記錄）比較：
+    - Flask 預設 JSON 提供者（排序鍵、跳脫非 ASCII）
+    - FastJSONProvider（標準 json 模組）
+    - FastJSONProvider（orjson，需安裝 orjson）
+
+用法:
+    python benchmark_json.py [員工數] [每人記錄數] [重複次數]
+"""
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+
+from app.utils.json_provider import FastJSONProvider, ORJSON_AVAILABLE
+
+LEAVE_TYPES = [('P', 'Phép năm'), ('O', 'Nghỉ ốm'), ('K', 'Nghỉ không lương'), ('T', 'Thai sản')]
+
+
+def build_payload(employees: int, records_per_employee: int, serialized: bool = True) -> dict:
+    """
+    建立出勤批量查詢的響應內容
+
+    Args:
+        employees: 員工數
+        records_per_employee: 每位員工的出勤記錄數
+        serialized: 記錄是否已由 rows_to_records 轉換（False 時保留 date / Decimal 原始值）
+    """
+    start = date(2025, 1, 1)
+    results = {}
+    for index in range(employees):
+        employee_id = f"VN{index:05d}"
+        records = []
+        for day in range(records_per_employee):
+            leave_type_id, leave_type_name = LEAVE_TYPES[day % len(LEAVE_TYPES)]
+            leave_date = start + timedelta(days=day * 3)
+            quantity = Decimal('0.5') if day % 5 == 0 else Decimal('1.0')
+            records.append({
+                'EmployeeID': employee_id,
+                'LeaveTypeID': leave_type_id,
+                'LeaveTypeNameU': leave_type_name,
+                'Quantity': str(quantity) if serialized else quantity,
+                'LeaveDate': leave_date.isoformat() if serialized else leave_date,
+                'TranYear': 2025
+            })
+        results[employee_id] = {'remain': Decimal('7.5'), 'records': records, 'count': len(records)}
+    return {
+        'success': True,
+        'results': results,
+        'total_count': employees * records_per_employee,
+        'timestamp': datetime(2025, 6, 1, 8, 30).strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def main():
+    employees = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    records_per_employee = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    # JSON 提供者只保存 app 的弱參照，需保留 app 實例
+    default_app = Flask('default')
+    apps = [('Flask 預設', default_app)]
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.config['JSON_PROVIDER_CONFIG'] = {'USE_ORJSON': False}
+    stdlib_app.json = FastJSONProvider(stdlib_app)
+    apps.append(('FastJSONProvider (json)', stdlib_app))
+
+    if ORJSON_AVAILABLE:
+        orjson_app = Flask('orjson')
+        orjson_app.json = FastJSONProvider(orjson_app)
+        apps.append(('FastJSONProvider (orjson)', orjson_app))
+    else:
+        print("未安裝 orjson，略過 orjson 測試（pip install orjson）")
+
+    print(f"響應內容: {employees} 位員工 × {records_per_employee} 筆記錄，重複 {repeat} 次\n")
+    for label, serialized in (('已轉換記錄', True), ('原始 date / Decimal', False)):
+        payload = build_payload(employees, records_per_employee, serialized)
+        print(f"[{label}]")
+        baseline = None
+        for name, app in apps:
+            provider = app.json
+            with app.app_context():
+                size = len(provider.response(payload).get_data())
+                seconds = min(timeit.repeat(lambda: provider.response(payload).get_data(),
+                                            number=1, repeat=repeat))
+            baseline = baseline or seconds
+            print(f"  {name:<28} {seconds * 1000:8.2f} ms  {size / 1024:8.1f} KiB  x{baseline / seconds:.2f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()